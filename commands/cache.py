@@ -0,0 +1,33 @@
+import asyncio
+
+from core.nlp import normalize_cache_stats
+
+
+class Command:
+    """Show result cache statistics or clear the cache."""
+
+    trigger = ["cache"]
+
+    def __init__(self, context):
+        self.context = context
+
+    async def run(self, args: str) -> str:
+        await asyncio.sleep(0)
+        dispatcher = self.context.get("dispatcher")
+        cache = getattr(dispatcher, "result_cache", None)
+        if cache is None:
+            return "[Lex] Result cache not available."
+
+        if args.strip().lower() == "clear":
+            cache.clear()
+            return "[Lex] Result cache cleared."
+
+        s = cache.stats()
+        n = normalize_cache_stats()
+        return (
+            f"[Lex] Cache: {s['entries']} entries, {s['bytes'] // 1024} KB | "
+            f"hits {s['hits']}, misses {s['misses']} "
+            f"({s['hit_rate']:.0%}) | evictions {s['evictions']}\n"
+            f"[Lex] NLP memo: {n['entries']} entries | hits {n['hits']}, "
+            f"misses {n['misses']} ({n['hit_rate']:.0%})"
+        )
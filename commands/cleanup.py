@@ -8,6 +8,7 @@ class Command:
     """Simple disk cleanup utilities."""
 
     trigger = ["cleanup"]
+    executor = "process"
 
     def __init__(self, context):
         self.context = context
@@ -1,9 +1,19 @@
 class Command:
     trigger = ["define"]
+    cache_ttl = 86400
+    cache_settings = ("use_cloud",)
 
     def __init__(self, context):
         self.context = context
-        self.settings = context.get("settings", {})
+
+    @property
+    def settings(self) -> dict:
+        return self.context.get("settings", {})
+
+    def cacheable(self, result: str) -> bool:
+        # Only real lookups are worth keeping; offline and error replies
+        # all carry the [Lex] prefix
+        return not result.startswith("[Lex]")
 
     async def run(self, args: str) -> str:
         """Look up a word using an online dictionary API when allowed."""
@@ -7,6 +7,7 @@ DOCS_FILE = Path("documentation.md")
 
 class Command:
     trigger = ["help"]
+    cache_ttl = 60
 
     def __init__(self, context):
         self.context = context
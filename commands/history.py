@@ -1,20 +1,106 @@
 import asyncio
+import re
+import time
+from datetime import datetime, timedelta
+
+UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+DEFAULT_LIMIT = 10
+FILTERS = ("command", "since", "until")
+
+
+def parse_when(value: str) -> float | None:
+    """``30m``/``2h``/``3d``/``1w`` ago, ``today``, ``yesterday`` or an ISO date."""
+    value = value.strip().lower()
+    match = re.fullmatch(r"(\d+)([mhdw])", value)
+    if match:
+        return time.time() - int(match.group(1)) * UNITS[match.group(2)]
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    if value == "today":
+        return midnight.timestamp()
+    if value == "yesterday":
+        return (midnight - timedelta(days=1)).timestamp()
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
 
 
 class Command:
-    """Show recent command history and results."""
+    """Show recent command history and results, or search all of it.
+
+    ``history`` lists this session's last few commands. ``history 20`` shows
+    the last 20 from the on-disk history, and the filters ``search <text>``,
+    ``command <trigger>``, ``since <when>`` and ``until <when>`` can be
+    combined, e.g. ``history command weather since 7d``.
+    """
 
     trigger = ["history", "context"]
 
     def __init__(self, context):
         self.context = context
 
-    async def run(self, args: str) -> str:
-        await asyncio.sleep(0)
-        history: list[tuple[str, str]] = self.context.get("history", [])
+    def _recent(self) -> str:
+        history = list(self.context.get("history", []))
         if not history:
             return "[Lex] No recent history."
         lines = []
         for i, (cmd, resp) in enumerate(history[-5:], start=1):
             lines.append(f"{i}. > {cmd} | {resp}")
         return "\n".join(lines)
+
+    @staticmethod
+    def _parse(args: str) -> dict | str:
+        """Turn the arguments into ``HistoryStore.query`` filters, or an error."""
+        filters: dict = {"limit": DEFAULT_LIMIT}
+        tokens = args.split()
+        i = 0
+        while i < len(tokens):
+            word = tokens[i].lower()
+            if word.isdigit():
+                filters["limit"] = int(word)
+                i += 1
+            elif word in ("search", "find"):
+                # The text runs up to the next filter keyword
+                end = i + 1
+                while end < len(tokens) and tokens[end].lower() not in FILTERS:
+                    end += 1
+                filters["text"] = " ".join(tokens[i + 1:end])
+                i = end
+            elif word in FILTERS and i + 1 < len(tokens):
+                value = tokens[i + 1]
+                if word == "command":
+                    filters["trigger"] = value
+                else:
+                    when = parse_when(value)
+                    if when is None:
+                        return f"[Lex] Couldn't read the time '{value}'. Try 2h, 3d or 2024-05-01."
+                    filters[word] = when
+                i += 2
+            else:
+                return (
+                    "[Lex] Usage: history [N] [search <text>] [command <trigger>] "
+                    "[since <when>] [until <when>]"
+                )
+        return filters
+
+    @staticmethod
+    def _line(entry) -> str:
+        when = datetime.fromtimestamp(entry.ts).strftime("%Y-%m-%d %H:%M")
+        result = (entry.result.splitlines() or [""])[0]
+        if len(result) > 80:
+            result = result[:77] + "..."
+        return f"{when} > {entry.input} | {result} ({entry.latency_ms:.0f}ms)"
+
+    async def run(self, args: str) -> str:
+        await asyncio.sleep(0)
+        store = getattr(self.context.get("dispatcher"), "history", None)
+        if not args.strip() or store is None:
+            return self._recent()
+
+        filters = self._parse(args)
+        if isinstance(filters, str):
+            return filters
+        entries = await asyncio.to_thread(lambda: list(store.query(**filters)))
+        if not entries:
+            return "[Lex] Nothing in history matches."
+        return "\n".join(self._line(e) for e in reversed(entries))
@@ -3,6 +3,8 @@ import json
 import os
 from pathlib import Path
 
+from core.engine import HOTKEY
+
 
 HOTKEY_FILE = Path("memory") / "hotkeys.json"
 
@@ -47,8 +49,11 @@ class Command:
             dispatcher = self.context.get("dispatcher")
             if not dispatcher:
                 return
-            asyncio.run_coroutine_threadsafe(
-                dispatcher.dispatch(command), self.loop
+            # Runs on the keyboard thread; hand the command to the dispatch
+            # engine, which drops it rather than queueing without bound and
+            # lets it outrank background work
+            self.loop.call_soon_threadsafe(
+                dispatcher.engine.submit_nowait, command, HOTKEY
             )
 
         return inner
@@ -85,6 +90,11 @@ class Command:
         self.active = False
         return "[Lex] Hotkey listener stopped."
 
+    def close(self) -> None:
+        """Release registered hotkeys when the plugin is reloaded."""
+        if self.active:
+            self.stop_listener()
+
     # ---------------------------------------------------------
     # Command entry point
     # ---------------------------------------------------------
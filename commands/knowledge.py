@@ -11,31 +11,37 @@ class Command:
     """Simple knowledge base query from bundled docs."""
 
     trigger = ["knowledge"]
+    cache_ttl = 300
 
     def __init__(self, context):
         self.context = context
         self.files = [p for p in DOC_FILES if p.exists()]
 
     async def run(self, args: str) -> str:
+        return "\n".join([chunk async for chunk in self.stream(args)])
+
+    async def stream(self, args: str):
+        """Yield matching lines as they are found."""
         await asyncio.sleep(0)
         query = args.strip().lower()
         if not query:
-            return "[Lex] Ask me about something in the docs."
+            yield "[Lex] Ask me about something in the docs."
+            return
 
-        matches: list[str] = []
+        found = 0
         for file in self.files:
             try:
                 with file.open("r", encoding="utf-8") as fh:
                     for i, line in enumerate(fh, 1):
                         if query in line.lower():
-                            matches.append(f"{file.name}:{i}: {line.strip()}")
-                            if len(matches) >= 3:
-                                break
+                            yield f"{file.name}:{i}: {line.strip()}"
+                            found += 1
+                            if found >= 3:
+                                return
             except Exception:
                 continue
-            if len(matches) >= 3:
-                break
+            # Let other work run between files
+            await asyncio.sleep(0)
 
-        if not matches:
-            return "[Lex] Nothing found."
-        return "\n".join(matches)
+        if not found:
+            yield "[Lex] Nothing found."
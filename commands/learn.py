@@ -9,16 +9,19 @@ class Command:
         self.context = context
 
     async def run(self, args: str) -> str:
-        """Teach Lex new phrases or list learned phrases."""
+        """Teach Lex new phrases, list learned phrases or retrain from scratch."""
         args = args.strip()
         if args == "list":
             custom = await asyncio.to_thread(nlp.get_custom_intents)
             if not custom:
                 return "[Lex] I haven't learned anything yet."
             return "\n".join(f"{k} -> {v}" for k, v in custom.items())
+        if args == "rebuild":
+            nlp.CLASSIFIER.rebuild()
+            return "[Lex] Retraining the intent model in the background."
 
         if " as " not in args:
-            return "[Lex] Usage: learn <phrase> as <command>"
+            return "[Lex] Usage: learn <phrase> as <command> | list | rebuild"
 
         phrase, command = args.split(" as ", 1)
         phrase = phrase.strip()
@@ -27,5 +30,8 @@ class Command:
             return "[Lex] Usage: learn <phrase> as <command>"
 
         await asyncio.to_thread(nlp.add_custom_intent, phrase, command)
+        dispatcher = self.context.get("dispatcher")
+        if dispatcher is not None:
+            dispatcher.rebuild_suggestions()
         return f"[Lex] Learned '{phrase}' -> '{command}'"
 
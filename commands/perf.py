@@ -0,0 +1,68 @@
+import asyncio
+import json
+from pathlib import Path
+
+from core.nlp import normalize_cache_stats
+
+EXPORT_FILE = Path("memory") / "perf.json"
+
+
+class Command:
+    """Show per-command latency percentiles and dispatch stage timings."""
+
+    trigger = ["perf"]
+
+    def __init__(self, context):
+        self.context = context
+
+    def _extra(self, dispatcher) -> dict:
+        extra = {"engine": dispatcher.engine.metrics()}
+        cache = getattr(dispatcher, "result_cache", None)
+        if cache is not None:
+            extra["cache"] = cache.stats()
+        extra["nlp_cache"] = normalize_cache_stats()
+        return extra
+
+    @staticmethod
+    def _line(name: str, s: dict) -> str:
+        line = (
+            f"{name}: n={s['count']} p50 {s['p50_ms']:.1f}ms "
+            f"p95 {s['p95_ms']:.1f}ms p99 {s['p99_ms']:.1f}ms "
+            f"max {s['max_ms']:.1f}ms"
+        )
+        if s.get("timeouts") or s.get("errors"):
+            line += f" | {s['timeouts']} timeouts, {s['errors']} errors"
+        return line
+
+    async def run(self, args: str) -> str:
+        await asyncio.sleep(0)
+        dispatcher = self.context.get("dispatcher")
+        perf = getattr(dispatcher, "perf", None)
+        if perf is None:
+            return "[Lex] Perf stats not available."
+
+        parts = args.strip().split(maxsplit=1)
+        action = parts[0].lower() if parts else ""
+        if action == "reset":
+            perf.reset()
+            return "[Lex] Perf stats cleared."
+        if action == "json":
+            data = perf.snapshot()
+            data.update(self._extra(dispatcher))
+            return json.dumps(data, indent=2)
+        if action == "export":
+            path = parts[1] if len(parts) > 1 else EXPORT_FILE
+            written = await asyncio.to_thread(
+                perf.export, path, self._extra(dispatcher)
+            )
+            return f"[Lex] Perf stats written to {written}."
+
+        data = perf.snapshot()
+        if not data["commands"] and not data["stages"]:
+            return "[Lex] No timings recorded yet."
+        slowest = sorted(
+            data["commands"].items(), key=lambda x: x[1]["p95_ms"], reverse=True
+        )[:10]
+        lines = [self._line(name, s) for name, s in slowest]
+        lines += [self._line(name, s) for name, s in data["stages"].items()]
+        return "\n".join(lines)
@@ -3,7 +3,11 @@ class Command:
 
     def __init__(self, context):
         self.context = context
-        self.settings = context.get("settings", {})
+
+    @property
+    def settings(self) -> dict:
+        # Looked up per call: each client session has its own settings
+        return self.context.get("settings", {})
 
     async def run(self, args: str) -> str:
         """Reply with a simple pong message."""
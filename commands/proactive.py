@@ -10,6 +10,12 @@ from pathlib import Path
 
 import psutil
 
+from core.engine import BACKGROUND
+from core.logger import get_logger
+from core.nlp import extract_slots
+
+logger = get_logger()
+
 
 TASK_FILE = Path("memory") / "proactive.json"
 
@@ -62,10 +68,24 @@ class Command:
                 today = datetime.now().date().isoformat()
                 if last == today:
                     continue
-                await dispatcher.dispatch(task["command"])
+                # Background priority: never delays what the user asks for.
+                # Not awaited, so one slow task doesn't hold up the others
+                future = dispatcher.engine.submit_nowait(task["command"], BACKGROUND)
+                future.add_done_callback(
+                    lambda f, command=task["command"]: self._log_outcome(command, f)
+                )
                 task["last"] = today
                 self._save()
 
+    @staticmethod
+    def _log_outcome(command: str, future: asyncio.Future) -> None:
+        if future.cancelled():
+            logger.info("Proactive task '%s' was cancelled", command)
+        elif future.exception() is not None:
+            logger.error("Proactive task '%s' failed: %s", command, future.exception())
+        else:
+            logger.info("Proactive task '%s': %s", command, future.result())
+
     async def _loop(self) -> None:
         while True:
             await asyncio.sleep(60)
@@ -78,6 +98,10 @@ class Command:
         self.loop_task = asyncio.create_task(self._loop())
         return "[Lex] Proactive mode activated."
 
+    def close(self) -> None:
+        """Stop the background loop when the plugin is reloaded."""
+        self._stop_loop()
+
     def _stop_loop(self) -> str:
         if self.loop_task:
             self.loop_task.cancel()
@@ -94,7 +118,7 @@ class Command:
         if not tokens:
             return (
                 "[Lex] Use 'proactive start', 'stop', 'list', "
-                "'add HH:MM <command>' or 'remove <num>'."
+                "'add <time> <command>' or 'remove <num>'."
             )
 
         cmd = tokens[0]
@@ -113,12 +137,15 @@ class Command:
             )
 
         if cmd == "add" and len(tokens) == 3:
-            time_str = tokens[1]
-            try:
-                datetime.strptime(time_str, "%H:%M")
-            except ValueError:
-                return "[Lex] Time format should be HH:MM."
-            command = tokens[2]
+            # The time leads: "07:30 news", "7am news" or "at noon weather oslo"
+            rest = args.split(maxsplit=1)[1]
+            slot = extract_slots(rest).first("time")
+            if slot is None or rest[:slot.start].strip():
+                return "[Lex] Start with the time, e.g. 'proactive add 07:30 <command>'."
+            command = rest[slot.end:].strip()
+            if not command:
+                return "[Lex] Which command should run then?"
+            time_str = slot.value.strftime("%H:%M")
             self.tasks.append({"time": time_str, "command": command, "last": ""})
             self._save()
             return f"[Lex] Proactive task added for {time_str}."
@@ -136,6 +163,6 @@ class Command:
 
         return (
             "[Lex] Use 'proactive start', 'stop', 'list', "
-            "'add HH:MM <command>' or 'remove <num>'."
+            "'add <time> <command>' or 'remove <num>'."
         )
 
@@ -1,6 +1,9 @@
 import asyncio
 import json
 import os
+import re
+
+from core.nlp import extract_slots
 
 
 class Command:
@@ -30,16 +33,34 @@ class Command:
     async def _save(self, data):
         await asyncio.to_thread(self._write_json, data)
 
+    @staticmethod
+    def _line(reminder) -> str:
+        # Plain strings are reminders saved without a time
+        if isinstance(reminder, dict):
+            return f"- {reminder['text']} (due {reminder['due']})"
+        return f"- {reminder}"
+
     async def run(self, args: str) -> str:
-        """Store and list personal reminders."""
+        """Store and list personal reminders, with an optional due time."""
         args = args.strip()
         async with self.lock:
             reminders = await self._load()
         if not args or args.lower() == "list":
             if not reminders:
                 return "[Lex] No reminders saved."
-            return "\n".join(f"- {r}" for r in reminders)
-        reminders.append(args)
+            return "\n".join(self._line(r) for r in reminders)
+        slots = extract_slots(args)
+        due = slots.when()
+        if due is None:
+            reminders.append(args)
+            message = args
+        elif due <= slots.now:
+            return f"[Lex] {due:%Y-%m-%d %H:%M} has already passed."
+        else:
+            text = re.sub(r"^to\s+", "", slots.remainder("duration", "time", "date"), flags=re.I)
+            text = text or "(no details)"
+            reminders.append({"text": text, "due": due.strftime("%Y-%m-%d %H:%M")})
+            message = f"{text} (due {due:%Y-%m-%d %H:%M})"
         async with self.lock:
             await self._save(reminders)
-        return f"[Lex] Reminder saved: {args}"
+        return f"[Lex] Reminder saved: {message}"
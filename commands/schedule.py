@@ -3,6 +3,8 @@ import json
 from pathlib import Path
 from datetime import datetime
 
+from core.nlp import extract_slots
+
 
 SCHEDULE_FILE = Path("memory") / "schedule.json"
 
@@ -48,16 +50,17 @@ class Command:
 
         cmd = tokens[0]
 
-        if cmd == "add" and len(tokens) >= 3:
-            dt_str = f"{tokens[1]} {tokens[2]}"
-            try:
-                dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-            except ValueError:
-                return "[Lex] Use 'YYYY-MM-DD HH:MM' for the date/time."
-            text = " ".join(tokens[3:]) or "(no details)"
+        if cmd == "add" and len(tokens) >= 2:
+            # "2024-05-01 14:30 ...", "tomorrow at 9 ..." or "in 2 hours ..."
+            slots = extract_slots(args.split(maxsplit=1)[1])
+            dt = slots.when()
+            if dt is None:
+                return "[Lex] Say when, e.g. 'YYYY-MM-DD HH:MM' or 'tomorrow at 9'."
+            dt_str = dt.strftime("%Y-%m-%d %H:%M")
+            text = slots.remainder("duration", "time", "date") or "(no details)"
             async with self.lock:
                 events = await asyncio.to_thread(self._load)
-                events.append({"time": dt.strftime("%Y-%m-%d %H:%M"), "text": text})
+                events.append({"time": dt_str, "text": text})
                 await asyncio.to_thread(self._save, events)
             return f"[Lex] Event added for {dt_str}."
 
@@ -80,6 +83,6 @@ class Command:
             return "[Lex] Schedule cleared."
 
         return (
-            "[Lex] Use 'schedule add YYYY-MM-DD HH:MM <text>', 'list', "
+            "[Lex] Use 'schedule add <when> <text>', 'list', "
             "'remove <num>' or 'clear'."
         )
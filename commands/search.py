@@ -10,11 +10,18 @@ class Command:
     """Search files from a simple local index."""
 
     trigger = ["search", "find", "locate"]
+    # Walking the home directory is slow and blocking; run it in a worker
+    # process so a timeout really stops it
+    executor = "process"
+    timeout = 120.0
 
     def __init__(self, context):
         self.context = context
         self.file = INDEX_FILE
         self._index: list[str] | None = None
+        # mtime of the file _index was read from: each pool worker keeps its
+        # own copy, so an index rebuilt by another worker must be re-read
+        self._mtime: float | None = None
 
     def _create_index(self, start: Path) -> list[str]:
         paths: list[str] = []
@@ -24,37 +31,54 @@ class Command:
         return paths
 
     def _load_index(self) -> list[str]:
-        if self._index is not None:
+        try:
+            mtime = self.file.stat().st_mtime
+        except OSError:
+            mtime = None
+        if self._index is not None and mtime == self._mtime:
             return self._index
-        if self.file.exists():
+        self._index, self._mtime = [], mtime
+        if mtime is not None:
             try:
                 with self.file.open("r", encoding="utf-8") as fh:
                     self._index = json.load(fh)
-                    return self._index
             except Exception:
                 pass
-        self._index = []
         return self._index
 
     async def run(self, args: str) -> str:
+        return "\n".join([chunk async for chunk in self.stream(args)])
+
+    async def stream(self, args: str):
+        """Yield matching paths as the index is scanned."""
         await asyncio.sleep(0)
         tokens = args.split()
         if tokens and tokens[0] == "index":
             start = Path.home()
+            yield f"[Lex] Indexing {start}..."
             index = await asyncio.to_thread(self._create_index, start)
             self._index = index
             os.makedirs(self.file.parent, exist_ok=True)
             with self.file.open("w", encoding="utf-8") as fh:
                 json.dump(index, fh)
-            return f"[Lex] Indexed {len(index)} files."
+            self._mtime = self.file.stat().st_mtime
+            yield f"[Lex] Indexed {len(index)} files."
+            return
 
         term = args.strip().lower()
         if not term:
-            return "[Lex] Provide a search term or 'search index'."
+            yield "[Lex] Provide a search term or 'search index'."
+            return
         index = self._load_index()
         if not index:
-            return "[Lex] No index found. Run 'search index' first."
-        matches = [p for p in index if term in os.path.basename(p).lower()]
-        if not matches:
-            return "[Lex] No matches."
-        return "\n".join(matches[:5])
+            yield "[Lex] No index found. Run 'search index' first."
+            return
+        found = 0
+        for path in index:
+            if term in os.path.basename(path).lower():
+                yield path
+                found += 1
+                if found >= 5:
+                    return
+        if not found:
+            yield "[Lex] No matches."
@@ -34,7 +34,10 @@ class Command:
             except Exception as e:
                 return f"[Lex] Failed to terminate: {e}"
 
-        conns = [
+        return "\n".join([chunk async for chunk in self.stream(args)])
+
+    def _external_connections(self) -> list:
+        return [
             c
             for c in psutil.net_connections(kind="inet")
             if c.raddr
@@ -42,9 +45,18 @@ class Command:
             and not c.raddr.ip.startswith("127.")
             and c.pid
         ]
+
+    async def stream(self, args: str):
+        """Yield external connections one line at a time."""
+        tokens = args.split()
+        if tokens and tokens[0] == "kill" and len(tokens) > 1:
+            yield await self.run(args)
+            return
+        conns = await asyncio.to_thread(self._external_connections)
         if not conns:
-            return "[Lex] No external connections detected."
-        lines = [self._format_conn(c) for c in conns[:5]]
+            yield "[Lex] No external connections detected."
+            return
+        for conn in conns[:5]:
+            yield self._format_conn(conn)
         if len(conns) > 5:
-            lines.append(f"...and {len(conns) - 5} more")
-        return "\n".join(lines)
+            yield f"...and {len(conns) - 5} more"
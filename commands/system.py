@@ -6,6 +6,7 @@ import shutil
 
 class Command:
     trigger = ["system"]
+    cache_ttl = 5
 
     def __init__(self, context):
         self.context = context
@@ -15,7 +15,10 @@ class Command:
 
     def __init__(self, context):
         self.context = context
-        self.settings = context.get("settings", {})
+
+    @property
+    def settings(self) -> dict:
+        return self.context.get("settings", {})
 
     async def run(self, args: str) -> str:
         await asyncio.sleep(0)
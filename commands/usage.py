@@ -1,7 +1,8 @@
 import asyncio
-import json
 from pathlib import Path
 
+from core.usage import journal_path, load_usage
+
 USAGE_FILE = Path("memory") / "usage.json"
 
 class Command:
@@ -14,25 +15,31 @@ class Command:
         self.file = Path(context.get("usage_file", USAGE_FILE))
 
     def _load(self) -> dict[str, int]:
-        if self.file.exists():
-            try:
-                with self.file.open("r", encoding="utf-8") as fh:
-                    data = json.load(fh)
-                if isinstance(data, dict):
-                    return {k: int(v) for k, v in data.items()}
-            except Exception:
-                pass
-        return {}
+        # Only used without a dispatcher; otherwise its in-memory counters
+        # already hold the merged snapshot + journal view
+        return load_usage(str(self.file))[1]
+
+    def _reset(self) -> None:
+        for path in (self.file, Path(journal_path(str(self.file)))):
+            if path.exists():
+                path.unlink()
 
     async def run(self, args: str) -> str:
         await asyncio.sleep(0)
         arg = args.strip().lower()
+        dispatcher = self.context.get("dispatcher")
+        journal = getattr(dispatcher, "usage", None)
         if arg == "reset":
-            if self.file.exists():
-                self.file.unlink()
+            if journal is not None:
+                await asyncio.to_thread(journal.reset)
+            else:
+                await asyncio.to_thread(self._reset)
             return "[Lex] Usage stats cleared."
 
-        data = await asyncio.to_thread(self._load)
+        if journal is not None:
+            data = journal.counts
+        else:
+            data = await asyncio.to_thread(self._load)
         if not data:
             return "[Lex] No usage data."
         top = sorted(data.items(), key=lambda x: x[1], reverse=True)[:5]
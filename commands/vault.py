@@ -8,6 +8,8 @@ VAULT_FILE = os.path.join("memory", "vault.json")
 
 class Command:
     trigger = ["vault"]
+    # Keys and secrets must never reach memory/history.db
+    history = False
 
     def __init__(self, context):
         self.context = context
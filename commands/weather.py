@@ -1,9 +1,19 @@
 class Command:
     trigger = ["weather"]
+    cache_ttl = 600
+    cache_settings = ("use_cloud",)
 
     def __init__(self, context):
         self.context = context
-        self.settings = context.get("settings", {})
+
+    @property
+    def settings(self) -> dict:
+        return self.context.get("settings", {})
+
+    def cacheable(self, result: str) -> bool:
+        # Only real lookups are worth keeping; offline and error replies
+        # all carry the [Lex] prefix
+        return not result.startswith("[Lex]")
 
     async def run(self, args: str) -> str:
         """Return a weather report using a local or cloud source."""
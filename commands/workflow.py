@@ -65,8 +65,7 @@ class Command:
             dispatcher = self.context.get("dispatcher")
             if not dispatcher:
                 return "[Lex] Dispatcher not available."
-            for step in steps:
-                await dispatcher.dispatch(step)
+            await dispatcher.dispatch_many(steps, ordered=True)
             return f"[Lex] Workflow '{name}' executed."
 
         if cmd == "delete" and len(tokens) >= 2:
@@ -0,0 +1,184 @@
+"""TTL + LRU cache for results of idempotent commands, and a plain LRU memo."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from .logger import get_logger
+
+logger = get_logger()
+
+
+def cache_key(trigger: str, args: str, *variant: str) -> tuple[str, ...]:
+    """Key on the trigger and case/whitespace-normalized arguments.
+
+    ``variant`` holds anything else the result depends on, such as the
+    values of settings that change a plugin's answer.
+    """
+    return (trigger, " ".join(args.casefold().split()), *variant)
+
+
+class LRUCache:
+    """Bounded least-recently-used map with hit/miss counters.
+
+    For memoizing pure functions, so entries never expire; callers put
+    whatever the result depends on into the key.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max(1, int(max_entries))
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key):
+        """Return the cached value, or ``None`` on a miss."""
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ResultCache:
+    """Least-recently-used cache whose entries also expire after a TTL.
+
+    Bounded both by entry count and by the approximate size of the cached
+    strings. Expiry uses wall-clock time so entries persisted with
+    :meth:`save` stay valid (or not) across restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 1_000_000,
+        path: str | None = None,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.path = os.fspath(path) if path else None
+        self._data: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @staticmethod
+    def _size(value: str) -> int:
+        return sys.getsizeof(value)
+
+    def get(self, key: tuple[str, ...]) -> str | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires, value = item
+        if expires <= time.time():
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple[str, ...], value: str, ttl: float) -> None:
+        size = self._size(value)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        if key in self._data:
+            self._drop(key)
+        self._data[key] = (time.time() + ttl, value)
+        self.bytes += size
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: tuple[str, ...]) -> None:
+        _, value = self._data.pop(key)
+        self.bytes -= self._size(value)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # -----------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                entries = json.load(fh)
+        except Exception as e:
+            logger.warning("Could not read result cache: %s", e)
+            return
+        now = time.time()
+        for *key, expires, value in entries:
+            if expires > now:
+                self.put(tuple(key), value, expires - now)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        now = time.time()
+        entries = [
+            [*key, expires, value]
+            for key, (expires, value) in self._data.items()
+            if expires > now
+        ]
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(entries, fh)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.error("ERROR saving result cache: %s", e)
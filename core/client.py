@@ -0,0 +1,78 @@
+"""Blocking client for a running ``lexd`` (see :mod:`core.server`).
+
+Standard library only and no asyncio, so the one-shot ``lex`` CLI starts in
+a few milliseconds. Front ends use :mod:`core.remote` instead.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import tempfile
+from typing import Iterator
+
+SETTINGS_FILE = "settings.json"
+# Longest single message either side accepts
+MAX_FRAME = 4 * 1024 * 1024
+DISCONNECTED = "[Lex] Lost connection to lexd."
+
+
+class RemoteError(RuntimeError):
+    """The daemon reported an error, or went away mid-request."""
+
+
+def socket_path(settings: dict | None = None) -> str:
+    """Where ``lexd`` listens: ``$LEX_SOCKET``, the ``daemon_socket``
+    setting, or a per-user socket in the runtime directory."""
+    path = os.environ.get("LEX_SOCKET") or (settings or {}).get("daemon_socket")
+    if path:
+        return str(path)
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(base, f"lex-{uid}.sock")
+
+
+def configured_socket_path(path: str = SETTINGS_FILE) -> str:
+    """:func:`socket_path` from ``settings.json`` without the full settings
+    loader (no dotenv, no logger), for the one-shot CLI."""
+    settings = {}
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            settings = json.load(fh)
+    except (OSError, ValueError):
+        pass
+    return socket_path(settings if isinstance(settings, dict) else {})
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message).encode("utf-8") + b"\n"
+
+
+def stream(
+    text: str,
+    path: str | None = None,
+    priority: int = 0,
+    session: str | None = None,
+) -> Iterator[dict]:
+    """Blocking: send one ``stream`` request and yield the daemon's replies.
+
+    ``session`` names the daemon-side session to run in, so history carries
+    over between calls.
+
+    Raises ``OSError`` if no daemon is listening. Closing the connection
+    early (e.g. on Ctrl+C) cancels the command on the daemon side.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path or socket_path())
+        request = {"id": 1, "op": "stream", "text": text, "priority": priority}
+        if session:
+            request["session"] = session
+        sock.sendall(encode(request))
+        with sock.makefile("rb") as replies:
+            for line in replies:
+                message = json.loads(line)
+                yield message
+                if message.get("done"):
+                    return
+    raise RemoteError(DISCONNECTED)
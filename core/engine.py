@@ -0,0 +1,333 @@
+"""Prioritised, bounded work queue in front of ``Dispatcher.dispatch``."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import itertools
+import time
+from dataclasses import dataclass, field
+
+from .logger import get_logger
+from .session import Session, current_session
+
+logger = get_logger()
+
+BUSY_MESSAGE = "[Lex] Too busy right now, dropped: {text}"
+PREEMPTED_MESSAGE = "[Lex] Interrupted by something more urgent: {text}"
+
+# For DispatchEngine.cancel: jobs from every session
+ALL_SESSIONS = object()
+
+# Lower runs first
+INTERACTIVE = 0
+HOTKEY = 1
+BACKGROUND = 2
+
+
+@dataclass(eq=False)
+class Job:
+    text: str
+    future: asyncio.Future
+    priority: int = INTERACTIVE
+    queued_at: float = field(default_factory=time.perf_counter)
+    # Set for streaming jobs: output chunks, then None once the job is over
+    chunks: asyncio.Queue | None = None
+    task: asyncio.Task | None = None
+    preempted: bool = False
+    # The submitter's contextvars (e.g. its session), for the job's task
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+    # Whose job this is, so a client's "stop" only stops its own commands
+    session: Session | None = field(default_factory=current_session)
+
+
+@dataclass
+class EngineStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    preempted: int = 0
+    cancelled: int = 0
+    max_depth: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    run_total: float = 0.0
+    run_max: float = 0.0
+
+
+class DispatchEngine:
+    """Run dispatches on a fixed pool of worker tasks fed by a priority queue.
+
+    Jobs run in priority order (:data:`INTERACTIVE` before :data:`HOTKEY`
+    before :data:`BACKGROUND`). When every worker is busy and a job arrives
+    that outranks one of them, the least urgent running job is cancelled so
+    what the user just asked for never waits behind background work.
+
+    Non-interactive jobs are bounded by ``queue_size`` and interactive ones
+    by their own, larger ``interactive_queue_size``, so background work can
+    never crowd out the user but no client can queue without limit either.
+    When a bound is reached ``submit`` waits for room and ``submit_nowait``
+    (hotkeys, proactive tasks) drops the command instead of piling up.
+    """
+
+    def __init__(
+        self,
+        dispatcher,
+        workers: int = 4,
+        queue_size: int = 32,
+        preempt: bool = True,
+        interactive_queue_size: int = 128,
+    ):
+        self.dispatcher = dispatcher
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.interactive_queue_size = max(1, int(interactive_queue_size))
+        self.preempt = preempt
+        self.stats = EngineStats()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.PriorityQueue | None = None
+        self._room: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._running: set[Job] = set()
+        self._bounded = 0
+        self._interactive = 0
+        self._seq = itertools.count()
+
+    # -----------------------------------------------------
+    # Lifecycle
+    # -----------------------------------------------------
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # First use, or the previous loop is gone (e.g. a new asyncio.run())
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._room = asyncio.Event()
+        self._running = set()
+        self._bounded = 0
+        self._interactive = 0
+        self._tasks = [
+            loop.create_task(self._worker(), name=f"lex-dispatch-{i}")
+            for i in range(self.workers)
+        ]
+
+    def stop(self) -> None:
+        """Cancel the workers and anything still waiting in the queue."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._queue:
+            while not self._queue.empty():
+                _, _, job = self._queue.get_nowait()
+                if not job.future.done():
+                    job.future.cancel()
+                if job.chunks is not None:
+                    job.chunks.put_nowait(None)
+
+    # -----------------------------------------------------
+    # Submitting work
+    # -----------------------------------------------------
+    async def submit(self, text: str, priority: int = INTERACTIVE) -> str:
+        """Queue ``text`` (waiting for room if needed) and return the result.
+
+        Cancelling the caller cancels the command too.
+        """
+        self.start()
+        job = Job(text, self._loop.create_future(), priority)
+        await self._put(job)
+        try:
+            return await asyncio.shield(job.future)
+        except asyncio.CancelledError:
+            self.cancel_job(job)
+            raise
+
+    async def stream(self, text: str, priority: int = INTERACTIVE):
+        """Queue ``text`` like :meth:`submit`, yielding output as it arrives."""
+        self.start()
+        job = Job(
+            text, self._loop.create_future(), priority, chunks=asyncio.Queue()
+        )
+        await self._put(job)
+        try:
+            while (chunk := await job.chunks.get()) is not None:
+                yield chunk
+            # Surface a failed dispatch like submit() would
+            result = await job.future
+            if job.preempted:
+                yield result
+        finally:
+            # The consumer went away (cancelled, or stopped iterating)
+            self.cancel_job(job)
+
+    def submit_nowait(self, text: str, priority: int = BACKGROUND) -> asyncio.Future:
+        """Queue ``text`` without waiting; drops it if the queue is full.
+
+        Must be called from the event loop thread, e.g. via
+        ``loop.call_soon_threadsafe``.
+        """
+        self.start()
+        job = Job(text, self._loop.create_future(), priority)
+        if not self._put_nowait(job):
+            self.stats.rejected += 1
+            logger.warning("Dispatch queue full, dropped: %s", text)
+            job.future.set_result(BUSY_MESSAGE.format(text=text))
+        return job.future
+
+    async def _put(self, job: Job) -> None:
+        while not self._put_nowait(job):
+            self._room.clear()
+            await self._room.wait()
+
+    def _put_nowait(self, job: Job) -> bool:
+        if job.priority == INTERACTIVE:
+            if self._interactive >= self.interactive_queue_size:
+                return False
+            self._interactive += 1
+        else:
+            if self._bounded >= self.queue_size:
+                return False
+            self._bounded += 1
+        self._queue.put_nowait((job.priority, next(self._seq), job))
+        self.stats.submitted += 1
+        self.stats.max_depth = max(self.stats.max_depth, self._queue.qsize())
+        self._maybe_preempt(job)
+        return True
+
+    # -----------------------------------------------------
+    # Cancellation
+    # -----------------------------------------------------
+    def _maybe_preempt(self, job: Job) -> None:
+        if not self.preempt or len(self._running) < self.workers:
+            return
+        victim = max(self._running, key=lambda j: (j.priority, j.queued_at))
+        if victim.priority > job.priority and not victim.preempted:
+            logger.info("Preempting %r for %r", victim.text, job.text)
+            victim.preempted = True
+            self.stats.preempted += 1
+            victim.task.cancel()
+
+    def cancel_job(self, job: Job) -> None:
+        """Cancel a queued or running job; the plugin sees ``CancelledError``."""
+        if job.task is not None:
+            if job.task.done():
+                return
+            job.task.cancel()
+        elif job.future.done():
+            return
+        else:
+            # Still queued: the worker skips jobs that are already done
+            job.future.cancel()
+            if job.chunks is not None:
+                job.chunks.put_nowait(None)
+        self.stats.cancelled += 1
+
+    def cancel(self, priority: int = BACKGROUND, session=ALL_SESSIONS) -> int:
+        """Cancel every running job at ``priority`` or less urgent.
+
+        ``cancel(INTERACTIVE)`` stops everything. With ``session`` only jobs
+        submitted in that session (``None``: outside any session) are
+        cancelled. Returns how many jobs were cancelled.
+        """
+        jobs = [
+            j for j in self._running
+            if j.priority >= priority and (session is ALL_SESSIONS or j.session is session)
+        ]
+        for job in jobs:
+            self.cancel_job(job)
+        return len(jobs)
+
+    # -----------------------------------------------------
+    # Workers
+    # -----------------------------------------------------
+    async def _worker(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            if job.priority == INTERACTIVE:
+                self._interactive -= 1
+            else:
+                self._bounded -= 1
+            self._room.set()
+            try:
+                if job.future.done():
+                    continue
+                await self._execute(job)
+            finally:
+                if job.chunks is not None:
+                    job.chunks.put_nowait(None)
+                self._queue.task_done()
+
+    async def _execute(self, job: Job) -> None:
+        started = time.perf_counter()
+        wait = started - job.queued_at
+        self.stats.wait_total += wait
+        self.stats.wait_max = max(self.stats.wait_max, wait)
+        if job.chunks is None:
+            coro = self.dispatcher.dispatch(job.text)
+        else:
+            coro = self._stream_job(job)
+        # Each job runs in its own task so it can be cancelled without
+        # taking the worker down with it
+        job.task = self._loop.create_task(coro, context=job.context)
+        self._running.add(job)
+        try:
+            await asyncio.wait({job.task})
+        except asyncio.CancelledError:
+            job.task.cancel()
+            if not job.future.done():
+                job.future.cancel()
+            raise
+        finally:
+            self._running.discard(job)
+            elapsed = time.perf_counter() - started
+            self.stats.run_total += elapsed
+            self.stats.run_max = max(self.stats.run_max, elapsed)
+
+        if job.future.done():
+            return
+        if job.task.cancelled():
+            if job.preempted:
+                job.future.set_result(PREEMPTED_MESSAGE.format(text=job.text))
+            else:
+                job.future.cancel()
+        elif job.task.exception() is not None:
+            error = job.task.exception()
+            self.stats.failed += 1
+            logger.error("Dispatch of %r failed", job.text, exc_info=error)
+            job.future.set_exception(error)
+        else:
+            self.stats.completed += 1
+            job.future.set_result(job.task.result())
+
+    async def _stream_job(self, job: Job) -> str:
+        parts = []
+        async for chunk in self.dispatcher.dispatch_stream(job.text):
+            parts.append(chunk)
+            job.chunks.put_nowait(chunk)
+        return "\n".join(parts)
+
+    # -----------------------------------------------------
+    # Metrics
+    # -----------------------------------------------------
+    def metrics(self) -> dict:
+        s = self.stats
+        done = max(1, s.completed + s.failed)
+        return {
+            "workers": self.workers,
+            "busy": len(self._running),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "interactive_queue_size": self.interactive_queue_size,
+            "max_depth": s.max_depth,
+            "submitted": s.submitted,
+            "completed": s.completed,
+            "failed": s.failed,
+            "rejected": s.rejected,
+            "preempted": s.preempted,
+            "cancelled": s.cancelled,
+            "wait_avg_ms": s.wait_total / done * 1000,
+            "wait_max_ms": s.wait_max * 1000,
+            "run_avg_ms": s.run_total / done * 1000,
+            "run_max_ms": s.run_max * 1000,
+        }
@@ -0,0 +1,249 @@
+"""Append-only command history in SQLite, searchable without loading it all.
+
+Every routed command is kept with its timestamp, session, raw input,
+normalized command, trigger, latency and a digest (the first
+:data:`DIGEST_CHARS` characters) of the result. Rows are buffered in memory
+and written in batches like the usage journal; the newest ones also stay in
+a ring buffer so "what did I just do" never touches the disk.
+
+Queries by trigger and time range use indexes, and substring search uses an
+FTS5 trigram index when SQLite provides one (falling back to ``LIKE``).
+Results are read from a cursor in batches, so mining months of history
+keeps memory flat.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import astuple, dataclass
+from typing import Iterator
+
+from .logger import get_logger
+
+logger = get_logger()
+
+DIGEST_CHARS = 500
+FETCH_BATCH = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session TEXT,
+    input TEXT NOT NULL,
+    command TEXT,
+    trigger TEXT,
+    latency_ms REAL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS history_ts ON history(ts);
+CREATE INDEX IF NOT EXISTS history_trigger ON history(trigger, ts);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_text USING fts5(
+    input, command, result,
+    content='history', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS history_text_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_text(rowid, input, command, result)
+    VALUES (new.id, new.input, new.command, new.result);
+END;
+"""
+
+FIELDS = ("ts", "session", "input", "command", "trigger", "latency_ms", "result")
+
+
+@dataclass
+class HistoryEntry:
+    ts: float
+    session: str | None
+    input: str
+    command: str
+    trigger: str
+    latency_ms: float
+    result: str
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def digest(result: str) -> str:
+    result = str(result)
+    if len(result) <= DIGEST_CHARS:
+        return result
+    return result[:DIGEST_CHARS - 3] + "..."
+
+
+class HistoryStore:
+    """SQLite-backed command history with write-behind batching.
+
+    ``record`` only touches memory and returns True when a flush is due;
+    run :meth:`flush` off the event loop (``asyncio.to_thread``).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 2.0,
+        flush_threshold: int = 20,
+        ring_size: int = 200,
+    ):
+        self.path = os.fspath(path)
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.recent: deque[HistoryEntry] = deque(maxlen=ring_size)
+        self.fts = False
+        self._lock = threading.Lock()
+        self._pending: list[HistoryEntry] = []
+        self._last_flush = time.monotonic()
+        self._db: sqlite3.Connection | None = None
+        atexit.register(self.close)
+
+    # -----------------------------------------------------
+    # Storage
+    # -----------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        # WAL lets queries read while a flush writes, and commits stay cheap
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _writer(self) -> sqlite3.Connection:
+        # Caller holds the lock
+        if self._db is None:
+            db = self._connect()
+            db.executescript(SCHEMA)
+            try:
+                db.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                logger.info("SQLite has no FTS5 trigram tokenizer; history search uses LIKE")
+            self._db = db
+        return self._db
+
+    def record(self, entry: HistoryEntry) -> bool:
+        entry.result = digest(entry.result)
+        with self._lock:
+            self.recent.append(entry)
+            self._pending.append(entry)
+            return (
+                len(self._pending) >= self.flush_threshold
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+    def flush(self) -> None:
+        """Write pending entries in one transaction."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            try:
+                db = self._writer()
+                with db:
+                    db.executemany(
+                        f"INSERT INTO history ({', '.join(FIELDS)}) "
+                        f"VALUES ({', '.join('?' * len(FIELDS))})",
+                        [astuple(e) for e in pending],
+                    )
+            except sqlite3.Error as e:
+                logger.error("ERROR writing history: %s", e)
+                self._pending[:0] = pending
+
+    def close(self) -> None:
+        """Flush what's pending and close the database; safe to repeat."""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("ERROR flushing history")
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # -----------------------------------------------------
+    # Queries
+    # -----------------------------------------------------
+    def last(self, n: int = 5, session: str | None = None) -> list[HistoryEntry]:
+        """Newest ``n`` entries (oldest first), from memory when possible."""
+        entries = [e for e in self.recent if session is None or e.session == session]
+        if len(entries) >= n:
+            return entries[-n:]
+        # Older entries, e.g. from before a restart, are only on disk
+        return list(reversed(list(self.query(session=session, limit=n))))
+
+    def query(
+        self,
+        text: str | None = None,
+        trigger: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        session: str | None = None,
+        limit: int | None = 20,
+    ) -> Iterator[HistoryEntry]:
+        """Yield matching entries, newest first.
+
+        ``text`` matches a substring of the input, normalized command or
+        result (case-insensitively); ``since``/``until`` are Unix times.
+        """
+        self.flush()
+        with self._lock:
+            self._writer()
+        where, params = [], []
+        table = "history"
+        if text:
+            if self.fts and len(text) >= 3:
+                table = "history JOIN history_text ON history_text.rowid = history.id"
+                where.append("history_text MATCH ?")
+                params.append('"' + text.replace('"', '""') + '"')
+            else:
+                # Trigrams need three characters; shorter needles scan
+                like = "%" + _escape_like(text) + "%"
+                where.append(
+                    "(input LIKE ? ESCAPE '!' OR command LIKE ? ESCAPE '!'"
+                    " OR result LIKE ? ESCAPE '!')"
+                )
+                params += [like, like, like]
+        if trigger:
+            where.append("trigger = ?")
+            params.append(trigger.lower())
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts < ?")
+            params.append(until)
+        if session is not None:
+            where.append("session = ?")
+            params.append(session)
+        sql = f"SELECT {', '.join('history.' + f for f in FIELDS)} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY history.ts DESC, history.id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        # A reader of its own, so a long scan never holds up flushes
+        db = self._connect()
+        try:
+            cursor = db.execute(sql, params)
+            while rows := cursor.fetchmany(FETCH_BATCH):
+                for row in rows:
+                    yield HistoryEntry(*row)
+        finally:
+            db.close()
+
+    def count(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._writer().execute("SELECT COUNT(*) FROM history").fetchone()[0]
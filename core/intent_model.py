@@ -0,0 +1,159 @@
+"""NumPy-only scorer for the intent classifier.
+
+Training uses scikit-learn (``HashingVectorizer`` + ``SGDClassifier``), but
+the trained model is just hashed word n-grams and a linear layer, so
+:class:`CompactModel` serves it without importing scikit-learn or
+unpickling anything. Only the feature columns the model actually learned
+weights for are kept, stored as plain ``.npy`` files that are memory-mapped
+on load.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+FORMAT = 1
+# HashingVectorizer's defaults
+TOKEN = re.compile(r"(?u)\b\w\w+\b")
+
+_MASK = 0xFFFFFFFF
+
+
+def murmurhash3_32(data: bytes, seed: int = 0) -> int:
+    """Signed MurmurHash3 (x86, 32-bit), as used by scikit-learn's hashing."""
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    h = seed & _MASK
+    end = len(data) & ~3
+    for i in range(0, end, 4):
+        k = int.from_bytes(data[i:i + 4], "little")
+        k = (k * c1) & _MASK
+        k = ((k << 15) | (k >> 17)) & _MASK
+        h ^= (k * c2) & _MASK
+        h = ((h << 13) | (h >> 19)) & _MASK
+        h = (h * 5 + 0xE6546B64) & _MASK
+    if len(data) & 3:
+        k = (int.from_bytes(data[end:], "little") * c1) & _MASK
+        k = ((k << 15) | (k >> 17)) & _MASK
+        h ^= (k * c2) & _MASK
+    h ^= len(data)
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & _MASK
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & _MASK
+    h ^= h >> 16
+    return h - (1 << 32) if h & 0x80000000 else h
+
+
+@lru_cache(maxsize=65536)
+def feature_index(term: str, n_features: int) -> int:
+    """Column of ``term``, matching ``HashingVectorizer(alternate_sign=False)``."""
+    h = murmurhash3_32(term.encode("utf-8"))
+    if h == -(1 << 31):
+        # abs() would overflow in scikit-learn's int32 arithmetic
+        return (2 ** 31 - 1 - (n_features - 1)) % n_features
+    return abs(h) % n_features
+
+
+def terms(text: str, ngram_range: tuple[int, int]) -> list[str]:
+    tokens = TOKEN.findall(text.lower())
+    low, high = ngram_range
+    found = tokens[:] if low == 1 else []
+    for n in range(max(low, 2), high + 1):
+        found += [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+    return found
+
+
+class CompactModel:
+    """Linear intent model over hashed n-grams; reproduces ``predict_proba``.
+
+    ``weights`` has one row per kept feature column (``columns``, sorted)
+    and one column per class, or a single column for a two-class model.
+    """
+
+    def __init__(self, classes, columns, weights, intercept, n_features: int,
+                 ngram_range: tuple[int, int]):
+        self.classes_ = np.asarray(classes)
+        self.columns = columns
+        self.weights = weights
+        self.intercept = intercept
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self._position = {int(c): i for i, c in enumerate(columns)}
+
+    @classmethod
+    def from_estimator(cls, estimator, n_features: int, ngram_range: tuple[int, int]):
+        """Keep the non-zero columns of a fitted linear classifier."""
+        coef = np.asarray(estimator.coef_, dtype=np.float64)
+        columns = np.flatnonzero(np.any(coef != 0, axis=0)).astype(np.int64)
+        return cls(
+            [str(c) for c in estimator.classes_],
+            columns,
+            np.ascontiguousarray(coef[:, columns].T),
+            np.asarray(estimator.intercept_, dtype=np.float64).copy(),
+            n_features,
+            ngram_range,
+        )
+
+    # -----------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        for name in ("columns", "weights", "intercept"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "model.json"), "w") as fh:
+            json.dump({
+                "format": FORMAT,
+                "classes": self.classes_.tolist(),
+                "n_features": self.n_features,
+                "ngram_range": list(self.ngram_range),
+            }, fh)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> CompactModel:
+        with open(os.path.join(path, "model.json")) as fh:
+            info = json.load(fh)
+        if info.get("format") != FORMAT:
+            raise ValueError(f"unsupported intent model format {info.get('format')}")
+        mode = "r" if mmap else None
+        arrays = [
+            np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+            for name in ("columns", "weights", "intercept")
+        ]
+        return cls(info["classes"], *arrays, info["n_features"], info["ngram_range"])
+
+    # -----------------------------------------------------
+    # Scoring
+    # -----------------------------------------------------
+    def decision_function(self, texts: list[str]) -> np.ndarray:
+        rows, positions, values = [], [], []
+        for row, text in enumerate(texts):
+            counts = Counter(
+                feature_index(t, self.n_features) for t in terms(text, self.ngram_range)
+            )
+            # l2-normalised over every n-gram, including ones with no weight
+            norm = sum(v * v for v in counts.values()) ** 0.5
+            for column, count in counts.items():
+                position = self._position.get(column)
+                if position is not None:
+                    rows.append(row)
+                    positions.append(position)
+                    values.append(count / norm)
+        scores = np.tile(self.intercept, (len(texts), 1))
+        if rows:
+            contrib = self.weights[positions] * np.asarray(values)[:, None]
+            np.add.at(scores, rows, contrib)
+        return scores
+
+    def predict_proba(self, texts: list[str]) -> np.ndarray:
+        """Class probabilities per text, as ``SGDClassifier(loss="log_loss")``."""
+        prob = 1.0 / (1.0 + np.exp(-self.decision_function(texts)))
+        if len(self.classes_) == 2:
+            return np.column_stack([1 - prob[:, 0], prob[:, 0]])
+        return prob / prob.sum(axis=1, keepdims=True)
@@ -0,0 +1,259 @@
+"""Cached plugin manifest so commands can be registered without importing them."""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import importlib
+import json
+import os
+import sys
+from .logger import get_logger
+from .session import no_session
+
+MANIFEST_NAME = "lex_manifest.json"
+MANIFEST_VERSION = 2
+
+logger = get_logger()
+
+# Source mtime of each plugin module at the time it was imported, shared by
+# every dispatcher in the process just like ``sys.modules`` is
+IMPORTED_MTIMES: dict[str, float] = {}
+
+
+def import_plugin(module_name: str, mtime: float | None = None):
+    """Import ``module_name``, reloading it if its source changed since."""
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+    elif mtime is None or IMPORTED_MTIMES.get(module_name, mtime) != mtime:
+        module = importlib.reload(module)
+    if mtime is not None:
+        IMPORTED_MTIMES[module_name] = mtime
+    return module
+
+
+def scan_source(source: str) -> dict:
+    """Statically read ``Command`` metadata from plugin source.
+
+    Only literal class attributes (``trigger = [...]``, ``description = "..."``
+    and friends) are collected, along with the names of methods defined on the
+    class. ``static`` is False when the triggers can't be determined without
+    running the module.
+    """
+    info = {"command": False, "static": False, "doc": "", "attrs": {}, "methods": []}
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return info
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "Command":
+            break
+    else:
+        # ``Command`` bound some other way (assignment, import) can only be
+        # inspected by importing the module
+        info["command"] = any(_binds_command(n) for n in tree.body)
+        return info
+
+    info["command"] = True
+    info["doc"] = ast.get_docstring(node) or ""
+    attrs: dict = {}
+    for stmt in node.body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            info["methods"].append(stmt.name)
+            continue
+        if isinstance(stmt, ast.Assign):
+            targets = [t.id for t in stmt.targets if isinstance(t, ast.Name)]
+            value = stmt.value
+        elif isinstance(stmt, ast.AnnAssign) and isinstance(stmt.target, ast.Name):
+            targets = [stmt.target.id]
+            value = stmt.value
+        else:
+            continue
+        if value is None:
+            continue
+        try:
+            literal = ast.literal_eval(value)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            for name in targets:
+                attrs.pop(name, None)
+            continue
+        for name in targets:
+            attrs[name] = literal
+
+    triggers = attrs.get("trigger")
+    if isinstance(triggers, (list, tuple)) and all(isinstance(t, str) for t in triggers):
+        attrs["trigger"] = list(triggers)
+        info["static"] = True
+    # json round-trips tuples as lists and can't store sets and the like
+    info["attrs"] = {k: v for k, v in attrs.items() if _jsonable(v)}
+    return info
+
+
+def _binds_command(node: ast.stmt) -> bool:
+    if isinstance(node, ast.Assign):
+        return any(isinstance(t, ast.Name) and t.id == "Command" for t in node.targets)
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return any((a.asname or a.name) == "Command" for a in node.names)
+    return False
+
+
+def _jsonable(value) -> bool:
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+class PluginManifest:
+    """Per-package cache of plugin metadata keyed on source mtime, size and hash.
+
+    Stored next to the package's byte code in ``__pycache__`` so it is
+    invalidated the same way Python's own caches are.
+    """
+
+    def __init__(self, package_path: str, path: str | None = None):
+        self.package_path = package_path
+        self.path = path or os.path.join(package_path, "__pycache__", MANIFEST_NAME)
+        self.entries: dict[str, dict] = self._load()
+        self._dirty = False
+
+    def _load(self) -> dict[str, dict]:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+                if isinstance(data, dict) and data.get("version") == MANIFEST_VERSION:
+                    return data.get("modules", {})
+            except Exception:
+                pass
+        return {}
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"version": MANIFEST_VERSION, "modules": self.entries}, fh)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning("Could not write plugin manifest: %s", e)
+
+    def entry(self, name: str) -> dict | None:
+        """Return the up-to-date manifest entry for module ``name``."""
+        path = os.path.join(self.package_path, f"{name}.py")
+        try:
+            st = os.stat(path)
+        except OSError:
+            if self.entries.pop(name, None) is not None:
+                self._dirty = True
+            return None
+
+        cached = self.entries.get(name)
+        if cached and cached["mtime"] == st.st_mtime and cached["size"] == st.st_size:
+            return cached
+
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if cached and cached["hash"] == digest:
+            # Touched but unchanged: keep the parsed metadata
+            cached.update(mtime=st.st_mtime, size=st.st_size)
+            self._dirty = True
+            return cached
+
+        entry = {
+            "mtime": st.st_mtime,
+            "size": st.st_size,
+            "hash": digest,
+            **scan_source(raw.decode("utf-8", errors="replace")),
+        }
+        self.entries[name] = entry
+        self._dirty = True
+        return entry
+
+    def prune(self, names: set[str]) -> None:
+        """Forget modules that no longer exist in the package."""
+        for name in list(self.entries):
+            if name not in names:
+                del self.entries[name]
+                self._dirty = True
+
+
+class LazyCommand:
+    """Stand-in for a plugin ``Command`` that imports the module on first use.
+
+    Static metadata from the manifest (``trigger``, ``description``...) is
+    served without importing. Any other attribute access instantiates the
+    real command and is forwarded to it.
+    """
+
+    def __init__(
+        self,
+        module_name: str,
+        entry: dict,
+        context: dict,
+    ):
+        object.__setattr__(self, "_module_name", module_name)
+        object.__setattr__(self, "_attrs", dict(entry.get("attrs", {})))
+        object.__setattr__(self, "_methods", frozenset(entry.get("methods", ())))
+        object.__setattr__(self, "_context", context)
+        object.__setattr__(self, "_mtime", entry.get("mtime"))
+        object.__setattr__(self, "_instance", None)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._instance is not None
+
+    def load_command(self) -> object:
+        """Import the plugin module and instantiate its ``Command``."""
+        if self._instance is not None:
+            return self._instance
+        name = self._module_name
+        module = import_plugin(name, self._mtime)
+        # Plugins are shared by every client: never build one with the
+        # first caller's session state
+        with no_session():
+            instance = module.Command(self._context)
+        object.__setattr__(self, "_instance", instance)
+        logger.info("Loaded: %s", name)
+        return instance
+
+    def __getattr__(self, name: str):
+        # Only called when normal lookup fails, i.e. for plugin attributes
+        if self._instance is None and name in self._attrs:
+            return self._attrs[name]
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.load_command(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self.load_command(), name, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "lazy"
+        return f"<LazyCommand {self._module_name} ({state})>"
+
+
+def command_attr(cmd: object, name: str, default=None):
+    """Read a ``Command`` attribute without importing a lazy plugin for it."""
+    if isinstance(cmd, LazyCommand) and not cmd.is_loaded:
+        return cmd._attrs.get(name, default)
+    return getattr(cmd, name, default)
+
+
+def command_has(cmd: object, name: str) -> bool:
+    """Whether ``Command`` defines method ``name``, without importing it."""
+    if isinstance(cmd, LazyCommand) and not cmd.is_loaded:
+        return name in cmd._methods
+    return callable(getattr(cmd, name, None))
+
+
+def command_module(cmd: object) -> str:
+    if isinstance(cmd, LazyCommand):
+        return cmd._module_name
+    return type(cmd).__module__
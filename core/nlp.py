@@ -1,18 +1,34 @@
 """
 Lex NLP Module — Refactored for precision, speed, and modularity
+
+Importing this module is cheap: regex intents are registered right away,
+while the classifier is loaded (or trained with scikit-learn, when the data
+changed) in a background thread started by :func:`load_classifier`. Until it is ready, inputs are
+routed by the regex registry and fuzzy matching alone.
 """
 
 import os
 import re
+import glob
 import json
-from typing import Callable, Iterable, List, Tuple, Literal
+import shutil
+import hashlib
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, List, Tuple, Literal
 from dataclasses import dataclass
 
 from rapidfuzz import process
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import make_pipeline
-import joblib
+
+from .cache import LRUCache
+from .slots import extract_slots
+
+if TYPE_CHECKING:
+    from .intent_model import CompactModel
+    from .semantic import SemanticIndex
+from .logger import get_logger
+
+logger = get_logger()
 
 # === Data Classes === #
 @dataclass
@@ -32,19 +48,98 @@ class NLPResult:
 CUSTOM_INTENTS_FILE = os.path.join("memory", "custom_intents.json")
 TRAINING_DATA_FILE = os.path.join("data", "training_data.json")
 MODEL_FILE = os.path.join("models", "intent_classifier.pkl")
+# Served model; one directory per dataset hash, see core.intent_model
+COMPACT_DIR = os.path.join("models", "intent_model")
 META_FILE = os.path.join("models", "intent_classifier_meta.json")
 
+# Memoized normalize_input results
+NORMALIZE_CACHE_SIZE = 1024
+
 # === Core NLP Engine === #
+# Numbered backreferences would point at the wrong group once combined
+BACKREF = re.compile(r"\\[1-9]")
+
 class IntentRegistry:
+    """Exact phrases and regex intents, matched in priority order.
+
+    Exact phrases come first, then ``custom`` patterns, then the rest in
+    registration order. Phrases (:meth:`register_phrase`, used for learned
+    phrases) are a dict lookup, and the patterns are folded into a single
+    alternation compiled on the first match after a change, so matching
+    costs about the same however many phrases have been learned.
+    """
+
     def __init__(self):
         self._intents: List[Intent] = []
+        self._phrases: dict[str, Tuple[str, str]] = {}
+        # (intents in match order, combined pattern, group -> intent index),
+        # rebuilt lazily and swapped as one so readers never mix versions
+        self._compiled: tuple | None = None
+        # Bumped on every change so memoized results can't go stale
+        self.version = 0
+
+    def _changed(self) -> None:
+        self._compiled = None
+        self.version += 1
 
     def register(self, pattern: str, handler: Callable[[re.Match[str]], str], priority='default', flags=re.I):
         compiled = re.compile(pattern, flags)
         self._intents.append(Intent(compiled, handler, priority))
+        self._changed()
+
+    def register_phrase(self, phrase: str, command: str, priority='custom'):
+        """Map ``phrase`` (the whole input, case-insensitively) to ``command``."""
+        self._phrases[phrase.lower()] = (command, priority)
+        self.version += 1
+
+    def clear(self, priority: str) -> None:
+        """Forget every intent and phrase registered with ``priority``."""
+        self._intents = [i for i in self._intents if i.priority != priority]
+        self._phrases = {k: v for k, v in self._phrases.items() if v[1] != priority}
+        self._changed()
+
+    def __len__(self) -> int:
+        return len(self._intents) + len(self._phrases)
+
+    def _compile(self) -> tuple:
+        # Stable sort: custom first, registration order otherwise
+        ordered = sorted(self._intents, key=lambda i: i.priority != 'custom')
+        # Each pattern is wrapped in one numbered group, so the outermost
+        # group that matched says which intent won. Patterns that can't be
+        # combined (numbered backreferences, clashing group names) fall
+        # back to trying each in turn.
+        alternatives, index, group = [], {}, 1
+        for position, intent in enumerate(ordered):
+            flags = "".join(
+                letter for flag, letter in ((re.I, "i"), (re.M, "m"), (re.S, "s"), (re.X, "x"))
+                if intent.pattern.flags & flag
+            )
+            body = f"(?{flags}:{intent.pattern.pattern})" if flags else intent.pattern.pattern
+            alternatives.append(f"({body})")
+            index[group] = position
+            group += intent.pattern.groups + 1
+        combined = None
+        if alternatives and not any(BACKREF.search(i.pattern.pattern) for i in ordered):
+            try:
+                combined = re.compile("|".join(alternatives))
+            except re.error:
+                pass
+        self._compiled = ordered, combined, index
+        return self._compiled
 
     def match(self, text: str) -> Tuple[str, str]:
-        for intent in sorted(self._intents, key=lambda i: i.priority == 'custom', reverse=True):
+        phrase = self._phrases.get(text.lower())
+        if phrase is not None:
+            return phrase[0].strip(), phrase[1]
+        ordered, combined, index = self._compiled or self._compile()
+        candidates = ordered
+        if combined is not None:
+            found = combined.match(text)
+            if found is None:
+                return text, 'none'
+            # Rerun the winner alone so its handler sees its own groups
+            candidates = ordered[index[found.lastindex]:]
+        for intent in candidates:
             match = intent.pattern.match(text)
             if match:
                 return intent.handler(match).strip(), intent.priority
@@ -55,66 +150,462 @@ def preprocess(text: str) -> str:
     return re.sub(r"\s+", " ", text.strip(" .,!?\n")).lower()
 
 # === NLP Model === #
+# Bump when the artifact format changes so old models get rebuilt
+MODEL_KIND = "sgd-hashing-2"
+N_FEATURES = 2 ** 16
+NGRAM_RANGE = (1, 2)
+# Regularised about as strongly as the LogisticRegression it replaced, so
+# a handful of examples doesn't produce overconfident predictions
+SGD_ALPHA = 0.02
+ONLINE_EPOCHS = 5
+# Inputs scored per predict_proba call by classify_many
+CLASSIFY_CHUNK = 2048
+# Probability the classifier needs before its intent is used
+CLASSIFIER_THRESHOLD = 0.6
+
+def example_digest(example: dict[str, str]) -> str:
+    """Stable id of one training example, used to key the model artifact."""
+    key = f"{preprocess(example['text'])}\t{example['command']}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+def dataset_hash(digests: Iterable[str]) -> str:
+    return hashlib.sha256("\n".join(sorted(set(digests))).encode("utf-8")).hexdigest()
+
+def training_dataset() -> List[dict[str, str]]:
+    """Built-in examples, ``data/training_data.json`` and learned phrases."""
+    learned = [{"text": p, "command": c} for p, c in get_custom_intents().items()]
+    return DEFAULT_TRAINING_DATA + _load_json_file(TRAINING_DATA_FILE) + learned
+
 class IntentClassifier:
+    """Hashed word n-grams fed to a linear model trained with SGD.
+
+    The hashing vectorizer has no vocabulary, so new examples can be folded
+    in with ``partial_fit`` (:meth:`learn`) instead of refitting. The saved
+    model is keyed on a hash of every example's content; on load, examples
+    added since are learned incrementally and anything else (edits,
+    removals) triggers a full rebuild.
+
+    ``model`` is a :class:`~core.intent_model.CompactModel` exported after
+    every update, so classifying never imports scikit-learn; the sklearn
+    estimator is only loaded (from :data:`MODEL_FILE`) to learn more.
+    """
+
+    threshold = CLASSIFIER_THRESHOLD
+
     def __init__(self):
-        self.model = None
+        self.model: "CompactModel | None" = None
+        self.estimator = None
         self.size = 0
+        # Bumped whenever a model is trained or loaded
+        self.version = 0
+        self.examples: set[str] = set()
+        self.ready = threading.Event()
+        self._vectorizer = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # Examples learned before the model was loaded, folded in after
+        self._pending: List[dict[str, str]] = []
+        # Serialises training so updates can't overwrite each other
+        self._train_lock = threading.RLock()
+
+    def _loaded(self, model, examples: set[str]) -> None:
+        # Swap the model in before bumping the version, so nothing computed
+        # without it gets memoized under the new version
+        self.model = model
+        self.examples = examples
+        self.size = len(examples)
+        self.version += 1
+
+    def start(self) -> None:
+        """Load or train the model in a background thread, once."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._bootstrap, name="lex-nlp-load", daemon=True
+            )
+            self._thread.start()
+
+    def _bootstrap(self) -> None:
+        started = time.perf_counter()
+        try:
+            self.load_or_train()
+            logger.info("Intent classifier ready in %.2fs", time.perf_counter() - started)
+        except Exception:
+            logger.exception("Intent classifier failed to load; using regex intents only")
+        finally:
+            self.ready.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Start loading if needed and block until done (or ``timeout``)."""
+        self.start()
+        return self.ready.wait(timeout)
 
+    def vectorize(self, texts: List[str]):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            self._vectorizer = HashingVectorizer(
+                n_features=N_FEATURES, alternate_sign=False, ngram_range=NGRAM_RANGE
+            )
+        return self._vectorizer.transform(texts)
+
+    # -----------------------------------------------------
+    # Training
+    # -----------------------------------------------------
     def train(self, dataset: List[dict[str, str]]):
-        texts = [preprocess(d['text']) for d in dataset]
-        commands = [d['command'] for d in dataset]
-        self.model = make_pipeline(TfidfVectorizer(), LogisticRegression(max_iter=1000))
-        self.model.fit(texts, commands)
-        joblib.dump(self.model, MODEL_FILE)
-        with open(META_FILE, "w") as fh:
-            json.dump({"size": len(dataset)}, fh)
-        self.size = len(dataset)
+        """Fit a new model on ``dataset`` from scratch and save it."""
+        from sklearn.linear_model import SGDClassifier
+
+        with self._train_lock:
+            texts = [preprocess(d['text']) for d in dataset]
+            commands = [d['command'] for d in dataset]
+            model = SGDClassifier(
+                loss="log_loss", alpha=SGD_ALPHA, max_iter=100, tol=None, random_state=0
+            )
+            model.fit(self.vectorize(texts), commands)
+            self._update(model, {example_digest(d) for d in dataset})
+
+    def learn(self, examples: List[dict[str, str]]) -> bool:
+        """Fold new examples into the current model without a full refit.
+
+        A command the model has never seen needs a new output class, which
+        SGD can't add incrementally, so that case refits on the whole
+        dataset (still only milliseconds with hashed features). Returns
+        False if there was nothing new or no model is loaded yet; examples
+        that arrive during the initial load are learned once it finishes.
+        """
+        import copy
+
+        with self._lock:
+            if self.model is None:
+                # Don't wait on the initial load, which may have read the
+                # dataset before these were saved: queue them for it
+                self._pending += examples
+                return False
+        with self._train_lock:
+            new = [e for e in examples if example_digest(e) not in self.examples]
+            if not new:
+                return False
+            commands = [e['command'] for e in new]
+            estimator = self._load_estimator()
+            if estimator is None or not set(commands) <= set(self.model.classes_):
+                self.train(training_dataset())
+                return True
+            # Train a copy so a failed update leaves the saved pair intact
+            estimator = copy.deepcopy(estimator)
+            features = self.vectorize([preprocess(e['text']) for e in new])
+            for _ in range(ONLINE_EPOCHS):
+                estimator.partial_fit(features, commands)
+            self._update(estimator, self.examples | {example_digest(e) for e in new})
+            return True
+
+    def rebuild(self, background: bool = True) -> threading.Thread | None:
+        """Retrain from scratch on the current dataset, off-thread by default."""
+        if not background:
+            self.train(training_dataset())
+            return None
+        thread = threading.Thread(target=self._rebuild, name="lex-nlp-rebuild", daemon=True)
+        thread.start()
+        return thread
+
+    def _rebuild(self) -> None:
+        started = time.perf_counter()
+        try:
+            self.train(training_dataset())
+            logger.info("Intent classifier rebuilt in %.2fs", time.perf_counter() - started)
+        except Exception:
+            logger.exception("Intent classifier rebuild failed")
+
+    # -----------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------
+    def _update(self, estimator, examples: set[str]) -> None:
+        from .intent_model import CompactModel
+
+        model = CompactModel.from_estimator(estimator, N_FEATURES, NGRAM_RANGE)
+        self._save(estimator, model, examples)
+        self.estimator = estimator
+        self._loaded(model, examples)
+
+    def _save(self, estimator, model: "CompactModel", examples: set[str]) -> None:
+        import joblib
+
+        os.makedirs(os.path.dirname(MODEL_FILE), exist_ok=True)
+        tmp = f"{MODEL_FILE}.tmp"
+        joblib.dump(estimator, tmp)
+        os.replace(tmp, MODEL_FILE)
+        digest = dataset_hash(examples)
+        # A fresh directory per dataset: a process still serving the old
+        # model keeps its mapped files until it reloads
+        compact = f"{COMPACT_DIR}-{digest[:16]}"
+        model.save(compact)
+        meta = {
+            "kind": MODEL_KIND,
+            "hash": digest,
+            "size": len(examples),
+            "compact": os.path.basename(compact),
+            "examples": sorted(examples),
+        }
+        with open(f"{META_FILE}.tmp", "w") as fh:
+            json.dump(meta, fh)
+        os.replace(f"{META_FILE}.tmp", META_FILE)
+        for old in glob.glob(f"{COMPACT_DIR}-*"):
+            if old != compact:
+                shutil.rmtree(old, ignore_errors=True)
+
+    def _load_estimator(self):
+        """The sklearn model behind ``model``, needed only to learn more."""
+        if self.estimator is None:
+            import joblib
 
-    def load_or_train(self):
-        dataset = DEFAULT_TRAINING_DATA + _load_json_file(TRAINING_DATA_FILE)
-        if os.path.exists(MODEL_FILE) and os.path.exists(META_FILE):
             try:
-                with open(META_FILE) as fh:
-                    meta = json.load(fh)
-                if meta.get("size") == len(dataset):
-                    self.model = joblib.load(MODEL_FILE)
-                    self.size = meta["size"]
-                    return
-            except Exception:
-                pass
-        self.train(dataset)
+                self.estimator = joblib.load(MODEL_FILE)
+            except Exception as e:
+                logger.warning("Could not load intent estimator, retraining: %s", e)
+        return self.estimator
+
+    def load_or_train(self):
+        with self._train_lock:
+            self._load_or_train()
+        # The model is set now, so learn() no longer queues: take what it did
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            self.learn(pending)
+
+    def _load_or_train(self):
+        from .intent_model import CompactModel
+
+        dataset = training_dataset()
+        wanted = {example_digest(d) for d in dataset}
+        meta = _load_json_file(META_FILE) if os.path.exists(MODEL_FILE) else {}
+        if not isinstance(meta, dict) or meta.get("kind") != MODEL_KIND:
+            self.train(dataset)
+            return
+        saved = set(meta.get("examples", []))
+        if meta.get("hash") != dataset_hash(saved) or not saved <= wanted:
+            # Examples were edited or removed; SGD can't unlearn them
+            self.train(dataset)
+            return
+        compact = os.path.join(os.path.dirname(COMPACT_DIR), meta.get("compact", ""))
+        try:
+            model = CompactModel.load(compact)
+        except Exception as e:
+            logger.warning("Could not load intent model, retraining: %s", e)
+            self.train(dataset)
+            return
+        self.estimator = None
+        self._loaded(model, saved)
+        if saved != wanted:
+            self.learn([d for d in dataset if example_digest(d) not in saved])
 
     def classify(self, text: str) -> Tuple[str, float]:
-        if not self.model:
-            return "unknown", 0.0
-        probs = self.model.predict_proba([text])[0]
-        idx = int(probs.argmax())
-        return self.model.classes_[idx], float(probs[idx])
+        return self.classify_many([text])[0]
+
+    def classify_many(
+        self, texts: List[str], chunk_size: int = CLASSIFY_CHUNK
+    ) -> List[Tuple[str, float]]:
+        """Classify a batch, ``chunk_size`` inputs per sparse-matrix pass.
+
+        Gives the same ``(intent, confidence)`` pairs as :meth:`classify`
+        on each item; chunking only caps the size of the feature and
+        probability matrices.
+        """
+        model = self.model
+        if not model:
+            self.start()
+            return [("unknown", 0.0)] * len(texts)
+        results: List[Tuple[str, float]] = []
+        for offset in range(0, len(texts), chunk_size):
+            probs = model.predict_proba(texts[offset:offset + chunk_size])
+            idx = probs.argmax(axis=1)
+            labels = model.classes_[idx]
+            scores = probs[range(len(idx)), idx]
+            results += zip(labels.tolist(), scores.tolist())
+        return results
 
 # === NLP Main === #
+_MEMO = LRUCache(NORMALIZE_CACHE_SIZE)
+_memo_versions: tuple | None = None
 REGISTRY = IntentRegistry()
 CLASSIFIER = IntentClassifier()
+# Nearest-neighbour alternative to CLASSIFIER, built on first use
+SEMANTIC: "SemanticIndex | None" = None
+INTENT_ENGINES = ("classifier", "semantic")
+_engine_name = "classifier"
+_engine = CLASSIFIER
+
+def set_intent_engine(name: str) -> str:
+    """Pick what scores inputs before the regex intents: ``classifier``
+    (the trained model) or ``semantic`` (nearest example utterances, see
+    :mod:`core.semantic`). Unknown names fall back to the classifier.
+    """
+    global _engine, _engine_name
+    if name not in INTENT_ENGINES:
+        logger.warning("Unknown intent_engine %r; using the classifier", name)
+        name = "classifier"
+    _engine = CLASSIFIER if name == "classifier" else semantic_index()
+    _engine_name = name
+    return name
+
+def intent_engine():
+    """The engine :func:`normalize_input` currently asks first."""
+    return _engine
+
+def semantic_index() -> "SemanticIndex":
+    """The shared :class:`~core.semantic.SemanticIndex` over the training data."""
+    global SEMANTIC
+    if SEMANTIC is None:
+        from .semantic import SemanticIndex
+
+        index = SemanticIndex()
+        index.add_many(
+            {"text": preprocess(d["text"]), "command": d["command"]}
+            for d in training_dataset()
+        )
+        SEMANTIC = index
+    return SEMANTIC
+
+def load_classifier(background: bool = True) -> bool:
+    """Start loading the classifier; with ``background=False`` wait for it.
+
+    Returns whether the classifier has finished loading.
+    """
+    if background:
+        CLASSIFIER.start()
+        return CLASSIFIER.ready.is_set()
+    return CLASSIFIER.wait()
 
 # === NLP Interface === #
-def normalize_input(text: str, plugin_choices: Iterable[str] | None = None, cutoff: float = 0.75) -> NLPResult:
+def normalize_input(
+    text: str,
+    plugin_choices: Iterable[str] | None = None,
+    cutoff: float = 0.75,
+    timings: dict[str, float] | None = None,
+) -> NLPResult:
+    """Map raw input to a command string.
+
+    Results are memoized per preprocessed text (see :func:`normalize_cache_stats`),
+    so a repeated phrase skips the classifier, registry and fuzzy matching.
+    When ``timings`` is given, the seconds spent in each stage that ran
+    (``preprocess``, ``memo``, ``classify``, ``registry``, ``fuzzy``) are
+    stored in it.
+    """
     raw = text
+    clock = time.perf_counter
+    t0 = clock()
     text = preprocess(text)
+    t1 = clock()
+    if timings is not None:
+        timings["preprocess"] = t1 - t0
+
+    key = _memo_key(text, plugin_choices, cutoff)
+    cached = _memo_get(key)
+    t0, t1 = t1, clock()
+    if timings is not None:
+        timings["memo"] = t1 - t0
+    if cached is not None:
+        return NLPResult(*cached, raw)
+
+    result = _normalize(text, raw, plugin_choices, cutoff, timings, t1)
+    _MEMO.put(key, (result.command, result.origin, result.confidence))
+    return result
+
+def _memo_key(text: str, plugin_choices: Iterable[str] | None, cutoff: float) -> tuple:
+    choices = tuple(plugin_choices) if plugin_choices else None
+    return text, (_engine_name, _engine.version), REGISTRY.version, choices, cutoff
 
-    intent, confidence = CLASSIFIER.classify(text)
-    if confidence >= 0.6 and intent != "unknown":
+def _memo_get(key: tuple):
+    # Entries from older versions can never hit again; drop them here, on
+    # the caller's thread, rather than from the loader thread
+    global _memo_versions
+    if key[1:3] != _memo_versions:
+        _MEMO.clear()
+        _memo_versions = key[1:3]
+    return _MEMO.get(key)
+
+def _normalize(
+    text: str,
+    raw: str,
+    plugin_choices: Iterable[str] | None,
+    cutoff: float,
+    timings: dict[str, float] | None,
+    t1: float,
+    classified: Tuple[str, float] | None = None,
+) -> NLPResult:
+    """The uncached pipeline: intent engine, then registry, then fuzzy match.
+
+    ``classified`` is a precomputed ``(intent, confidence)`` from a batch pass.
+    """
+    clock = time.perf_counter
+    if classified is None:
+        intent, confidence = _engine.classify(text)
+        t0, t1 = t1, clock()
+        if timings is not None:
+            timings["classify"] = t1 - t0
+    else:
+        intent, confidence = classified
+    # Each engine has its own scale: a probability or a cosine similarity
+    if confidence >= _engine.threshold and intent != "unknown":
         return NLPResult(intent, 'ml', confidence, raw)
 
     fallback, origin = REGISTRY.match(text)
+    t0, t1 = t1, clock()
+    if timings is not None:
+        timings["registry"] = t1 - t0
     if origin != 'none':
         return NLPResult(fallback, origin, 1.0, raw)
 
     if plugin_choices:
         match = fuzzy_match(text, plugin_choices, cutoff)
+        if timings is not None:
+            timings["fuzzy"] = clock() - t1
         if match:
             return NLPResult(match, 'fuzzy', 0.7, raw)
 
     return NLPResult(text, 'raw', 0.0, raw)
 
+def normalize_cache_stats() -> dict:
+    """Hit/miss counters of the :func:`normalize_input` memo."""
+    return _MEMO.stats()
+
+def clear_normalize_cache():
+    _MEMO.clear()
+
+def normalize_many(
+    texts: List[str],
+    plugin_choices: List[Iterable[str] | None] | Iterable[str] | None = None,
+    cutoff: float = 0.75,
+) -> List[NLPResult]:
+    """Normalize a batch of inputs with one batched classifier pass.
+
+    ``plugin_choices`` is either shared by every input or a list with one
+    entry per input. Results match calling :func:`normalize_input` per item.
+    """
+    if not isinstance(plugin_choices, list):
+        plugin_choices = [plugin_choices] * len(texts)
+    cleaned = [preprocess(t) for t in texts]
+    keys = [_memo_key(t, c, cutoff) for t, c in zip(cleaned, plugin_choices)]
+    cached = [_memo_get(k) for k in keys]
+
+    # One classifier pass over the distinct inputs the memo doesn't know
+    misses = list(dict.fromkeys(t for t, c in zip(cleaned, cached) if c is None))
+    classified = dict(zip(misses, _engine.classify_many(misses)))
+
+    results = []
+    for raw, text, choices, key, hit in zip(texts, cleaned, plugin_choices, keys, cached):
+        if hit is not None:
+            results.append(NLPResult(*hit, raw))
+            continue
+        result = _normalize(
+            text, raw, choices, cutoff, None, time.perf_counter(),
+            classified.get(text, ("unknown", 0.0)),
+        )
+        _MEMO.put(key, (result.command, result.origin, result.confidence))
+        results.append(result)
+    return results
+
 # === Helpers === #
 def fuzzy_match(text: str, choices: Iterable[str], cutoff=0.75) -> str | None:
     result = process.extractOne(text, choices, score_cutoff=cutoff * 100)
@@ -130,14 +621,38 @@ def _load_json_file(path: str) -> List[dict]:
         return []
 
 # === Custom Intent System === #
+_custom_cache: dict[str, str] | None = None
+
+def get_custom_intents() -> dict[str, str]:
+    """Return learned ``phrase -> command`` mappings."""
+    global _custom_cache
+    if _custom_cache is None:
+        data = _load_json_file(CUSTOM_INTENTS_FILE)
+        _custom_cache = data if isinstance(data, dict) else {}
+    return dict(_custom_cache)
+
+def _register_custom(phrase: str, command: str):
+    REGISTRY.register_phrase(phrase, command, priority='custom')
+
+def _refresh_custom_registry():
+    """Re-register every learned phrase from :data:`CUSTOM_INTENTS_FILE`."""
+    REGISTRY.clear('custom')
+    for phrase, command in get_custom_intents().items():
+        _register_custom(phrase, command)
+
 def add_custom_intent(phrase: str, command: str):
+    global _custom_cache
     phrase = preprocess(phrase)
-    intents = _load_json_file(CUSTOM_INTENTS_FILE)
+    intents = get_custom_intents()
     intents[phrase] = command
     os.makedirs(os.path.dirname(CUSTOM_INTENTS_FILE), exist_ok=True)
     with open(CUSTOM_INTENTS_FILE, "w") as fh:
         json.dump(intents, fh)
-    REGISTRY.register(rf"^{re.escape(phrase)}$", lambda _: command, priority='custom')
+    _custom_cache = intents
+    _register_custom(phrase, command)
+    if SEMANTIC is not None:
+        SEMANTIC.add(phrase, command)
+    CLASSIFIER.learn([{"text": phrase, "command": command}])
 
 # === Default Data === #
 DEFAULT_TRAINING_DATA = [
@@ -149,14 +664,17 @@ DEFAULT_TRAINING_DATA = [
 ]
 
 # === Register defaults === #
-def register_default_intents():
-    reg = REGISTRY.register
+def register_default_intents(registry: IntentRegistry | None = None):
+    reg = (REGISTRY if registry is None else registry).register
     reg(r"^remind me to (.+)", lambda m: f"remind {m.group(1)}")
+    # "remind me in 20 minutes to stretch": the plugin reads the time
+    reg(r"^remind me (.+)", lambda m: f"remind {m.group(1)}")
     reg(r"^flip a coin", lambda _: "game flip")
     reg(r"^roll a die", lambda _: "game roll")
     reg(r"^generate a uuid", lambda _: "tools uuid")
     reg(r"^weather(?: in)? (.+)", lambda m: f"weather {m.group(1)}")
 
 # === Bootstrap === #
+# The classifier loads on first use or via load_classifier()
 register_default_intents()
-CLASSIFIER.load_or_train()
+_refresh_custom_registry()
@@ -0,0 +1,133 @@
+"""Cheap always-on latency histograms for dispatch and plugin execution."""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from dataclasses import dataclass, field
+
+from .logger import get_logger
+
+logger = get_logger()
+
+# Bucket upper bounds grow geometrically from MIN_MS, so a reported
+# percentile is within GROWTH (20%) of the real value at any scale
+MIN_MS = 0.01
+GROWTH = 1.2
+_LOG_GROWTH = math.log(GROWTH)
+
+
+def _bucket(ms: float) -> int:
+    if ms <= MIN_MS:
+        return 0
+    return int(math.log(ms / MIN_MS) / _LOG_GROWTH) + 1
+
+
+def _upper(index: int) -> float:
+    return MIN_MS * GROWTH**index
+
+
+class Histogram:
+    """Log-bucketed latency histogram; recording is O(1) and allocation free."""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        index = _bucket(ms)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        """Approximate ``q``-th percentile (0-100) in milliseconds."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_upper(index), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+        }
+
+
+@dataclass
+class CommandPerf:
+    latency: Histogram = field(default_factory=Histogram)
+    timeouts: int = 0
+    errors: int = 0
+
+    def summary(self) -> dict:
+        data = self.latency.summary()
+        data.update(timeouts=self.timeouts, errors=self.errors)
+        return data
+
+
+class PerfStats:
+    """Per-trigger execution latency plus timings of dispatch stages.
+
+    ``record`` takes the outcome of a plugin run (``"ok"``, ``"timeout"`` or
+    ``"error"``); ``record_stage`` times everything else, e.g. NLP
+    normalization steps or the whole dispatch.
+    """
+
+    def __init__(self):
+        self.commands: dict[str, CommandPerf] = {}
+        self.stages: dict[str, Histogram] = {}
+
+    def record(self, trigger: str, seconds: float, outcome: str = "ok") -> None:
+        perf = self.commands.get(trigger)
+        if perf is None:
+            perf = self.commands[trigger] = CommandPerf()
+        perf.latency.record(seconds)
+        if outcome == "timeout":
+            perf.timeouts += 1
+        elif outcome == "error":
+            perf.errors += 1
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = Histogram()
+        hist.record(seconds)
+
+    def reset(self) -> None:
+        self.commands.clear()
+        self.stages.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "commands": {k: v.summary() for k, v in sorted(self.commands.items())},
+            "stages": {k: v.summary() for k, v in sorted(self.stages.items())},
+        }
+
+    def export(self, path: str, extra: dict | None = None) -> str:
+        """Write :meth:`snapshot` (plus ``extra`` sections) as JSON to ``path``."""
+        data = self.snapshot()
+        if extra:
+            data.update(extra)
+        path = os.fspath(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+        return path
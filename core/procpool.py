@@ -0,0 +1,338 @@
+"""Pre-started worker processes for blocking or CPU-heavy plugins.
+
+A plugin opts in with ``executor = "process"`` on its ``Command`` class. Its
+``run`` then executes inside a worker process with a minimal context
+(``settings`` only), so a timeout can actually kill the work instead of
+leaving a thread running in the background.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import multiprocessing
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from .logger import get_logger
+
+logger = get_logger()
+
+# A worker that fails to start is retried this many times, backing off
+SPAWN_ATTEMPTS = 3
+SPAWN_RETRY_DELAY = 0.5
+
+
+def _worker_main(conn) -> None:
+    """Child process loop: run plugin commands sent over ``conn``."""
+    from core.manifest import import_plugin
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    instances: dict[str, tuple[float | None, object]] = {}
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            break
+        if msg is None:
+            break
+        module_name, mtime, args, settings, root, stream = msg
+        if root and root not in sys.path:
+            # Workers may have been started before the plugin package was
+            # importable from the parent's sys.path
+            sys.path.insert(0, root)
+        try:
+            cached = instances.get(module_name)
+            if cached is None or cached[0] != mtime:
+                module = import_plugin(module_name, mtime)
+                cached = (mtime, module.Command({"settings": settings}))
+                instances[module_name] = cached
+            cmd = cached[1]
+            if hasattr(cmd, "settings"):
+                cmd.settings = settings
+            if stream and hasattr(cmd, "stream"):
+                chunks = cmd.stream(args)
+                while True:
+                    try:
+                        chunk = loop.run_until_complete(chunks.__anext__())
+                    except StopAsyncIteration:
+                        break
+                    conn.send(("chunk", chunk))
+                conn.send(("end", None))
+                continue
+            result = loop.run_until_complete(cmd.run(args))
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    loop.close()
+
+
+class WorkerError(Exception):
+    """Raised in the parent when a plugin failed inside a worker process."""
+
+
+@dataclass
+class _Worker:
+    process: multiprocessing.process.BaseProcess
+    conn: object
+
+    def kill(self) -> None:
+        try:
+            self.process.kill()
+            self.process.join(1)
+        except Exception:
+            pass
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class ProcessPool:
+    """A fixed number of reusable worker processes.
+
+    Workers are started in the background as soon as the pool is created and
+    reused across calls. A call that times out or is cancelled kills its
+    worker, which is then replaced; workers that fail to start are retried
+    and, failing that, started again the next time a call has to wait.
+    """
+
+    def __init__(self, size: int = 2):
+        self.size = max(1, int(size))
+        if sys.platform.startswith("linux"):
+            # Don't fork a process that already runs threads (watcher, to_thread)
+            self._ctx = multiprocessing.get_context("forkserver")
+        else:
+            self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._idle: list[_Worker] = []
+        # Futures of callers waiting for an idle worker, possibly on
+        # different event loops since the pool is shared process-wide
+        self._waiters: deque[asyncio.Future] = deque()
+        self._missing = self.size
+        self._filling = False
+        self._closed = False
+        self.killed = 0
+        self._start_filling()
+
+    def _spawn(self) -> _Worker:
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        proc.start()
+        child.close()
+        return _Worker(proc, parent)
+
+    def _spawn_with_retry(self) -> _Worker | None:
+        for attempt in range(1, SPAWN_ATTEMPTS + 1):
+            try:
+                return self._spawn()
+            except Exception:
+                logger.exception(
+                    "Could not start plugin worker process (attempt %d/%d)",
+                    attempt,
+                    SPAWN_ATTEMPTS,
+                )
+            if attempt < SPAWN_ATTEMPTS:
+                time.sleep(SPAWN_RETRY_DELAY * attempt)
+        return None
+
+    def _start_filling(self) -> None:
+        """Start missing workers in a background thread, once at a time."""
+        with self._lock:
+            if self._filling or self._closed or self._missing <= 0:
+                return
+            self._filling = True
+        threading.Thread(target=self._fill, daemon=True).start()
+
+    def _fill(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed or self._missing <= 0:
+                    self._filling = False
+                    return
+                self._missing -= 1
+            worker = self._spawn_with_retry()
+            if worker is None:
+                with self._lock:
+                    self._missing += 1
+                    self._filling = False
+                    missing = self._missing
+                logger.error(
+                    "Plugin worker pool is running %d worker(s) short", missing
+                )
+                return
+            self._release(worker)
+
+    def _release(self, worker: _Worker) -> None:
+        with self._lock:
+            if self._closed:
+                worker.kill()
+                return
+            self._idle.append(worker)
+        self._wake_one()
+
+    def _wake_one(self) -> None:
+        """Wake the longest waiting caller if a worker is idle."""
+        while True:
+            with self._lock:
+                if not (self._idle and self._waiters):
+                    return
+                waiter = self._waiters.popleft()
+            try:
+                waiter.get_loop().call_soon_threadsafe(self._notify, waiter)
+                return
+            except RuntimeError:
+                # That caller's event loop is gone; try the next one
+                continue
+
+    def _notify(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # Cancelled in the meantime: pass the wake-up on
+            self._wake_one()
+        else:
+            waiter.set_result(None)
+
+    async def _acquire(self) -> _Worker:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise WorkerError("The plugin worker pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+            # All workers busy or still starting; replace any that failed
+            self._start_filling()
+            try:
+                await waiter
+            finally:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+
+    async def _replace(self, worker: _Worker) -> None:
+        self.killed += 1
+        await asyncio.to_thread(worker.kill)
+        with self._lock:
+            self._missing += 1
+        self._start_filling()
+
+    async def _recv(self, worker: _Worker):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        fd = worker.conn.fileno()
+        try:
+            loop.add_reader(fd, lambda: fut.done() or fut.set_result(None))
+        except (NotImplementedError, RuntimeError):
+            return await asyncio.to_thread(worker.conn.recv)
+        try:
+            await fut
+        finally:
+            loop.remove_reader(fd)
+        return worker.conn.recv()
+
+    async def run(
+        self,
+        module_name: str,
+        args: str,
+        settings: dict,
+        timeout: float,
+        mtime: float | None = None,
+        root: str | None = None,
+    ) -> str:
+        """Run ``Command.run(args)`` from ``module_name`` in a worker process.
+
+        ``root`` is the directory the plugin package is imported from.
+        """
+        worker = await self._acquire()
+        try:
+            worker.conn.send((module_name, mtime, args, dict(settings), root, False))
+            status, payload = await asyncio.wait_for(self._recv(worker), timeout)
+        except BaseException:
+            # Timed out, cancelled or the worker died: the only way to stop
+            # the work is to kill the process
+            await asyncio.shield(self._replace(worker))
+            raise
+        self._release(worker)
+        if status == "error":
+            raise WorkerError(payload)
+        return payload
+
+    async def stream(
+        self,
+        module_name: str,
+        args: str,
+        settings: dict,
+        timeout: float,
+        mtime: float | None = None,
+        root: str | None = None,
+    ):
+        """Yield the chunks of ``Command.stream(args)`` run in a worker.
+
+        ``timeout`` bounds the time spent waiting on the worker, not the time
+        the caller spends handling chunks. A worker abandoned mid-stream is
+        killed like one that timed out.
+        """
+        worker = await self._acquire()
+        loop = asyncio.get_running_loop()
+        remaining = timeout
+        finished = False
+        try:
+            worker.conn.send((module_name, mtime, args, dict(settings), root, True))
+            while True:
+                started = loop.time()
+                status, payload = await asyncio.wait_for(self._recv(worker), remaining)
+                remaining -= loop.time() - started
+                if status == "chunk":
+                    yield payload
+                    continue
+                finished = True
+                if status == "error":
+                    raise WorkerError(payload)
+                if status == "ok" and payload:
+                    # Plugin without a stream method: one chunk
+                    yield payload
+                return
+        finally:
+            if finished:
+                self._release(worker)
+            else:
+                await asyncio.shield(self._replace(worker))
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers, self._idle = self._idle, []
+            waiters, self._waiters = list(self._waiters), deque()
+        for waiter in waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(self._notify, waiter)
+            except RuntimeError:
+                pass
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except Exception:
+                pass
+            worker.kill()
+
+
+_shared: ProcessPool | None = None
+
+
+def shared_pool(size: int = 2) -> ProcessPool:
+    """Return the process-wide pool, starting it on first use.
+
+    Every dispatcher in the process shares it so worker processes are only
+    started once, when the first process-executor command is dispatched.
+    """
+    global _shared
+    if _shared is None or _shared._closed:
+        _shared = ProcessPool(size)
+        atexit.register(_shared.close)
+    return _shared
@@ -0,0 +1,163 @@
+"""Asyncio client for ``lexd``, used by the UIs in place of a local dispatcher.
+
+Imports nothing heavy, so a front end attached to the daemon starts without
+loading plugins, the NLP model or the vault.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import socket
+
+from .client import DISCONNECTED, MAX_FRAME, RemoteError, encode, socket_path
+
+
+class RemoteDispatcher:
+    """Asyncio client exposing the parts of ``Dispatcher`` front ends use.
+
+    ``run_command`` and ``stream_command`` behave like their local
+    counterparts; ``context["settings"]``, ``trigger_map`` and ``commands``
+    are read-only snapshots refreshed when the daemon's plugins change.
+    Several requests can be in flight on one connection. Each connection
+    has its own history on the daemon unless ``session`` names one to share.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        session: str | None = None,
+    ):
+        self._reader = reader
+        self._writer = writer
+        self.session = session
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Queue] = {}
+        self._version = None
+        self.context: dict = {"settings": {}}
+        self.trigger_map: dict[str, None] = {}
+        self.commands: list[str] = []
+        self._read_task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    @classmethod
+    async def connect(
+        cls,
+        path: str | None = None,
+        timeout: float = 1.0,
+        session: str | None = None,
+    ) -> RemoteDispatcher | None:
+        """Attach to the daemon at ``path``; ``None`` if none is running."""
+        if not hasattr(socket, "AF_UNIX"):
+            return None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(path or socket_path(), limit=MAX_FRAME),
+                timeout,
+            )
+        except (OSError, asyncio.TimeoutError):
+            return None
+        remote = cls(reader, writer, session)
+        try:
+            await asyncio.wait_for(remote.refresh(), timeout)
+        except (RemoteError, asyncio.TimeoutError):
+            await remote.close()
+            return None
+        return remote
+
+    async def close(self) -> None:
+        self._read_task.cancel()
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except OSError:
+            pass
+
+    async def _read_loop(self) -> None:
+        try:
+            while line := await self._reader.readline():
+                message = json.loads(line)
+                queue = self._pending.get(message.get("id"))
+                if queue is not None:
+                    queue.put_nowait(message)
+        except (OSError, ValueError):
+            # A broken or unreadable stream can't be resynchronised
+            pass
+        finally:
+            self._writer.close()
+            for queue in self._pending.values():
+                queue.put_nowait({"done": True, "error": DISCONNECTED})
+
+    async def _request(self, op: str, **fields):
+        if self._read_task.done():
+            raise RemoteError(DISCONNECTED)
+        rid = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._pending[rid] = queue
+        if self.session:
+            fields["session"] = self.session
+        finished = False
+        try:
+            self._writer.write(encode({"id": rid, "op": op, **fields}))
+            await self._writer.drain()
+            while True:
+                message = await queue.get()
+                if message.get("done"):
+                    finished = True
+                    if message.get("error"):
+                        raise RemoteError(message["error"])
+                    if op != "info" and message.get("version") != self._version:
+                        # The daemon reloaded plugins since we last looked
+                        await self.refresh()
+                yield message
+                if finished:
+                    return
+        except OSError as e:
+            raise RemoteError(DISCONNECTED) from e
+        finally:
+            self._pending.pop(rid, None)
+            if not finished and not self._writer.is_closing():
+                # The caller stopped listening: stop the command too
+                self._writer.write(encode({"id": None, "op": "cancel", "target": rid}))
+
+    async def _call(self, op: str, **fields):
+        result = None
+        async for message in self._request(op, **fields):
+            if message.get("done"):
+                result = message.get("result")
+        return result
+
+    async def refresh(self) -> None:
+        """Re-read settings, triggers and plugins from the daemon."""
+        info = await self._call("info")
+        self._version = info["version"]
+        self.context["settings"] = info["settings"]
+        self.trigger_map = dict.fromkeys(info["triggers"])
+        self.commands = info["commands"]
+
+    async def run_command(self, command: str, priority: int = 0) -> str:
+        return await self._call("run", text=command, priority=priority)
+
+    async def stream_command(self, command: str, priority: int = 0):
+        async for message in self._request("stream", text=command, priority=priority):
+            if "chunk" in message:
+                yield message["chunk"]
+
+    async def cancel(self) -> int:
+        """Stop every command the daemon is running for this client."""
+        return await self._call("stop")
+
+
+async def open_dispatcher(settings: dict):
+    """Attach to a running ``lexd``, or build a local ``Dispatcher`` (asking
+    for the vault passphrase) when none is listening."""
+    remote = await RemoteDispatcher.connect(socket_path(settings))
+    if remote is not None:
+        return remote
+    # Only pay for plugins, NLP and the vault when there's no daemon
+    from core.security import require_vault_key
+    from dispatcher import Dispatcher
+
+    key = require_vault_key()
+    return Dispatcher({"settings": settings, "vault_key": key})
@@ -0,0 +1,292 @@
+"""Nearest-neighbour intent lookup over example utterances, in NumPy.
+
+An alternative to the trained classifier in :mod:`core.nlp`: every example
+phrase is embedded locally as a dense vector of hashed words and character
+trigrams, and an input gets the command of its most similar examples by
+cosine similarity. Nothing is trained, so adding a phrase (or a brand new
+command) is one vector append.
+
+Up to :data:`EXACT_LIMIT` examples the whole matrix is scored per query.
+Beyond that the index partitions itself into ``4 * sqrt(n)`` cells
+(spherical k-means, redone whenever the index doubles) and only scores the
+:data:`PROBES` cells nearest each query, which keeps lookups well under a
+millisecond at 50,000 examples.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Iterable
+
+import numpy as np
+
+from .intent_model import murmurhash3_32
+
+DIM = 256
+EXACT_LIMIT = 4096
+PROBES = 16
+# Cells per square root of the example count
+CELLS_PER_ROOT = 4
+KMEANS_ITERATIONS = 6
+KMEANS_SAMPLE = 20000
+# Cosine similarity an input needs before it takes a neighbour's command.
+# Much stricter than the classifier's 0.6 probability: paraphrases of a
+# different command ("generate a password" vs "generate a uuid") score
+# 0.6-0.7 here. Calibrated with scripts/evaluate_nlp.py --intent-engine semantic
+THRESHOLD = 0.85
+# Different from the classifier's seed so the two hash spaces don't line up
+SEED = 0x1E7
+
+WORD = re.compile(r"\w+")
+
+
+@dataclass
+class Neighbour:
+    command: str
+    text: str
+    score: float
+
+
+def transfer_arguments(command: str, example: str, text: str) -> str:
+    """``command`` for ``text`` rather than for ``example``, its source phrase.
+
+    The trigger and the words ``text`` shares with ``example`` are kept;
+    command words the user said differently are replaced by their words,
+    so "weather in oslo" near "weather in tokyo" -> "weather tokyo" becomes
+    "weather oslo".
+    """
+    trigger, *words = command.split()
+    source, target = example.lower().split(), text.split()
+    replaced: dict[int, list[str]] = {}
+    for op, i1, i2, j1, j2 in SequenceMatcher(a=source, b=target, autojunk=False).get_opcodes():
+        if op in ("replace", "delete"):
+            for i in range(i1, i2):
+                replaced[i] = []
+            if op == "replace":
+                replaced[i1] = target[j1:j2]
+    out = [trigger]
+    for word in words:
+        position = source.index(word.lower()) if word.lower() in source else None
+        if position is None or position not in replaced:
+            out.append(word)
+        else:
+            # Each replaced span is used once, by its first command word
+            out += replaced.pop(position)
+    return " ".join(out)
+
+
+@lru_cache(maxsize=65536)
+def _slot(term: str, dim: int) -> tuple[int, float]:
+    h = murmurhash3_32(term.encode("utf-8"), SEED)
+    return (h & 0x7FFFFFFF) % dim, (1.0 if h >= 0 else -1.0)
+
+
+def _terms(text: str) -> list[str]:
+    words = WORD.findall(text.lower())
+    found = list(words)
+    for word in words:
+        padded = f"<{word}>"
+        found += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return found
+
+
+def embed_many(texts: Iterable[str], dim: int = DIM) -> np.ndarray:
+    """Unit-length embeddings, one row per text (all zeros for no words)."""
+    texts = list(texts)
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for term in _terms(text):
+            index, sign = _slot(term, dim)
+            out[row, index] += sign
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
+def embed(text: str, dim: int = DIM) -> np.ndarray:
+    return embed_many([text], dim)[0]
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first."""
+    if len(scores) > k:
+        idx = np.argpartition(scores, -k)[-k:]
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class _Cell:
+    """One partition: its examples' rows and a contiguous copy of their vectors."""
+
+    __slots__ = ("rows", "vectors", "size")
+
+    def __init__(self, rows: np.ndarray, vectors: np.ndarray, size: int):
+        self.rows = rows
+        self.vectors = vectors
+        self.size = size
+
+    def append(self, row: int, vector: np.ndarray) -> None:
+        if self.size == len(self.rows):
+            capacity = max(8, 2 * self.size)
+            rows = np.zeros(capacity, dtype=np.int64)
+            rows[:self.size] = self.rows[:self.size]
+            vectors = np.zeros((capacity, len(vector)), dtype=np.float32)
+            vectors[:self.size] = self.vectors[:self.size]
+            self.rows, self.vectors = rows, vectors
+        self.rows[self.size] = row
+        self.vectors[self.size] = vector
+        self.size += 1
+
+
+class SemanticIndex:
+    """Example utterances and their commands, searchable by cosine similarity.
+
+    Writers (``add``/``add_many``) are serialised; searches run without a
+    lock and see every example whose command was recorded when they began.
+    """
+
+    def __init__(self, dim: int = DIM, exact_limit: int = EXACT_LIMIT, probes: int = PROBES,
+                 threshold: float = THRESHOLD):
+        self.dim = dim
+        self.threshold = threshold
+        self.exact_limit = exact_limit
+        self.probes = probes
+        self.texts: list[str] = []
+        self.commands: list[str] = []
+        # Bumped on every insert so memoized lookups can't go stale
+        self.version = 0
+        self._vectors = np.zeros((64, dim), dtype=np.float32)
+        # (centroids, cells) once partitioned
+        self._cells: tuple[np.ndarray, list[_Cell]] | None = None
+        self._partitioned = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    # -----------------------------------------------------
+    # Insertion
+    # -----------------------------------------------------
+    def add(self, text: str, command: str) -> None:
+        self.add_many([{"text": text, "command": command}])
+
+    def add_many(self, examples: Iterable[dict[str, str]]) -> None:
+        """Append ``{"text", "command"}`` examples."""
+        examples = list(examples)
+        if not examples:
+            return
+        vectors = embed_many((e["text"] for e in examples), self.dim)
+        with self._lock:
+            start = len(self.commands)
+            end = start + len(examples)
+            if end > len(self._vectors):
+                grown = np.zeros((max(end, 2 * len(self._vectors)), self.dim), dtype=np.float32)
+                grown[:start] = self._vectors[:start]
+                self._vectors = grown
+            # Rows first: a search only reads rows below len(commands)
+            self._vectors[start:end] = vectors
+            if self._cells is not None and end < 2 * self._partitioned:
+                self._assign(vectors, start)
+            self.texts += [e["text"] for e in examples]
+            self.commands += [e["command"] for e in examples]
+            if end >= self.exact_limit and end >= 2 * self._partitioned:
+                self._partition(end)
+            self.version += 1
+
+    def _partition(self, n: int) -> None:
+        """Cluster the first ``n`` rows into cells with spherical k-means."""
+        vectors = self._vectors[:n]
+        count = max(1, int(CELLS_PER_ROOT * n ** 0.5))
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(n, size=min(n, KMEANS_SAMPLE), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=count, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Cells that lost every member keep their old centroid
+            np.divide(sums, norms, out=centroids, where=norms > 0)
+        nearest = np.concatenate([
+            np.argmax(vectors[i:i + 8192] @ centroids.T, axis=1) for i in range(0, n, 8192)
+        ])
+        order = np.argsort(nearest, kind="stable")
+        bounds = np.searchsorted(nearest[order], np.arange(count + 1))
+        cells = []
+        for c in range(count):
+            rows = order[bounds[c]:bounds[c + 1]].astype(np.int64)
+            cells.append(_Cell(rows, vectors[rows], len(rows)))
+        self._cells = centroids, cells
+        self._partitioned = n
+
+    def _assign(self, vectors: np.ndarray, start: int) -> None:
+        # Caller holds the lock
+        centroids, cells = self._cells
+        for offset, c in enumerate(np.argmax(vectors @ centroids.T, axis=1)):
+            cells[c].append(start + offset, vectors[offset])
+
+    # -----------------------------------------------------
+    # Search
+    # -----------------------------------------------------
+    def search(self, text: str, k: int = 5) -> list[Neighbour]:
+        return self.search_many([text], k)[0]
+
+    def search_many(self, texts: list[str], k: int = 5) -> list[list[Neighbour]]:
+        """The ``k`` most similar examples to each text, most similar first."""
+        queries = embed_many(texts, self.dim)
+        n = len(self.commands)
+        partition = self._cells
+        results = []
+        if partition is None:
+            # One matrix product per chunk of queries
+            vectors = self._vectors[:n]
+            for offset in range(0, len(texts), 256):
+                scores = vectors @ queries[offset:offset + 256].T
+                for column in range(scores.shape[1]):
+                    idx = _top(scores[:, column], k)
+                    results.append(self._neighbours(idx, scores[idx, column]))
+            return results
+        centroids, cells = partition
+        probes = min(self.probes, len(centroids))
+        for query, near in zip(queries, queries @ centroids.T):
+            found_rows, found_scores = [], []
+            for c in _top(near, probes):
+                cell = cells[c]
+                # Size first: the arrays hold at least that many entries
+                size = cell.size
+                found_rows.append(cell.rows[:size])
+                found_scores.append(cell.vectors[:size] @ query)
+            rows = np.concatenate(found_rows)
+            scores = np.concatenate(found_scores)
+            visible = rows < n
+            rows, scores = rows[visible], scores[visible]
+            idx = _top(scores, k)
+            results.append(self._neighbours(rows[idx], scores[idx]))
+        return results
+
+    def _neighbours(self, rows: np.ndarray, scores: np.ndarray) -> list[Neighbour]:
+        return [
+            Neighbour(self.commands[r], self.texts[r], min(float(s), 1.0))
+            for r, s in zip(rows.tolist(), scores.tolist())
+        ]
+
+    def classify(self, text: str) -> tuple[str, float]:
+        return self.classify_many([text])[0]
+
+    def classify_many(self, texts: list[str]) -> list[tuple[str, float]]:
+        """Nearest example's command, carrying over the text's own arguments,
+        and its cosine similarity.
+        """
+        results = []
+        for text, found in zip(texts, self.search_many(texts, k=1)):
+            if not found:
+                results.append(("unknown", 0.0))
+                continue
+            best = found[0]
+            results.append((transfer_arguments(best.command, best.text, text), best.score))
+        return results
@@ -0,0 +1,206 @@
+"""Local socket server that lets front ends share one warm ``Dispatcher``.
+
+``lexd`` listens on a Unix domain socket (see :func:`core.client.socket_path`)
+that only the current user can open. Requests and replies are single-line
+JSON objects (NDJSON). Every request carries an ``id`` echoed on each reply,
+so one connection can have several commands in flight::
+
+    {"id": 1, "op": "stream", "text": "weather oslo", "priority": 0}
+    {"id": 1, "chunk": "..."}                    # zero or more
+    {"id": 1, "done": true, "version": 3}        # exactly one, last
+
+``op`` is ``run`` (one ``result`` in the final reply), ``stream``,
+``cancel`` (``target`` is the id to stop), ``stop`` (cancel everything
+this client's session is running, like saying "stop") or ``info``. Failures end with ``"error"``. Dropping the
+connection cancels whatever it was running.
+
+Each connection gets its own session (history, settings; see
+:mod:`core.session`), discarded when it disconnects. A request may name a
+``session`` instead, to share state across connections, e.g. successive
+``lex`` invocations; named sessions expire after ``session_idle_timeout``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import socket
+
+from .client import MAX_FRAME, encode, socket_path
+from .engine import BACKGROUND, INTERACTIVE
+from .logger import get_logger
+from .manifest import command_module
+from .session import current_session
+
+logger = get_logger()
+
+# Safe to hand to any local client; keys and secrets stay in the daemon
+PUBLIC_SETTINGS = ("use_cloud", "sarcasm_level", "theme", "voice_input", "voice_output")
+
+
+class LexServer:
+    """Serve ``dispatcher`` to local clients over a Unix domain socket."""
+
+    def __init__(self, dispatcher, path: str | None = None):
+        self.dispatcher = dispatcher
+        self.path = path or socket_path(dispatcher.context.get("settings"))
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.Task] = set()
+        # Bumped whenever the dispatcher swaps in a new trigger map, so
+        # clients know to refresh their copy
+        self._map = None
+        self._version = 0
+
+    async def start(self) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("Unix domain sockets are not supported here")
+        await self._remove_stale()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Create the socket owner-only from the start, not just after chmod
+        umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(
+                self._handle, path=self.path, limit=MAX_FRAME
+            )
+        finally:
+            os.umask(umask)
+        logger.info("Listening on %s", self.path)
+
+    async def _remove_stale(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(self.path), 1.0
+            )
+        except (OSError, asyncio.TimeoutError):
+            # Left behind by a daemon that didn't shut down cleanly
+            os.unlink(self.path)
+            return
+        writer.close()
+        raise RuntimeError(f"Another lexd is already listening on {self.path}")
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+    # -----------------------------------------------------
+    # Connections
+    # -----------------------------------------------------
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._connections.add(asyncio.current_task())
+        session = self.dispatcher.sessions.open()
+        requests: dict[object, asyncio.Task] = {}
+        lock = asyncio.Lock()
+
+        async def send(message: dict) -> None:
+            async with lock:
+                writer.write(encode(message))
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    rid = request.get("id")
+                except (ValueError, AttributeError):
+                    await send({"id": None, "done": True, "error": "[Lex] Bad request."})
+                    continue
+                if request.get("op") == "cancel":
+                    task = requests.get(request.get("target"))
+                    if task is not None:
+                        task.cancel()
+                    continue
+                name = request.get("session")
+                task = asyncio.create_task(
+                    self._serve(rid, request, send, str(name) if name else session)
+                )
+                requests[rid] = task
+                task.add_done_callback(
+                    lambda t, rid=rid: requests.get(rid) is t and requests.pop(rid)
+                )
+        except (OSError, ValueError) as e:
+            # ValueError: a line longer than MAX_FRAME
+            logger.warning("Dropping lexd client: %s", e)
+        finally:
+            self._connections.discard(asyncio.current_task())
+            # Nobody is left to read the answers
+            for task in list(requests.values()):
+                task.cancel()
+            writer.close()
+            self.dispatcher.sessions.close(session.id)
+
+    async def _serve(self, rid, request: dict, send, session) -> None:
+        with self.dispatcher.sessions.use(session):
+            await self._reply(rid, request, send)
+
+    async def _reply(self, rid, request: dict, send) -> None:
+        op = request.get("op")
+        text = str(request.get("text", ""))
+        priority = request.get("priority", INTERACTIVE)
+        if priority not in range(INTERACTIVE, BACKGROUND + 1):
+            priority = INTERACTIVE
+        reply: dict = {"id": rid, "done": True}
+        try:
+            if op == "run":
+                reply["result"] = await self.dispatcher.run_command(text, priority)
+            elif op == "stream":
+                chunks = self.dispatcher.stream_command(text, priority)
+                async with contextlib.aclosing(chunks):
+                    async for chunk in chunks:
+                        await send({"id": rid, "chunk": chunk})
+            elif op == "stop":
+                reply["result"] = self.dispatcher.cancel()
+            elif op == "info":
+                reply["result"] = self.info()
+            else:
+                reply["error"] = f"[Lex] Unknown request: {op}"
+        except asyncio.CancelledError:
+            with contextlib.suppress(Exception):
+                await send({"id": rid, "done": True, "cancelled": True})
+            raise
+        except OSError:
+            # The client went away mid-stream
+            return
+        except Exception as e:
+            logger.error("lexd request %r failed: %s", text or op, e)
+            reply["error"] = f"[Lex] {e}"
+        reply["version"] = self.version()
+        with contextlib.suppress(OSError):
+            await send(reply)
+
+    # -----------------------------------------------------
+    # State shared with clients
+    # -----------------------------------------------------
+    def version(self) -> int:
+        if self.dispatcher.trigger_map is not self._map:
+            self._map = self.dispatcher.trigger_map
+            self._version += 1
+        return self._version
+
+    def info(self) -> dict:
+        settings = self.dispatcher.context.get("settings", {})
+        session = current_session()
+        return {
+            "pid": os.getpid(),
+            "session": session.id if session else None,
+            "version": self.version(),
+            "settings": {k: settings.get(k) for k in PUBLIC_SETTINGS if k in settings},
+            "triggers": sorted(self.dispatcher.trigger_map.keys()),
+            "commands": [command_module(c) for c in self.dispatcher.commands],
+        }
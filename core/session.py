@@ -0,0 +1,189 @@
+"""Per-client sessions layered over the dispatcher's shared plugin context.
+
+Plugins are built once and keep a reference to one context dict. That dict
+is a :class:`PluginContext`: while a session is active (see
+:meth:`SessionManager.use`) the keys in :data:`SESSION_KEYS` read and write
+that session's own state, and everything else (the dispatcher, plugins,
+vault key, usage counts) stays shared. Outside a session, e.g. a front end
+running its own dispatcher, every key lives in the shared dict as before.
+
+The active session is a :mod:`contextvars` variable, so it follows a command
+into the tasks running it and concurrent clients never touch each other's
+state.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+
+from .logger import get_logger
+
+logger = get_logger()
+
+# Recent (input, result) pairs kept in context["history"]; the full
+# history lives in core.history
+HISTORY_SIZE = 20
+
+# Context keys that belong to the session rather than the whole process
+SESSION_KEYS = frozenset({"history", "last_command", "last_result", "settings", "app"})
+
+_current: contextvars.ContextVar[Session | None] = contextvars.ContextVar(
+    "lex_session", default=None
+)
+
+
+def current_session() -> Session | None:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def no_session():
+    """Run with no session active, e.g. while building a shared plugin."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@dataclass(eq=False)
+class Session:
+    id: str
+    state: dict = field(default_factory=dict)
+    created: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    # Commands currently running; busy sessions are never pruned
+    active: int = 0
+
+
+class PluginContext(dict):
+    """The shared context dict, redirecting session keys to the active session.
+
+    A session's ``history`` starts empty and its ``settings`` start as a copy
+    of the shared settings, taken the first time the session reads them:
+    plugins change settings by mutating the dict in place, so copying up
+    front is what keeps one client's changes out of everyone else's.
+    """
+
+    def _state(self, key) -> dict | None:
+        if key not in SESSION_KEYS:
+            return None
+        session = _current.get()
+        if session is None:
+            return None
+        state = session.state
+        if key not in state:
+            if key == "history":
+                state[key] = deque(maxlen=HISTORY_SIZE)
+            elif key == "settings" and super().__contains__("settings"):
+                state[key] = dict(super().__getitem__("settings"))
+        return state
+
+    def __getitem__(self, key):
+        state = self._state(key)
+        return super().__getitem__(key) if state is None else state[key]
+
+    def get(self, key, default=None):
+        state = self._state(key)
+        return super().get(key, default) if state is None else state.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        state = self._state(key)
+        return super().__contains__(key) if state is None else key in state
+
+    def __setitem__(self, key, value) -> None:
+        state = self._state(key)
+        if state is None:
+            super().__setitem__(key, value)
+        else:
+            state[key] = value
+
+    def __delitem__(self, key) -> None:
+        state = self._state(key)
+        if state is None:
+            super().__delitem__(key)
+        else:
+            del state[key]
+
+    def setdefault(self, key, default=None):
+        state = self._state(key)
+        if state is None:
+            return super().setdefault(key, default)
+        return state.setdefault(key, default)
+
+    def pop(self, key, *default):
+        state = self._state(key)
+        return super().pop(key, *default) if state is None else state.pop(key, *default)
+
+
+class SessionManager:
+    """Create, look up and expire sessions by id.
+
+    Sessions unused for ``idle_timeout`` seconds are dropped the next time a
+    session is opened.
+    """
+
+    def __init__(self, idle_timeout: float = 1800.0):
+        self.idle_timeout = idle_timeout
+        self._sessions: dict[str, Session] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def get(self, session_id: str) -> Session | None:
+        return self._sessions.get(session_id)
+
+    def open(self, session_id: str | None = None) -> Session:
+        """Return the session named ``session_id``, creating it if needed.
+
+        Without an id a new anonymous session is created.
+        """
+        self.prune()
+        if session_id is None:
+            # Unique across restarts too, since history rows keep the id
+            session_id = uuid.uuid4().hex[:12]
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = Session(session_id)
+            logger.debug("Session opened: %s", session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def close(self, session_id: str) -> None:
+        if self._sessions.pop(session_id, None) is not None:
+            logger.debug("Session closed: %s", session_id)
+
+    def prune(self, now: float | None = None) -> int:
+        """Drop idle sessions; returns how many were removed."""
+        now = time.monotonic() if now is None else now
+        idle = [
+            s.id for s in self._sessions.values()
+            if not s.active and now - s.last_used > self.idle_timeout
+        ]
+        for session_id in idle:
+            self.close(session_id)
+        return len(idle)
+
+    @contextlib.contextmanager
+    def use(self, session: Session | str | None):
+        """Make ``session`` (or the one with that id) current in this context."""
+        if session is not None and not isinstance(session, Session):
+            session = self.open(session)
+        if session is not None:
+            session.active += 1
+        token = _current.set(session)
+        try:
+            yield session
+        finally:
+            _current.reset(token)
+            if session is not None:
+                session.active -= 1
+                session.last_used = time.monotonic()
@@ -15,8 +15,22 @@ DEFAULTS = {
     "elevenlabs_api_key": "",
     "elevenlabs_voice_id": "",
     "fuzzy_threshold": 0.75,
+    "intent_engine": "classifier",
     "plugin_timeout": 5.0,
+    "lazy_plugins": True,
+    "dispatch_workers": 4,
+    "dispatch_queue_size": 32,
+    "dispatch_interactive_queue_size": 128,
+    "dispatch_preempt": True,
+    "command_concurrency": {"search index": 1},
+    "process_workers": 2,
+    "result_cache_entries": 256,
+    "result_cache_max_bytes": 1_000_000,
+    "result_cache_persist": False,
     "allow_process_terminate": False,
+    "daemon_server": True,
+    "daemon_socket": "",
+    "session_idle_timeout": 1800,
     "theme": "lex",
 }
 
@@ -0,0 +1,264 @@
+"""Typed time, date, duration and number arguments found in free text.
+
+:func:`extract_slots` scans the text once with a single precompiled
+pattern and returns every slot it finds with its span and a Python value:
+
+- ``duration``: ``in 20 minutes``, ``for 1h30m``, ``half an hour`` -> ``timedelta``
+- ``time``: ``at 9``, ``9:30``, ``7pm``, ``noon`` -> ``datetime.time``
+- ``date``: ``today``, ``tomorrow``, ``next friday``, ``may 5``,
+  ``2024-05-01`` -> ``datetime.date``
+- ``number``: any other number -> ``int`` or ``float``
+
+Relative dates resolve against ``now``. :meth:`Slots.when` combines them
+into the moment the text refers to (``tomorrow at 9``, ``in 20 minutes``)
+and :meth:`Slots.remainder` is the text with the slots taken out, so a
+plugin gets both its arguments and their meaning from one parse.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+# Used for a date with no time ("tomorrow"), and for "tonight"
+DEFAULT_TIME = time(9, 0)
+EVENING = time(20, 0)
+# "today" once DEFAULT_TIME (or EVENING) has passed: this long from now
+LATER_TODAY = timedelta(hours=1)
+
+WORD_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11,
+    "twelve": 12, "fifteen": 15, "twenty": 20, "thirty": 30, "forty": 40,
+    "forty five": 45, "fifty": 50, "sixty": 60, "ninety": 90,
+}
+UNITS = {
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+    "w": 604800, "week": 604800, "weeks": 604800,
+}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = [
+    "january", "february", "march", "april", "may", "june", "july",
+    "august", "september", "october", "november", "december",
+]
+
+
+def _alternatives(words) -> str:
+    # Longest first, so "forty five" wins over "forty"
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+_NUM = r"\d+(?:\.\d+)?"
+# One-letter units only count written straight after the number ("3m",
+# "1h30m"): "3 m of cable" is metres, not minutes
+_WORD_UNIT = _alternatives(u for u in UNITS if len(u) > 1)
+_LETTER_UNIT = "|".join(u for u in UNITS if len(u) == 1)
+_ARTICLES = ("a", "an")
+
+
+def _part(words: str) -> str:
+    return (
+        rf"(?:{_NUM}(?:\s*(?:{_WORD_UNIT})|{_LETTER_UNIT})"
+        rf"|(?:{words})\s+(?:{_WORD_UNIT}))"
+        r"(?![a-z])"
+    )
+
+
+# "a"/"an" read as one only after in/for/after ("in an hour"); on their
+# own they are articles: "take a day off", "a second look"
+_PART = _part(rf"half\s+an?|{_alternatives(WORD_NUMBERS)}")
+_BARE_PART = _part(_alternatives(w for w in WORD_NUMBERS if w not in _ARTICLES))
+_DURATION_PART = re.compile(
+    rf"({_NUM})(?:\s*({_WORD_UNIT})|({_LETTER_UNIT}))(?![a-z])"
+    rf"|(half\s+an?|{_alternatives(WORD_NUMBERS)})\s+({_WORD_UNIT})(?![a-z])"
+)
+_WEEKDAY = _alternatives(WEEKDAYS)
+# "sun", "sat", "wed"... are words too, so they only count as days after
+# "on"/"next"/"this" or right before a time ("sat at 9", "fri 7pm")
+_WEEKDAY_ABBR = _alternatives(d[:3] for d in WEEKDAYS)
+_TIME_AHEAD = r"(?=\s+(?:(?:at|by)\s+\d|\d{1,2}(?::\d{2}|\s*[ap]\.?m\b)|noon|midnight))"
+_MONTH = _alternatives(MONTHS + [m[:3] for m in MONTHS])
+_AMPM = r"[ap]\.?m\b\.?"
+
+SLOT_PATTERN = re.compile(
+    rf"""\b(?:
+        (?P<iso>\d{{4}}-\d{{2}}-\d{{2}})
+      | (?:in|for|after)\s+(?P<duration>{_PART}(?:\s*(?:,|and)?\s*{_PART})*)
+      | (?P<bare_duration>{_BARE_PART}(?:\s*(?:,|and)?\s*{_BARE_PART})*)
+      | (?:(?:at|by)\s+)?(?P<clock>\d{{1,2}}:\d{{2}})(?:\s*(?P<clock_ampm>{_AMPM}))?
+      | (?:(?:at|by)\s+)?(?P<hour>\d{{1,2}})\s*(?P<ampm>{_AMPM})
+      | (?:at|by)\s+(?P<bare>\d{{1,2}})\b(?![.:]\d)
+      | (?:(?:at|by)\s+)?(?P<named_time>noon|midnight)\b
+      | (?P<relday>day\s+after\s+tomorrow|today|tonight|tomorrow)\b
+      | (?:on\s+)?(?P<next>next\s+|this\s+)?(?P<weekday>{_WEEKDAY})\b
+      | (?:on\s+(?P<next2>next\s+|this\s+)?|(?P<next3>next\s+|this\s+))(?P<abbr>{_WEEKDAY_ABBR})\b
+      | (?P<abbr2>{_WEEKDAY_ABBR})\b{_TIME_AHEAD}
+      | (?:on\s+)?(?P<month>{_MONTH})\s+(?P<mday>\d{{1,2}})(?:st|nd|rd|th)?\b
+      | (?:on\s+)?(?:the\s+)?(?P<mday2>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<month2>{_MONTH})\b
+      | (?P<number>\d+(?:\.\d+)?)\b
+    )""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+@dataclass
+class Slot:
+    kind: str
+    value: object
+    start: int
+    end: int
+    text: str
+
+
+@dataclass
+class Slots:
+    text: str
+    now: datetime
+    slots: list[Slot] = field(default_factory=list)
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def first(self, kind: str) -> Slot | None:
+        return next((s for s in self.slots if s.kind == kind), None)
+
+    def all(self, kind: str) -> list[Slot]:
+        return [s for s in self.slots if s.kind == kind]
+
+    def when(self) -> datetime | None:
+        """The moment the text refers to, or ``None`` if it names none.
+
+        A duration counts from ``now``. A time without a date is the next
+        time the clock shows it; a date without a time is at
+        :data:`DEFAULT_TIME` (:data:`EVENING` for "tonight"), or
+        :data:`LATER_TODAY` from now if that is already past today. A bare
+        hour "tonight" is in the evening.
+        """
+        day, clock, duration = self.first("date"), self.first("time"), self.first("duration")
+        if day is None and clock is None:
+            return self.now + duration.value if duration else None
+        tonight = day is not None and day.text.lower().endswith("tonight")
+        if clock is not None:
+            at = clock.value
+            if tonight and 1 <= at.hour <= 11 and not re.search(_AMPM, clock.text, re.I):
+                # "at 8 tonight" is 20:00
+                at = at.replace(hour=at.hour + 12)
+        elif tonight:
+            at = EVENING
+        else:
+            at = DEFAULT_TIME
+        moment = datetime.combine(day.value if day else self.now.date(), at)
+        if moment <= self.now:
+            if day is None:
+                moment += timedelta(days=1)
+            elif clock is None and day.value == self.now.date():
+                moment = (self.now + LATER_TODAY).replace(second=0, microsecond=0)
+        return moment
+
+    def remainder(self, *kinds: str) -> str:
+        """The text without its slots (only those of ``kinds``, if given)."""
+        parts, last = [], 0
+        for slot in self.slots:
+            if kinds and slot.kind not in kinds:
+                continue
+            parts.append(self.text[last:slot.start])
+            last = slot.end
+        parts.append(self.text[last:])
+        return " ".join("".join(parts).split())
+
+
+def _duration(text: str) -> timedelta:
+    seconds = 0.0
+    for number, unit, letter, word, word_unit in _DURATION_PART.findall(text.lower()):
+        if number:
+            seconds += float(number) * UNITS[unit or letter]
+        else:
+            value = 0.5 if word.startswith("half") else WORD_NUMBERS[" ".join(word.split())]
+            seconds += value * UNITS[word_unit]
+    return timedelta(seconds=seconds)
+
+
+def _hour(hour: int, ampm: str | None) -> int | None:
+    if ampm:
+        if not 1 <= hour <= 12:
+            return None
+        hour %= 12
+        if ampm.lower().startswith("p"):
+            hour += 12
+    return hour if 0 <= hour <= 23 else None
+
+
+def _weekday(name: str, upcoming: bool, today: date) -> date:
+    index = next(i for i, d in enumerate(WEEKDAYS) if d.startswith(name.lower()[:3]))
+    ahead = (index - today.weekday()) % 7
+    if ahead == 0 or upcoming:
+        # "friday" on a Friday and "next friday" both mean a week on
+        ahead = ahead or 7
+    return today + timedelta(days=ahead)
+
+
+def _month_day(month: str, day: int, today: date) -> date | None:
+    number = next(i for i, m in enumerate(MONTHS, 1) if m.startswith(month.lower()[:3]))
+    try:
+        found = date(today.year, number, day)
+        # A date already past this year means next year's
+        return found if found >= today else date(today.year + 1, number, day)
+    except ValueError:
+        return None
+
+
+def _slot(match: re.Match[str], now: datetime) -> tuple[str, object] | None:
+    g = match.group
+    if g("iso"):
+        try:
+            return "date", date.fromisoformat(g("iso"))
+        except ValueError:
+            return None
+    if g("duration") or g("bare_duration"):
+        return "duration", _duration(g("duration") or g("bare_duration"))
+    if g("clock"):
+        hours, minutes = (int(p) for p in g("clock").split(":"))
+        hours = _hour(hours, g("clock_ampm"))
+        if hours is None or minutes > 59:
+            return None
+        return "time", time(hours, minutes)
+    if g("hour"):
+        hours = _hour(int(g("hour")), g("ampm"))
+        return None if hours is None else ("time", time(hours))
+    if g("bare"):
+        hours = _hour(int(g("bare")), None)
+        return None if hours is None else ("time", time(hours))
+    if g("named_time"):
+        return "time", time(12) if g("named_time").lower() == "noon" else time(0)
+    if g("relday"):
+        offset = {"today": 0, "tonight": 0, "tomorrow": 1}.get(g("relday").lower(), 2)
+        return "date", now.date() + timedelta(days=offset)
+    if g("weekday") or g("abbr") or g("abbr2"):
+        name = g("weekday") or g("abbr") or g("abbr2")
+        upcoming = bool(g("next") or g("next2") or g("next3"))
+        return "date", _weekday(name, upcoming, now.date())
+    if g("month") or g("month2"):
+        found = _month_day(g("month") or g("month2"), int(g("mday") or g("mday2")), now.date())
+        return None if found is None else ("date", found)
+    if g("number"):
+        text = g("number")
+        return "number", float(text) if "." in text else int(text)
+    return None
+
+
+def extract_slots(text: str, now: datetime | None = None) -> Slots:
+    """Find every duration, time, date and number in ``text`` in one scan."""
+    now = now or datetime.now()
+    found = Slots(text, now)
+    for match in SLOT_PATTERN.finditer(text):
+        slot = _slot(match, now)
+        if slot is not None:
+            found.slots.append(Slot(slot[0], slot[1], match.start(), match.end(), match.group()))
+    return found
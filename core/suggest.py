@@ -0,0 +1,166 @@
+"""Precomputed fuzzy index for correcting and suggesting commands."""
+
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+from rapidfuzz import fuzz
+
+# Bigrams keep transpositions in short triggers ("pnig") findable
+NGRAM = 2
+
+
+@dataclass
+class Suggestion:
+    text: str       # what the user probably meant to type
+    command: str    # trigger it routes to, used for usage weighting
+    source: str     # "trigger", "phrase" or "history"
+    score: float    # similarity in [0, 1]
+    rank: float     # score weighted by usage, used for ordering
+
+
+def ngrams(text: str, n: int = NGRAM) -> set[str]:
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class SuggestionIndex:
+    """Character n-gram index over triggers, learned phrases and history.
+
+    Lookups shortlist candidates sharing n-grams with the input and only
+    rescore that shortlist with rapidfuzz, so a miss costs one pass over a
+    few posting lists rather than a full scan of every trigger. Triggers are
+    compared against the same number of leading words of the input, so the
+    arguments after a mistyped trigger don't drag the score down, and also
+    against the whole input to catch triggers worded differently.
+    """
+
+    def __init__(self, shortlist: int = 32, history_size: int = 50):
+        self.shortlist = shortlist
+        self.history_size = history_size
+        # (text, command, source, words, ngram count)
+        self._entries: list[tuple[str, str, str, int, int]] = []
+        self._postings: dict[str, list[int]] = {}
+        self._seen: dict[tuple[str, str], int] = {}
+        self._history: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def build(
+        self,
+        triggers: Iterable[str],
+        phrases: Mapping[str, str] | None = None,
+        history: Iterable[tuple[str, str]] = (),
+    ) -> None:
+        """Index ``triggers``, learned ``phrases`` (phrase -> command) and
+        ``history`` (input -> trigger) from scratch."""
+        self._clear()
+        for trig in triggers:
+            self.add(trig, trig, "trigger")
+        for phrase, command in (phrases or {}).items():
+            self.add(phrase, (command.split() or [command])[0], "phrase")
+        for text, trig in history:
+            self.add_history(text, trig)
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._postings.clear()
+        self._seen.clear()
+        self._history.clear()
+
+    def add(self, text: str, command: str, source: str) -> None:
+        text = text.lower().strip()
+        if not text or (text, source) in self._seen:
+            return
+        grams = ngrams(text)
+        idx = len(self._entries)
+        self._entries.append((text, command, source, len(text.split()), len(grams)))
+        self._seen[(text, source)] = idx
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(idx)
+
+    def add_history(self, text: str, trigger: str) -> None:
+        """Remember an input that worked; only the newest few are kept."""
+        text = text.lower().strip()
+        if any((text, source) in self._seen for source in ("trigger", "phrase", "history")):
+            return
+        self.add(text, trigger, "history")
+        self._history.append(self._seen[(text, "history")])
+        if len(self._history) > self.history_size:
+            idx = self._history.pop(0)
+            entry = self._entries[idx]
+            self._seen.pop((entry[0], "history"), None)
+            # Tombstone; postings are dropped when the index is compacted
+            self._entries[idx] = ("",) + entry[1:]
+            if len(self._entries) > 2 * len(self._seen) + 64:
+                self._compact()
+
+    def history(self) -> list[tuple[str, str]]:
+        """Remembered ``(input, trigger)`` pairs, oldest first."""
+        return [self._entries[i][:2] for i in self._history]
+
+    def _compact(self) -> None:
+        live = [e for e in self._entries if e[0]]
+        history = self.history()
+        self._clear()
+        for text, command, source, *_ in live:
+            if source != "history":
+                self.add(text, command, source)
+        for text, trig in history:
+            self.add_history(text, trig)
+
+    def suggest(
+        self,
+        text: str,
+        k: int = 3,
+        usage: Mapping[str, int] | None = None,
+        cutoff: float = 0.5,
+    ) -> list[Suggestion]:
+        """Return up to ``k`` suggestions scoring at least ``cutoff``."""
+        text = text.lower().strip()
+        if not text:
+            return []
+        words = text.split()
+        query = ngrams(text)
+        overlap: Counter[int] = Counter()
+        for gram in query:
+            for idx in self._postings.get(gram, ()):
+                overlap[idx] += 1
+
+        # Shortlist by the share of each entry's n-grams found in the input
+        entries = self._entries
+        shortlist = heapq.nlargest(
+            self.shortlist, overlap, key=lambda i: overlap[i] / entries[i][4]
+        )
+
+        scored: dict[str, Suggestion] = {}
+        for idx in shortlist:
+            entry, command, source, nwords, _ = entries[idx]
+            if not entry:
+                continue
+            if source == "trigger":
+                # Either a typo in the leading words (keep the arguments) or
+                # the trigger buried in a longer phrase (replace it all)
+                score = fuzz.ratio(entry, " ".join(words[:nwords])) / 100
+                suggestion = " ".join([entry] + words[nwords:])
+                loose = fuzz.WRatio(entry, text) / 100
+                if loose > score:
+                    score, suggestion = loose, entry
+            else:
+                score = fuzz.ratio(entry, text) / 100
+                suggestion = entry
+            if score < cutoff:
+                continue
+            count = (usage or {}).get(command, 0)
+            rank = score * (1 + 0.05 * math.log1p(count))
+            best = scored.get(suggestion)
+            if best is None or rank > best.rank:
+                scored[suggestion] = Suggestion(suggestion, command, source, score, rank)
+        return sorted(scored.values(), key=lambda s: s.rank, reverse=True)[:k]
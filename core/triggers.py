@@ -0,0 +1,107 @@
+"""Prefix trie used by the dispatcher to route input to command triggers."""
+
+from __future__ import annotations
+
+from typing import Iterable, Tuple
+
+# Key under which a trie node stores the (trigger, value) ending at it. Every
+# other key in a node is a single character, so this can never collide.
+_END = ""
+
+
+class TriggerTrie:
+    """Character trie resolving the longest trigger that prefixes a string.
+
+    Lookup cost depends only on the length of the input, not on how many
+    triggers are registered.
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, object]] = ()):
+        self._root: dict = {}
+        self._size = 0
+        for trigger, value in items:
+            self.insert(trigger, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, trigger: str, value: object) -> None:
+        if not trigger:
+            return
+        node = self._root
+        for ch in trigger:
+            node = node.setdefault(ch, {})
+        if _END not in node:
+            self._size += 1
+        node[_END] = (trigger, value)
+
+    def longest_prefix(self, text: str) -> Tuple[str, object] | None:
+        """Return ``(trigger, value)`` for the longest trigger prefixing ``text``."""
+        node = self._root
+        found = None
+        for ch in text:
+            node = node.get(ch)
+            if node is None:
+                break
+            end = node.get(_END)
+            if end is not None:
+                found = end
+        return found
+
+
+class TriggerMap(dict):
+    """``dict`` of trigger -> command that keeps a compiled :class:`TriggerTrie`.
+
+    Plugins and tests are free to mutate the mapping directly; any change marks
+    the trie stale and it is recompiled on the next lookup.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._trie: TriggerTrie | None = None
+
+    def compile(self) -> TriggerTrie:
+        if self._trie is None:
+            self._trie = TriggerTrie(self.items())
+        return self._trie
+
+    def longest_prefix(self, text: str) -> Tuple[str, object] | None:
+        return self.compile().longest_prefix(text)
+
+    def _invalidate(self) -> None:
+        self._trie = None
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self._invalidate()
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._invalidate()
+
+    def clear(self) -> None:
+        super().clear()
+        self._invalidate()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._invalidate()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._invalidate()
+        return result
+
+    def setdefault(self, key, default=None):
+        result = super().setdefault(key, default)
+        self._invalidate()
+        return result
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        self._invalidate()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
@@ -0,0 +1,180 @@
+"""Command usage counters with write-behind persistence."""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from .logger import get_logger
+
+logger = get_logger()
+
+
+def journal_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".journal"
+
+
+def _read_snapshot(path: str) -> tuple[int, dict[str, int]]:
+    if not os.path.exists(path):
+        return 0, {}
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except Exception:
+        return 0, {}
+    if not isinstance(data, dict):
+        return 0, {}
+    if isinstance(data.get("counts"), dict):
+        return int(data.get("seq", 0)), {k: int(v) for k, v in data["counts"].items()}
+    # Plain {trigger: count} map written by older versions
+    try:
+        return 0, {k: int(v) for k, v in data.items()}
+    except (TypeError, ValueError):
+        return 0, {}
+
+
+def load_usage(path: str) -> tuple[int, dict[str, int], int]:
+    """Return ``(seq, counts, journal_lines)`` merged from snapshot and journal."""
+    seq, counts = _read_snapshot(path)
+    lines = 0
+    jpath = journal_path(path)
+    if os.path.exists(jpath):
+        with open(jpath, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append
+                    continue
+                lines += 1
+                if record.get("seq", 0) <= seq:
+                    continue
+                seq = record["seq"]
+                for key, value in record.get("counts", {}).items():
+                    counts[key] = counts.get(key, 0) + int(value)
+    return seq, counts, lines
+
+
+class UsageJournal:
+    """In-memory usage counters flushed to an append-only journal.
+
+    ``record`` only touches memory. Pending increments are appended to
+    ``<name>.journal`` once ``flush_threshold`` of them pile up or
+    ``flush_interval`` seconds pass, and the journal is folded back into the
+    JSON snapshot every ``compact_after`` appends. Each append carries a
+    sequence number and the snapshot remembers the last one it contains, so a
+    crash between writing the snapshot and truncating the journal can't
+    double count.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 5.0,
+        flush_threshold: int = 20,
+        compact_after: int = 100,
+    ):
+        self.path = os.fspath(path)
+        self.journal = journal_path(self.path)
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        self._pending: Counter[str] = Counter()
+        self._last_flush = time.monotonic()
+        self._seq, self.counts, self._journal_lines = load_usage(self.path)
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> int:
+        return sum(self._pending.values())
+
+    def record(self, trigger: str, count: int = 1) -> bool:
+        """Count a use of ``trigger``; returns True when a flush is due."""
+        with self._lock:
+            self.counts[trigger] = self.counts.get(trigger, 0) + count
+            self._pending[trigger] += count
+        return self.flush_due()
+
+    def record_many(self, triggers) -> bool:
+        with self._lock:
+            for trigger in triggers:
+                self.counts[trigger] = self.counts.get(trigger, 0) + 1
+                self._pending[trigger] += 1
+        return self.flush_due()
+
+    def flush_due(self) -> bool:
+        if not self._pending:
+            return False
+        return (
+            self.pending >= self.flush_threshold
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def flush(self) -> None:
+        """Append pending increments to the journal, compacting if needed."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            pending, self._pending = dict(self._pending), Counter()
+            self._seq += 1
+            line = json.dumps({"seq": self._seq, "counts": pending})
+            try:
+                os.makedirs(os.path.dirname(self.journal) or ".", exist_ok=True)
+                with open(self.journal, "a", encoding="utf-8") as fh:
+                    fh.write(line + "\n")
+                self._journal_lines += 1
+            except OSError as e:
+                logger.error("ERROR writing usage journal: %s", e)
+                self._pending.update(pending)
+                self._seq -= 1
+                return
+            if self._journal_lines >= self.compact_after:
+                self._compact()
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        # Caller holds the lock. Anything still pending isn't in the journal
+        # yet, so leave it out of the snapshot too.
+        counts = dict(self.counts)
+        for key, value in self._pending.items():
+            counts[key] -= value
+            if not counts[key]:
+                del counts[key]
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"seq": self._seq, "counts": counts}, fh)
+            os.replace(tmp, self.path)
+            open(self.journal, "w", encoding="utf-8").close()
+            self._journal_lines = 0
+        except OSError as e:
+            logger.error("ERROR compacting usage journal: %s", e)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+            self._pending.clear()
+            self._journal_lines = 0
+            self._seq = 0
+            for path in (self.path, self.journal):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def close(self) -> None:
+        """Flush everything that is still pending; safe to call repeatedly."""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("ERROR flushing usage journal")
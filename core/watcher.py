@@ -0,0 +1,214 @@
+"""Watch a plugin directory and report which modules changed."""
+
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from typing import Callable
+
+from .logger import get_logger
+
+logger = get_logger()
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct("iIII")
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1  # noqa: B018 - raises AttributeError if missing
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def parse_events(data: bytes) -> list[tuple[int, str]]:
+    """Split a raw inotify read into ``(mask, filename)`` pairs."""
+    events = []
+    offset = 0
+    while offset + _EVENT.size <= len(data):
+        _wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+        offset += _EVENT.size
+        name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+        offset += length
+        events.append((mask, name))
+    return events
+
+
+def module_names(filenames) -> set[str]:
+    return {
+        f[:-3]
+        for f in filenames
+        if f.endswith(".py") and not f.startswith(".") and f != "__init__.py"
+    }
+
+
+def snapshot(path: str) -> dict[str, float]:
+    """Map module name -> mtime for every ``.py`` file directly in ``path``."""
+    result = {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.endswith(".py") and entry.name != "__init__.py" and entry.is_file():
+                    result[entry.name[:-3]] = entry.stat().st_mtime
+    except OSError:
+        pass
+    return result
+
+
+class PluginWatcher:
+    """Report changed modules in ``path`` to ``on_change``.
+
+    Uses inotify on Linux, integrated into the running event loop, and falls
+    back to polling the directory every ``interval`` seconds elsewhere. Bursts
+    of events (editors often write a file several times) are coalesced for
+    ``debounce`` seconds.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_change: Callable[[set[str]], None],
+        interval: float = 1.0,
+        debounce: float = 0.1,
+    ):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self.backend: str | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._fd: int | None = None
+        self._poll_task: asyncio.Task | None = None
+        self._pending: set[str] = set()
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.backend is not None
+
+    def start(self, loop: asyncio.AbstractEventLoop | None = None) -> str:
+        """Start watching and return the backend in use."""
+        if self.backend:
+            return self.backend
+        self._loop = loop or asyncio.get_running_loop()
+        if self._start_inotify():
+            self.backend = "inotify"
+        else:
+            self._poll_task = self._loop.create_task(self._poll())
+            self.backend = "polling"
+        logger.info("Watching %s for plugin changes (%s)", self.path, self.backend)
+        return self.backend
+
+    def stop(self) -> None:
+        if self._fd is not None:
+            try:
+                self._loop.remove_reader(self._fd)
+            except Exception:
+                pass
+            os.close(self._fd)
+            self._fd = None
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending.clear()
+        self.backend = None
+
+    # -----------------------------------------------------
+    # inotify backend
+    # -----------------------------------------------------
+    def _start_inotify(self) -> bool:
+        libc = _load_libc()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return False
+        if libc.inotify_add_watch(fd, os.fsencode(self.path), WATCH_MASK) < 0:
+            os.close(fd)
+            return False
+        try:
+            self._loop.add_reader(fd, self._read_events)
+        except (NotImplementedError, RuntimeError):
+            # e.g. the Windows proactor loop can't watch file descriptors
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def _read_events(self) -> None:
+        names = []
+        overflow = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError:
+                break
+            if not data:
+                break
+            for mask, name in parse_events(data):
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                else:
+                    names.append(name)
+        changed = module_names(names)
+        if overflow:
+            # Events were dropped; fall back to reporting everything
+            changed |= set(snapshot(self.path))
+        self._queue(changed)
+
+    # -----------------------------------------------------
+    # Polling backend
+    # -----------------------------------------------------
+    async def _poll(self) -> None:
+        previous = await asyncio.to_thread(snapshot, self.path)
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await asyncio.to_thread(snapshot, self.path)
+            changed = {
+                name
+                for name in previous.keys() | current.keys()
+                if previous.get(name) != current.get(name)
+            }
+            previous = current
+            self._queue(changed)
+
+    # -----------------------------------------------------
+    # Debounce
+    # -----------------------------------------------------
+    def _queue(self, names: set[str]) -> None:
+        if not names:
+            return
+        self._pending |= names
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.debounce, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        names, self._pending = self._pending, set()
+        if not names:
+            return
+        try:
+            self.on_change(names)
+        except Exception:
+            logger.exception("Plugin reload failed")
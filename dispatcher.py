@@ -2,159 +2,721 @@ import importlib
 from core.logger import get_logger
 import os
 import pkgutil
-import sys
 from typing import List
 
 import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
 
-from core.nlp import normalize_input
-import json
+from core.nlp import (
+    NLPResult,
+    get_custom_intents,
+    load_classifier,
+    normalize_input,
+    normalize_many,
+    preprocess,
+    set_intent_engine,
+)
+from core.cache import ResultCache, cache_key
+from core.engine import INTERACTIVE, DispatchEngine
+from core.history import HistoryEntry, HistoryStore
+from core.manifest import (
+    LazyCommand,
+    PluginManifest,
+    command_attr,
+    command_has,
+    command_module,
+    import_plugin,
+)
+from core.perf import PerfStats
+from core.procpool import ProcessPool, shared_pool
+from core.session import (
+    HISTORY_SIZE,
+    PluginContext,
+    SessionManager,
+    current_session,
+    no_session,
+)
+from core.suggest import Suggestion, SuggestionIndex
+from core.triggers import TriggerMap
+from core.usage import UsageJournal
+from core.watcher import PluginWatcher, snapshot
 
 USAGE_FILE = os.path.join("memory", "usage.json")
+RESULT_CACHE_FILE = os.path.join("memory", "result_cache.json")
+HISTORY_FILE = os.path.join("memory", "history.db")
 
 logger = get_logger()
 
 
+@dataclass
+class DispatchResult:
+    """Outcome of one input from :meth:`Dispatcher.dispatch_many`."""
+
+    input: str
+    command: str
+    trigger: str | None
+    result: str
+    elapsed: float
+    normalize_time: float = 0.0
+
+
 class Dispatcher:
     def __init__(self, context: dict | None = None, package: str = "commands"):
         self.package = package
-        self.context = context or {}
+        # Shared by every plugin; session-scoped keys such as ``history``
+        # resolve to the calling client's session (see core.session)
+        self.context = PluginContext(context or {})
         self.context["dispatcher"] = self
-        self.context.setdefault("history", [])
+        self.context.setdefault("history", deque(maxlen=HISTORY_SIZE))
         settings = self.context.get("settings", {})
         self.timeout = float(settings.get("plugin_timeout", 5.0) or 5.0)
         self.commands: List[object] = []
-        self.trigger_map: dict[str, object] = {}
+        self.trigger_map: TriggerMap = TriggerMap()
         self.module_mtimes: dict[str, float] = {}
         self.package_path = importlib.import_module(self.package).__path__[0]
+        self.lazy = bool(settings.get("lazy_plugins", True))
+        self.manifest = PluginManifest(self.package_path)
+        self.watcher: PluginWatcher | None = None
 
         # Track command usage counts for analytics
         self.usage_file = self.context.get("usage_file", USAGE_FILE)
-        self.usage_counts = self._load_usage()
+        self.usage = UsageJournal(
+            self.usage_file,
+            flush_interval=float(settings.get("usage_flush_interval", 5.0)),
+        )
+        self.usage_counts = self.usage.counts
         self.context["usage_counts"] = self.usage_counts
 
+        # Results of plugins declaring ``cache_ttl``, keyed on trigger + args
+        cache_file = None
+        if settings.get("result_cache_persist"):
+            cache_file = self.context.get("result_cache_file", RESULT_CACHE_FILE)
+        self.result_cache = ResultCache(
+            max_entries=settings.get("result_cache_entries", 256),
+            max_bytes=settings.get("result_cache_max_bytes", 1_000_000),
+            path=cache_file,
+        )
+
+        # Every routed command, on disk; context["history"] only keeps the
+        # last few of the current session
+        self.history = HistoryStore(self.context.get("history_file", HISTORY_FILE))
+
+        # Per-client history and settings for clients of the lexd server
+        self.sessions = SessionManager(
+            idle_timeout=float(settings.get("session_idle_timeout", 1800))
+        )
+
+        # Latency histograms per trigger and per dispatch stage
+        self.perf = PerfStats()
+
+        # Bounded worker pool used by run_command, hotkeys and background tasks
+        self.engine = DispatchEngine(
+            self,
+            workers=settings.get("dispatch_workers", 4),
+            queue_size=settings.get("dispatch_queue_size", 32),
+            preempt=bool(settings.get("dispatch_preempt", True)),
+            interactive_queue_size=settings.get("dispatch_interactive_queue_size", 128),
+        )
+        self.concurrency_limits = TriggerMap(
+            (k.lower(), int(v))
+            for k, v in settings.get("command_concurrency", {}).items()
+        )
+        self._semaphores: dict[object, asyncio.Semaphore] = {}
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
+
+        # Worker processes for plugins declaring ``executor = "process"``,
+        # started on the first dispatch to such a plugin
+        self.process_workers = int(settings.get("process_workers", 2))
+        self.process_pool: ProcessPool | None = None
+
+        # Fuzzy index over triggers, learned phrases and recent inputs used
+        # to correct typos and suggest commands; rebuilt when plugins reload
+        self.suggestions = SuggestionIndex()
+
         self.load_modules()
+        # Regex and fuzzy routing work right away; the ML classifier joins
+        # in once its background thread has loaded or trained it
+        if set_intent_engine(settings.get("intent_engine", "classifier")) == "classifier":
+            load_classifier()
 
     def check_for_updates(self) -> bool:
-        """Reload modules if any command file changed or added."""
-        updated = False
-        for _, name, _ in pkgutil.iter_modules([self.package_path]):
-            module_name = f"{self.package}.{name}"
-            path = os.path.join(self.package_path, f"{name}.py")
-            try:
-                mtime = os.path.getmtime(path)
-            except OSError:
-                continue
-            if (
-                module_name not in self.module_mtimes
-                or mtime > self.module_mtimes[module_name]
-            ):
-                updated = True
-                break
-        if updated:
-            self.load_modules()
-            logger.info("Reloaded command modules")
-        return updated
+        """Reload only the command modules that were added, changed or removed."""
+        changed = set()
+        current = snapshot(self.package_path)
+        for name, mtime in current.items():
+            if self.module_mtimes.get(f"{self.package}.{name}") != mtime:
+                changed.add(name)
+        prefix = f"{self.package}."
+        for module_name in self.module_mtimes:
+            name = module_name[len(prefix):]
+            if name not in current:
+                changed.add(name)
+        if changed:
+            self.reload_modules(changed)
+        return bool(changed)
+
+    def start_watching(self, interval: float = 1.0) -> str:
+        """Start reloading plugins as their files change.
+
+        Must be called with a running event loop. Returns the watcher backend
+        (``inotify`` or ``polling``).
+        """
+        if self.watcher is None:
+            self.watcher = PluginWatcher(
+                self.package_path, self.reload_modules, interval=interval
+            )
+        return self.watcher.start()
+
+    def stop_watching(self) -> None:
+        if self.watcher:
+            self.watcher.stop()
 
     async def watch_modules(self, interval: float = 1.0) -> None:
         """Continuously watch for plugin changes."""
-        while True:
-            await asyncio.sleep(interval)
-            self.check_for_updates()
+        self.start_watching(interval)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.stop_watching()
 
-    def _load_usage(self) -> dict[str, int]:
-        """Load usage counts from disk."""
-        if os.path.exists(self.usage_file):
-            try:
-                with open(self.usage_file, "r", encoding="utf-8") as fh:
-                    data = json.load(fh)
-                if isinstance(data, dict):
-                    return {k: int(v) for k, v in data.items()}
-            except Exception:
-                pass
-        return {}
+    def close(self) -> None:
+        """Stop background work and flush pending usage statistics."""
+        self.stop_watching()
+        self.engine.stop()
+        self.usage.close()
+        self.history.close()
+        self.result_cache.save()
 
-    def _save_usage(self) -> None:
-        os.makedirs(os.path.dirname(self.usage_file), exist_ok=True)
-        with open(self.usage_file, "w", encoding="utf-8") as fh:
-            json.dump(self.usage_counts, fh)
+    def _limiter(self, trig: str, cmd: object, args: str) -> asyncio.Semaphore | None:
+        """Return the semaphore capping concurrent runs of this command, if any.
 
-    async def _safe_execute(self, cmd: object, args: str) -> str:
-        """Execute a command with sandboxing and exception handling."""
+        ``command_concurrency`` in settings maps a command prefix such as
+        ``"search index"`` to a limit; otherwise a plugin may declare
+        ``max_concurrency`` on its ``Command`` class.
+        """
+        match = self.concurrency_limits.longest_prefix(f"{trig} {args}".lower())
+        if match:
+            key, limit = match
+        else:
+            key, limit = cmd, command_attr(cmd, "max_concurrency")
+        if not limit:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            # asyncio primitives are bound to the loop they were first used on
+            self._semaphores.clear()
+            self._semaphore_loop = loop
+        sem = self._semaphores.get(key)
+        if sem is None:
+            sem = self._semaphores[key] = asyncio.Semaphore(int(limit))
+        return sem
+
+    def _run(self, cmd: object, args: str):
+        """Return an awaitable running the command, honouring its timeout."""
+        timeout = float(command_attr(cmd, "timeout") or self.timeout)
+        if command_attr(cmd, "executor") == "process":
+            if self.process_pool is None:
+                self.process_pool = shared_pool(self.process_workers)
+            module_name = command_module(cmd)
+            return self.process_pool.run(
+                module_name,
+                args,
+                self.context.get("settings", {}),
+                timeout,
+                mtime=self.module_mtimes.get(module_name),
+                root=os.path.dirname(self.package_path),
+            )
+        return asyncio.wait_for(cmd.run(args), timeout=timeout)
+
+    def _stream(self, cmd: object, args: str):
+        """Return an async iterator over the chunks of ``cmd.stream(args)``.
+
+        The timeout budget only covers time spent waiting on the plugin, so a
+        slow consumer (e.g. TTS speaking each chunk) doesn't time it out.
+        """
+        timeout = float(command_attr(cmd, "timeout") or self.timeout)
+        if command_attr(cmd, "executor") == "process":
+            if self.process_pool is None:
+                self.process_pool = shared_pool(self.process_workers)
+            module_name = command_module(cmd)
+            return self.process_pool.stream(
+                module_name,
+                args,
+                self.context.get("settings", {}),
+                timeout,
+                mtime=self.module_mtimes.get(module_name),
+                root=os.path.dirname(self.package_path),
+            )
+        return self._budgeted(cmd.stream(args), timeout)
+
+    @staticmethod
+    async def _budgeted(chunks, timeout: float):
+        loop = asyncio.get_running_loop()
+        remaining = timeout
+        try:
+            while True:
+                started = loop.time()
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                except StopAsyncIteration:
+                    return
+                remaining -= loop.time() - started
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    def _cache_key(self, cmd: object, trig: str, args: str) -> tuple[str, ...]:
+        """Result cache key, varied by the settings named in ``cache_settings``."""
+        names = command_attr(cmd, "cache_settings", ()) or ()
+        settings = self.context.get("settings", {})
+        return cache_key(trig, args, *(str(settings.get(n)) for n in names))
+
+    def _cache_result(self, cmd: object, key, ttl: float, result) -> None:
+        if ttl > 0 and isinstance(result, str):
+            cacheable = getattr(cmd, "cacheable", None)
+            if not callable(cacheable) or cacheable(result):
+                self.result_cache.put(key, result, ttl)
+
+    async def _safe_execute(self, cmd: object, args: str, trig: str = "") -> str:
+        """Execute a command with sandboxing and exception handling.
+
+        Results of commands declaring ``cache_ttl`` (seconds) are served from
+        the result cache while fresh. A command may also define
+        ``cacheable(result)`` to keep failures such as network errors out,
+        and list in ``cache_settings`` the settings its answer depends on.
+        """
+        ttl = float(command_attr(cmd, "cache_ttl") or 0)
+        key = self._cache_key(cmd, trig, args)
+        if ttl > 0:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return cached
+        started = time.perf_counter()
+        outcome = "ok"
         try:
-            return await asyncio.wait_for(cmd.run(args), timeout=self.timeout)
+            sem = self._limiter(trig, cmd, args)
+            if sem is None:
+                result = await self._run(cmd, args)
+            else:
+                async with sem:
+                    result = await self._run(cmd, args)
+            self._cache_result(cmd, key, ttl, result)
+            return result
+        except asyncio.CancelledError:
+            # Preempted or stopped by the user; let the plugin unwind
+            outcome = "cancelled"
+            raise
         except asyncio.TimeoutError:
+            outcome = "timeout"
             logger.warning("%s timed out", cmd.__class__.__name__)
             return "[Lex] Command timed out."
         except Exception:
+            outcome = "error"
             logger.exception("Error in %s", cmd.__class__.__name__)
             return "[Lex] Something went wrong."
+        finally:
+            # Time spent waiting on a concurrency limit counts: it's latency
+            # the user sees
+            self.perf.record(trig, time.perf_counter() - started, outcome)
+
+    async def _safe_stream(self, cmd: object, args: str, trig: str = ""):
+        """Yield a command's output as it is produced.
+
+        Plugins defining an async generator ``stream(args)`` have each chunk
+        forwarded as soon as it is yielded; everything else yields its
+        ``run()`` result as a single chunk. Caching, concurrency limits,
+        timeouts and error handling match :meth:`_safe_execute`.
+        """
+        if not command_has(cmd, "stream"):
+            yield await self._safe_execute(cmd, args, trig)
+            return
+        ttl = float(command_attr(cmd, "cache_ttl") or 0)
+        key = self._cache_key(cmd, trig, args)
+        if ttl > 0:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        started = time.perf_counter()
+        outcome = "ok"
+        chunks: list[str] = []
+        sem = self._limiter(trig, cmd, args)
+        acquired = False
+        try:
+            if sem is not None:
+                await sem.acquire()
+                acquired = True
+            try:
+                async for chunk in self._stream(cmd, args):
+                    if not chunks:
+                        self.perf.record_stage(
+                            "stream.first_chunk", time.perf_counter() - started
+                        )
+                    chunks.append(chunk)
+                    yield chunk
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                logger.warning("%s timed out", cmd.__class__.__name__)
+                yield "[Lex] Command timed out."
+                return
+            except Exception:
+                outcome = "error"
+                logger.exception("Error in %s", cmd.__class__.__name__)
+                yield "[Lex] Something went wrong."
+                return
+            self._cache_result(cmd, key, ttl, "\n".join(chunks))
+        finally:
+            if acquired:
+                sem.release()
+            self.perf.record(trig, time.perf_counter() - started, outcome)
+
+    def _load_module(self, name: str) -> object | None:
+        """Return the command for module ``name``, importing it only if needed."""
+        module_name = f"{self.package}.{name}"
+        entry = self.manifest.entry(name)
+        if entry is None:
+            return None
+        self.module_mtimes[module_name] = entry["mtime"]
+        if not entry["command"]:
+            logger.warning("%s missing Command class", module_name)
+            return None
+        if self.lazy and entry["static"]:
+            return LazyCommand(module_name, entry, self.context)
+
+        module = import_plugin(module_name, entry["mtime"])
+        if not hasattr(module, "Command"):
+            logger.warning("%s missing Command class", module_name)
+            return None
+        with no_session():
+            instance = module.Command(self.context)
+        logger.info("Loaded: %s", module_name)
+        return instance
 
     def load_modules(self) -> None:
+        """Register every plugin in the package.
+
+        With ``lazy_plugins`` enabled (the default) triggers come from the
+        cached manifest and modules are imported on first dispatch.
+        """
+        for cmd in self.commands:
+            self._close_command(cmd)
         self.commands.clear()
-        self.trigger_map.clear()
-        package = self.package
+        triggers = TriggerMap()
+        names = set()
         for _, name, _ in pkgutil.iter_modules([self.package_path]):
-            module_name = f"{package}.{name}"
+            names.add(name)
             try:
-                if module_name in sys.modules:
-                    module = importlib.reload(sys.modules[module_name])
-                else:
-                    module = importlib.import_module(module_name)
-                self.module_mtimes[module_name] = os.path.getmtime(
-                    os.path.join(self.package_path, f"{name}.py")
-                )
-                if hasattr(module, "Command"):
-                    instance = module.Command(self.context)
-                    self.commands.append(instance)
-                    self.context.setdefault("commands", {})[name] = instance
-                    # Map triggers to command instance for quick lookup
-                    for trig in getattr(instance, "trigger", []):
-                        self.trigger_map[trig.lower()] = instance
-                    logger.info("Loaded: %s", module_name)
-                else:
-                    logger.warning("%s missing Command class", module_name)
+                instance = self._load_module(name)
             except Exception as e:
+                logger.error("ERROR loading %s.%s: %s", self.package, name, e)
+                continue
+            if instance is None:
+                continue
+            self.commands.append(instance)
+            self.context.setdefault("commands", {})[name] = instance
+            # Map triggers to command instance for quick lookup
+            for trig in getattr(instance, "trigger", []):
+                triggers[trig.lower()] = instance
+        self.manifest.prune(names)
+        self.manifest.save()
+        # Compile the routing trie up front so the first dispatch doesn't pay
+        # for it, then swap the whole map in at once
+        triggers.compile()
+        self.trigger_map = triggers
+        self.rebuild_suggestions()
+
+    def reload_modules(self, names) -> None:
+        """Reload the given plugin modules, leaving every other command alone.
+
+        Only the triggers belonging to those modules change, and the new map
+        is swapped in with a single assignment so a concurrent dispatch sees
+        either the old or the new routing, never a mix.
+        """
+        commands = self.context.setdefault("commands", {})
+        triggers = TriggerMap(self.trigger_map)
+        for name in sorted(names):
+            module_name = f"{self.package}.{name}"
+            old = commands.get(name)
+            try:
+                new = self._load_module(name)
+            except Exception as e:
+                # Keep serving the previous version until the file is fixed
                 logger.error("ERROR loading %s: %s", module_name, e)
+                continue
+            if new is None and not os.path.exists(
+                os.path.join(self.package_path, f"{name}.py")
+            ):
+                self.module_mtimes.pop(module_name, None)
+            if old is not None:
+                for trig in [t for t, c in triggers.items() if c is old]:
+                    del triggers[trig]
+                self._close_command(old)
+                commands.pop(name, None)
+            if new is not None:
+                for trig in getattr(new, "trigger", []):
+                    triggers[trig.lower()] = new
+                commands[name] = new
+            if old in self.commands:
+                idx = self.commands.index(old)
+                if new is None:
+                    del self.commands[idx]
+                else:
+                    self.commands[idx] = new
+            elif new is not None:
+                self.commands.append(new)
+            logger.info("Reloaded: %s", module_name)
+        self.manifest.save()
+        triggers.compile()
+        self.trigger_map = triggers
+        self.rebuild_suggestions()
+        # Cached answers may come from (or list) the old plugin code
+        self.result_cache.clear()
 
-    async def dispatch(self, input_text: str):
-        """Route the given text to the appropriate command."""
-        # normalize_input uses difflib.get_close_matches under the hood for
-        # fuzzy trigger substitution when the user mistypes a command
+    def rebuild_suggestions(self) -> None:
+        """Re-index triggers and learned phrases, keeping recent inputs."""
+        self.suggestions.build(
+            self.trigger_map.keys(),
+            get_custom_intents(),
+            self.suggestions.history(),
+        )
+
+    def _close_command(self, cmd: object) -> None:
+        """Let a command being replaced release background tasks and hooks."""
+        if isinstance(cmd, LazyCommand) and not cmd.is_loaded:
+            return
+        close = getattr(cmd, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                logger.exception("Error closing %s", cmd.__class__.__name__)
+
+    def _cutoff(self) -> float:
         settings = self.context.get("settings", {})
         cutoff = float(settings.get("fuzzy_threshold", 0.75) or 0)
         if cutoff <= 0 or cutoff > 1:
             cutoff = 1.0
-        text = normalize_input(input_text, self.trigger_map.keys(), cutoff=cutoff)
-        lowered = text.lower()
-
-        for trig, cmd in self.trigger_map.items():
-            if lowered.startswith(trig):
-                args = text[len(trig):].strip()
-                result = await self._safe_execute(cmd, args)
-                self.context["last_command"] = trig
-                self.context["last_result"] = result
-                history = self.context.get("history")
-                if isinstance(history, list):
-                    history.append((input_text, result))
-                    if len(history) > 20:
-                        del history[:-20]
-                self.usage_counts[trig] = self.usage_counts.get(trig, 0) + 1
-                await asyncio.to_thread(self._save_usage)
-                return result
-
-        from difflib import get_close_matches
-        parts = lowered.split()
-        if parts:
-            suggestions = get_close_matches(
-                parts[0], self.trigger_map.keys(), n=1, cutoff=0.5
-            )
-            if suggestions:
-                return f"[Lex] Unknown command. Did you mean: {suggestions[0]}?"
+        return cutoff
+
+    def _correct(
+        self, result: NLPResult, timings: dict[str, float] | None = None
+    ) -> tuple[str, list[Suggestion] | None]:
+        """Fix a mistyped command using the suggestion index.
+
+        Returns the command text to route plus the suggestions looked up on
+        the way (``None`` when no lookup was needed), so an unknown command
+        doesn't need a second fuzzy pass.
+        """
+        text = result.command
+        if result.origin != "raw" or self.trigger_map.longest_prefix(text):
+            return text, None
+        t0 = time.perf_counter()
+        suggestions = self.suggestions.suggest(text, k=3, usage=self.usage_counts)
+        if timings is not None:
+            timings["suggest"] = time.perf_counter() - t0
+        if suggestions and suggestions[0].score >= self._cutoff():
+            # The corrected text may now match a phrase pattern, e.g.
+            # "remmind me to x" -> "remind me to x" -> "remind x"
+            return normalize_input(suggestions[0].text).command, suggestions
+        return text, suggestions
+
+    def _route(self, text: str) -> tuple[str, object, str] | None:
+        """Resolve normalized ``text`` to ``(trigger, command, args)``."""
+        # Longest matching trigger wins, e.g. "pingback" over "ping"
+        match = self.trigger_map.longest_prefix(text.lower())
+        if not match:
+            return None
+        trig, cmd = match
+        return trig, cmd, text[len(trig):].strip()
+
+    def _remember(
+        self,
+        input_text: str,
+        trig: str,
+        result: str,
+        command: str = "",
+        elapsed: float = 0.0,
+    ) -> bool:
+        """Record a routed command; returns True when the history store
+        should be flushed.
+
+        Plugins declaring ``history = False`` (the vault) are never
+        recorded: their arguments and results may be secrets.
+        """
+        self.context["last_command"] = trig
+        if command_attr(self.trigger_map.get(trig), "history", True) is False:
+            return False
+        self.suggestions.add_history(preprocess(input_text), trig)
+        self.context["last_result"] = result
+        history = self.context.get("history")
+        if history is not None:
+            history.append((input_text, result))
+            if isinstance(history, list) and len(history) > HISTORY_SIZE:
+                del history[:-HISTORY_SIZE]
+        session = current_session()
+        return self.history.record(HistoryEntry(
+            time.time(),
+            session.id if session else None,
+            input_text,
+            command or input_text,
+            trig,
+            elapsed * 1000,
+            result,
+        ))
+
+    def _unknown(self, text: str, suggestions: list[Suggestion] | None = None) -> str:
+        if suggestions is None:
+            suggestions = self.suggestions.suggest(text, k=3, usage=self.usage_counts)
+        if suggestions:
+            options = " or ".join(s.text for s in suggestions)
+            return f"[Lex] Unknown command. Did you mean: {options}?"
 
         return "[Lex] I don't know what you want, and I'm too tired to guess."
 
-    async def run_command(self, command: str) -> str:
-        """Public helper to execute a command string."""
-        self.check_for_updates()
-        return await self.dispatch(command)
+    def _resolve(self, input_text: str):
+        """Normalize and route ``input_text``, recording NLP stage timings.
+
+        Returns ``(text, suggestions, route)``; ``route`` is ``None`` for an
+        unknown command.
+        """
+        started = time.perf_counter()
+        timings: dict[str, float] = {}
+        text, suggestions = self._correct(
+            normalize_input(input_text, timings=timings), timings
+        )
+        for stage, seconds in timings.items():
+            self.perf.record_stage(f"nlp.{stage}", seconds)
+        self.perf.record_stage("nlp", time.perf_counter() - started)
+        return text, suggestions, self._route(text)
+
+    async def _finish(
+        self, input_text: str, text: str, trig: str, result: str, started: float
+    ) -> None:
+        elapsed = time.perf_counter() - started
+        if self._remember(input_text, trig, result, text, elapsed):
+            await asyncio.to_thread(self.history.flush)
+        if self.usage.record(trig):
+            await asyncio.to_thread(self.usage.flush)
+        self.perf.record_stage("dispatch", time.perf_counter() - started)
+
+    async def dispatch(self, input_text: str):
+        """Route the given text to the appropriate command."""
+        started = time.perf_counter()
+        text, suggestions, route = self._resolve(input_text)
+        if route is None:
+            self.perf.record_stage("dispatch", time.perf_counter() - started)
+            return self._unknown(text, suggestions)
+        trig, cmd, args = route
+        result = await self._safe_execute(cmd, args, trig)
+        await self._finish(input_text, text, trig, result, started)
+        return result
+
+    async def dispatch_stream(self, input_text: str):
+        """Like :meth:`dispatch`, but yield output chunks as they are produced.
+
+        Streaming plugins forward each chunk immediately; others yield their
+        whole result once. History records the chunks joined by newlines.
+        """
+        started = time.perf_counter()
+        text, suggestions, route = self._resolve(input_text)
+        if route is None:
+            self.perf.record_stage("dispatch", time.perf_counter() - started)
+            yield self._unknown(text, suggestions)
+            return
+        trig, cmd, args = route
+        chunks: list[str] = []
+        async for chunk in self._safe_stream(cmd, args, trig):
+            chunks.append(chunk)
+            yield chunk
+        await self._finish(input_text, text, trig, "\n".join(chunks), started)
+
+    async def dispatch_many(
+        self, inputs: list[str], ordered: bool = False
+    ) -> list[DispatchResult]:
+        """Dispatch a batch of inputs and return one result per input.
+
+        Without ``ordered`` the inputs are normalized in a single classifier
+        pass and run concurrently, still subject to per-command concurrency
+        limits. With ``ordered`` the commands run one after another (as a
+        workflow expects) and each input is normalized just before it runs,
+        so a step sees what earlier steps taught or changed. Usage is
+        recorded once for the whole batch and results are always returned
+        in input order.
+        """
+
+        async def run_one(
+            input_text: str,
+            text: str,
+            suggestions: list[Suggestion] | None,
+            route,
+        ) -> DispatchResult:
+            t0 = time.perf_counter()
+            if route is None:
+                result = self._unknown(text, suggestions)
+                return DispatchResult(
+                    input_text, text, None, result, time.perf_counter() - t0
+                )
+            trig, cmd, args = route
+            result = await self._safe_execute(cmd, args, trig)
+            elapsed = time.perf_counter() - t0
+            self._remember(input_text, trig, result, text, elapsed)
+            return DispatchResult(input_text, text, trig, result, elapsed)
+
+        if ordered:
+            results = []
+            normalize_time = 0.0
+            for raw in inputs:
+                started = time.perf_counter()
+                text, suggestions, route = self._resolve(raw)
+                normalize_time += time.perf_counter() - started
+                results.append(await run_one(raw, text, suggestions, route))
+        else:
+            started = time.perf_counter()
+            normalized = [self._correct(r) for r in normalize_many(list(inputs))]
+            normalize_time = time.perf_counter() - started
+            self.perf.record_stage("nlp.batch", normalize_time)
+            results = list(
+                await asyncio.gather(
+                    *(
+                        run_one(raw, text, suggestions, self._route(text))
+                        for raw, (text, suggestions) in zip(inputs, normalized)
+                    )
+                )
+            )
+
+        share = normalize_time / len(results) if results else 0.0
+        for item in results:
+            item.normalize_time = share
+        if self.usage.record_many(r.trigger for r in results if r.trigger):
+            await asyncio.to_thread(self.usage.flush)
+        if results:
+            await asyncio.to_thread(self.history.flush)
+        return results
+
+    async def run_command(self, command: str, priority: int = INTERACTIVE) -> str:
+        """Public helper to execute a command string through the engine.
+
+        Starts the plugin watcher on first use so front ends get hot reload
+        without a directory scan per command. ``priority`` is one of the
+        ``core.engine`` levels; cancelling the caller cancels the command.
+        """
+        if self.watcher is None or not self.watcher.running:
+            self.start_watching()
+        return await self.engine.submit(command, priority)
+
+    async def stream_command(self, command: str, priority: int = INTERACTIVE):
+        """Streaming counterpart of :meth:`run_command` for front ends."""
+        if self.watcher is None or not self.watcher.running:
+            self.start_watching()
+        async for chunk in self.engine.stream(command, priority):
+            yield chunk
+
+    def cancel(self) -> int:
+        """Stop the caller's commands in flight, e.g. when the user says "stop".
+
+        Only jobs from the current session (or, outside one, from no
+        session) are cancelled; other clients' commands keep running.
+        """
+        return self.engine.cancel(INTERACTIVE, current_session())
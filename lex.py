@@ -0,0 +1,47 @@
+"""Run one command on the running Lex daemon and print the reply.
+
+    python lex.py weather oslo
+
+Talks to ``lexd`` over its socket, so it doesn't load plugins, the NLP model
+or the vault itself. Start the daemon first with ``python lexd.py``.
+"""
+
+import argparse
+import sys
+
+from core import client
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Send a command to lexd")
+    parser.add_argument("command", nargs="+", help="what to ask Lex")
+    parser.add_argument("--socket", help="daemon socket (default: from settings)")
+    parser.add_argument(
+        "--session",
+        default="cli",
+        help="daemon session whose history to use (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    path = args.socket or client.configured_socket_path()
+    try:
+        for message in client.stream(" ".join(args.command), path, session=args.session):
+            if message.get("chunk"):
+                print(message["chunk"], flush=True)
+            if message.get("error"):
+                print(message["error"], file=sys.stderr)
+                return 1
+    except (FileNotFoundError, ConnectionRefusedError):
+        print("[Lex] lexd isn't running. Start it with: python lexd.py", file=sys.stderr)
+        return 2
+    except client.RemoteError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        # Closing the socket cancels the command in the daemon
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ import argparse
 import logging
 from core.settings import load_settings
 from core.security import require_vault_key
+from core.server import LexServer
 from dispatcher import Dispatcher
 from voice.recognizer import transcribe
 from voice.tts import TTS
@@ -13,14 +14,41 @@ from core.logger import get_logger, set_log_level
 
 logger = get_logger()
 
+STOP_WORDS = {"stop", "cancel", "never mind", "nevermind", "shut up"}
+
+
+async def _log_chunks(chunks):
+    async for chunk in chunks:
+        if chunk:
+            logger.info("Response: %s", chunk)
+        yield chunk
+
+
+async def _respond(dispatcher: Dispatcher, speaker: TTS | None, cmd: str) -> None:
+    chunks = _log_chunks(dispatcher.stream_command(cmd))
+    if speaker:
+        # Start talking as soon as the first chunk is ready
+        await speaker.speak_stream(chunks)
+    else:
+        async for _ in chunks:
+            pass
+
+
+async def _respond_after(
+    previous: asyncio.Task | None, dispatcher: Dispatcher, speaker: TTS | None, cmd: str
+) -> None:
+    """Answer ``cmd`` once the command before it has finished (or failed)."""
+    if previous is not None:
+        await asyncio.wait({previous})
+    await _respond(dispatcher, speaker, cmd)
 
-async def main() -> None:
-    settings = load_settings()
-    key = require_vault_key()
-    dispatcher = Dispatcher({"settings": settings, "vault_key": key})
-    speaker = TTS(settings) if settings.get("voice_output") else None
 
-    logger.info("Starting daemon loop...")
+async def _input_loop(dispatcher: Dispatcher, settings: dict, speaker: TTS | None) -> None:
+    # Everything typed or said here is INTERACTIVE, so nothing outranks the
+    # command in progress: later input waits its turn, and only a stop word
+    # interrupts. The engine still preempts hotkey and background work for it.
+    pending: set[asyncio.Task] = set()
+    last: asyncio.Task | None = None
     while True:
         if settings.get("voice_input"):
             try:
@@ -34,19 +62,65 @@ async def main() -> None:
                 cmd = (await asyncio.to_thread(input, "> ")).strip()
         else:
             cmd = (await asyncio.to_thread(input, "> ")).strip()
-        if cmd:
-            logger.info("Command received: %s", cmd)
-            response = await dispatcher.dispatch(cmd)
-            if response:
-                logger.info("Response: %s", response)
-                if speaker:
-                    await speaker.speak(response)
+        if not cmd:
+            continue
+        if cmd.lower().strip(" .!") in STOP_WORDS:
+            # Drop the queued commands too; cancellation reaches the plugin
+            # and TTS playback
+            for task in pending:
+                task.cancel()
+            dispatcher.cancel()
+            logger.info("Stopped.")
+            continue
+        logger.info("Command received: %s", cmd)
+        previous = last if last is not None and not last.done() else None
+        last = asyncio.create_task(_respond_after(previous, dispatcher, speaker, cmd))
+        pending.add(last)
+        last.add_done_callback(pending.discard)
+
+
+async def main(headless: bool = False, serve: bool = True) -> None:
+    settings = load_settings()
+    key = require_vault_key()
+    dispatcher = Dispatcher({"settings": settings, "vault_key": key})
+    speaker = TTS(settings) if settings.get("voice_output") else None
+
+    # Let the UIs and the ``lex`` CLI reuse this warm dispatcher
+    server = LexServer(dispatcher) if serve and settings.get("daemon_server", True) else None
+    if server:
+        try:
+            await server.start()
+        except (OSError, RuntimeError) as e:
+            logger.warning("Not serving clients: %s", e)
+            server = None
+    try:
+        if headless:
+            if server is None:
+                logger.error("Nothing to do: headless mode needs the socket server.")
+                return
+            logger.info("Serving clients only...")
+            await server.serve_forever()
+        else:
+            logger.info("Starting daemon loop...")
+            await _input_loop(dispatcher, settings, speaker)
+    finally:
+        if server:
+            await server.close()
+        dispatcher.close()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Lex daemon")
     parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
     parser.add_argument("--quiet", action="store_true", help="Only show warnings")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Only serve UIs and the lex CLI; don't read voice or keyboard input",
+    )
+    parser.add_argument(
+        "--no-server", action="store_true", help="Don't listen for local clients"
+    )
     args = parser.parse_args()
 
     if args.verbose:
@@ -55,6 +129,6 @@ if __name__ == "__main__":
         set_log_level(logging.WARNING)
 
     try:
-        asyncio.run(main())
+        asyncio.run(main(headless=args.headless, serve=not args.no_server))
     except KeyboardInterrupt:
         logger.info("Shutting down.")
@@ -1,18 +1,23 @@
+from __future__ import annotations
+
 import argparse
 import asyncio
 import atexit
 import logging
 import sys
 import threading
+from typing import TYPE_CHECKING
 
 from PySide6.QtCore import Qt, Signal, Slot
 from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QTextEdit, QLineEdit
 
+from core.remote import open_dispatcher
 from core.settings import load_settings
-from core.security import require_vault_key
-from dispatcher import Dispatcher
 from core.logger import set_log_level
 
+if TYPE_CHECKING:
+    from dispatcher import Dispatcher
+
 
 # Create a persistent asyncio event loop running in a background thread.
 event_loop = asyncio.new_event_loop()
@@ -63,23 +68,25 @@ class LexWindow(QWidget):
             return
         self.log.append(f"> {text}")
         self.input.clear()
-        threading.Thread(target=self._execute, args=(text,), daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._stream(text), event_loop)
 
-    def _execute(self, text: str) -> None:
-        future = asyncio.run_coroutine_threadsafe(
-            self.dispatcher.run_command(text), event_loop
-        )
+    async def _stream(self, text: str) -> None:
+        # Runs on the event loop thread; the signal hands each chunk to the GUI
         try:
-            result = future.result()
+            async for chunk in self.dispatcher.stream_command(text):
+                if chunk:
+                    self.result_ready.emit(chunk.strip())
         except Exception as e:
-            result = f"[ERROR] {e}"
-        self.result_ready.emit(result.strip())
+            self.result_ready.emit(f"[ERROR] {e}")
 
 
 def main() -> None:
     settings = load_settings()
-    key = require_vault_key()
-    dispatcher = Dispatcher({"settings": settings, "vault_key": key})
+    # Share a running lexd's dispatcher when there is one; either way it
+    # belongs to the background loop that runs the commands
+    dispatcher = asyncio.run_coroutine_threadsafe(
+        open_dispatcher(settings), event_loop
+    ).result()
 
     app = QApplication(sys.argv)
     window = LexWindow(dispatcher)
@@ -0,0 +1,408 @@
+"""Offline micro-benchmarks for the dispatcher and NLP pipeline.
+
+Measures cold startup, plugin loading, routing throughput over synthetic
+trigger sets, the fuzzy-fallback path and NLP classification latency. Nothing
+here touches the microphone or the network. Results are written as JSON so
+runs can be compared between releases::
+
+    python scripts/benchmark.py --output bench.json
+    python scripts/benchmark.py --compare bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_SIZES = [40, 250, 1000, 5000]
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "xi", "ze", "po", "an", "el"]
+NLP_PHRASES = [
+    "remind me to drink water",
+    "what's the weather in tokyo",
+    "generate a password",
+    "flip a coin",
+    "define serendipity",
+    "search for invoices",
+    "show my notes",
+    "are you alive",
+]
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def summarize(name: str, samples: list[float], **params) -> dict:
+    """Turn per-operation timings (seconds) into a result record."""
+    ordered = sorted(samples)
+    mean = statistics.fmean(ordered)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        "name": name,
+        "params": params,
+        "n": len(ordered),
+        "mean_ms": mean * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": p95 * 1000,
+        "ops_per_s": 1 / mean if mean else 0.0,
+    }
+
+
+def synthetic_triggers(count: int, seed: int = 0) -> list[str]:
+    """Deterministic, unique pseudo-words (some multi-word) to route on."""
+    rng = random.Random(seed)
+    triggers: set[str] = set()
+    while len(triggers) < count:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if rng.random() < 0.2:
+            word += " " + "".join(rng.choice(SYLLABLES) for _ in range(2))
+        triggers.add(word)
+    return sorted(triggers)
+
+
+def typo(word: str, rng: random.Random) -> str:
+    """Swap two adjacent letters so no trigger prefixes the result."""
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+class Echo:
+    """Stand-in plugin so routing cost isn't hidden behind real commands."""
+
+    def __init__(self, trigger: str):
+        self.trigger = [trigger]
+
+    async def run(self, args: str) -> str:
+        return args
+
+
+def make_dispatcher(workdir: str, lazy: bool = True):
+    from core.settings import DEFAULTS
+    from dispatcher import Dispatcher
+
+    settings = dict(DEFAULTS, use_cloud=False, voice_input=False,
+                    voice_output=False, lazy_plugins=lazy)
+    return Dispatcher({
+        "settings": settings,
+        "usage_file": os.path.join(workdir, "usage.json"),
+        "history_file": os.path.join(workdir, "history.db"),
+    })
+
+
+def install_triggers(dispatcher, triggers: list[str]) -> None:
+    from core.triggers import TriggerMap
+
+    trigger_map = TriggerMap((t, Echo(t)) for t in triggers)
+    trigger_map.compile()
+    dispatcher.trigger_map = trigger_map
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def bench_cold_startup(repeat: int) -> list[dict]:
+    """Fresh interpreter: import the dispatcher and build one.
+
+    The intent classifier loads in a background thread, so this doesn't
+    include it; ``nlp_classifier_ready`` does.
+    """
+    code = (
+        "import sys, tempfile; sys.path.insert(0, sys.argv[1]);"
+        "from scripts.benchmark import make_dispatcher;"
+        "make_dispatcher(tempfile.mkdtemp(), lazy=sys.argv[2] == '1')"
+    )
+    results = []
+    for lazy in (True, False):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-c", code, str(ROOT), "1" if lazy else "0"],
+                cwd=ROOT, check=True, capture_output=True,
+            )
+            samples.append(time.perf_counter() - start)
+        results.append(summarize("cold_startup", samples, lazy=lazy))
+
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from core.nlp import load_classifier; load_classifier(background=False)"
+    )
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code, str(ROOT)],
+                       cwd=ROOT, check=True, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    results.append(summarize("nlp_classifier_ready", samples))
+    return results
+
+
+def bench_plugin_loading(workdir: str, repeat: int) -> list[dict]:
+    results = []
+    for lazy in (True, False):
+        dispatcher = make_dispatcher(workdir, lazy=lazy)
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            dispatcher.load_modules()
+            samples.append(time.perf_counter() - start)
+        dispatcher.close()
+        results.append(summarize(
+            "load_modules", samples, lazy=lazy, plugins=len(dispatcher.commands)
+        ))
+    return results
+
+
+def bench_routing(workdir: str, sizes: list[int], ops: int) -> list[dict]:
+    """Trie lookup alone, then full ``dispatch`` including normalization."""
+    dispatcher = make_dispatcher(workdir)
+    rng = random.Random(1)
+    results = []
+    for size in sizes:
+        triggers = synthetic_triggers(size)
+        install_triggers(dispatcher, triggers)
+        inputs = [f"{rng.choice(triggers)} some args" for _ in range(ops)]
+
+        samples = []
+        for text in inputs:
+            start = time.perf_counter()
+            dispatcher._route(text)
+            samples.append(time.perf_counter() - start)
+        results.append(summarize("route", samples, triggers=size))
+
+        async def run_all() -> list[float]:
+            timings = []
+            for text in inputs:
+                start = time.perf_counter()
+                await dispatcher.dispatch(text)
+                timings.append(time.perf_counter() - start)
+            return timings
+
+        results.append(summarize("dispatch", asyncio.run(run_all()), triggers=size))
+    dispatcher.close()
+    return results
+
+
+def bench_fuzzy(sizes: list[int], ops: int) -> list[dict]:
+    """Misspelled triggers, which fall through to the suggestion index."""
+    from core.suggest import SuggestionIndex
+
+    rng = random.Random(2)
+    results = []
+    for size in sizes:
+        triggers = synthetic_triggers(size)
+        start = time.perf_counter()
+        index = SuggestionIndex()
+        index.build(triggers)
+        results.append(summarize(
+            "suggest_index_build", [time.perf_counter() - start], triggers=size
+        ))
+        inputs = [typo(rng.choice(triggers), rng) for _ in range(ops)]
+        samples = []
+        for text in inputs:
+            start = time.perf_counter()
+            index.suggest(text)
+            samples.append(time.perf_counter() - start)
+        results.append(summarize("fuzzy_fallback", samples, triggers=size))
+    return results
+
+
+def bench_registry(sizes: list[int], ops: int) -> list[dict]:
+    """Intent matching with ``size`` learned phrases registered."""
+    from core.nlp import IntentRegistry, register_default_intents
+
+    results = []
+    for size in sizes:
+        registry = IntentRegistry()
+        register_default_intents(registry)
+        for i, phrase in enumerate(synthetic_triggers(size)):
+            registry.register_phrase(f"{phrase} please", f"cmd{i}")
+        inputs = [NLP_PHRASES[i % len(NLP_PHRASES)] for i in range(ops)]
+        samples = []
+        for text in inputs:
+            start = time.perf_counter()
+            registry.match(text)
+            samples.append(time.perf_counter() - start)
+        results.append(summarize("registry_match", samples, phrases=size))
+    return results
+
+
+def bench_semantic(sizes: list[int], ops: int) -> list[dict]:
+    """Nearest-neighbour lookups with ``size`` stored example utterances."""
+    from core.semantic import SemanticIndex
+
+    rng = random.Random(3)
+    results = []
+    for size in sizes:
+        words = synthetic_triggers(max(size // 10, 50))
+        examples = [
+            {"text": " ".join(rng.choice(words) for _ in range(rng.randint(2, 5))),
+             "command": f"cmd{i % 300}"}
+            for i in range(size)
+        ]
+        index = SemanticIndex()
+        start = time.perf_counter()
+        index.add_many(examples)
+        results.append(summarize("semantic_build", [time.perf_counter() - start], examples=size))
+        inputs = [typo(rng.choice(examples)["text"], rng) for _ in range(ops)]
+        samples = []
+        for text in inputs:
+            start = time.perf_counter()
+            index.classify(text)
+            samples.append(time.perf_counter() - start)
+        results.append(summarize("semantic_classify", samples, examples=size))
+    return results
+
+
+def bench_nlp(ops: int) -> list[dict]:
+    from core.nlp import (
+        CLASSIFIER,
+        clear_normalize_cache,
+        load_classifier,
+        normalize_input,
+        normalize_many,
+    )
+
+    load_classifier(background=False)
+
+    phrases = [NLP_PHRASES[i % len(NLP_PHRASES)] for i in range(ops)]
+    results = []
+    samples = []
+    for text in phrases:
+        start = time.perf_counter()
+        CLASSIFIER.classify(text)
+        samples.append(time.perf_counter() - start)
+    results.append(summarize("nlp_classify", samples))
+
+    start = time.perf_counter()
+    CLASSIFIER.classify_many(phrases)
+    per_item = (time.perf_counter() - start) / len(phrases)
+    results.append(summarize("nlp_classify_many", [per_item], batch=len(phrases)))
+
+    # Full pipeline, then the same phrases answered from the memo
+    samples = []
+    for text in phrases:
+        clear_normalize_cache()
+        start = time.perf_counter()
+        normalize_input(text)
+        samples.append(time.perf_counter() - start)
+    results.append(summarize("nlp_normalize", samples))
+
+    for text in NLP_PHRASES:
+        normalize_input(text)
+    samples = []
+    for text in phrases:
+        start = time.perf_counter()
+        normalize_input(text)
+        samples.append(time.perf_counter() - start)
+    results.append(summarize("nlp_normalize_memo", samples))
+
+    clear_normalize_cache()
+    start = time.perf_counter()
+    normalize_many(phrases)
+    per_item = (time.perf_counter() - start) / len(phrases)
+    results.append(summarize("nlp_normalize_many", [per_item], batch=len(phrases)))
+    return results
+
+
+def run(sizes: list[int] | None = None, ops: int = 200, repeat: int = 5,
+        cold: bool = True) -> dict:
+    """Run every benchmark and return the JSON-serializable report."""
+    sizes = sizes or DEFAULT_SIZES
+    results: list[dict] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        if cold:
+            results += bench_cold_startup(repeat)
+        results += bench_plugin_loading(workdir, repeat)
+        results += bench_routing(workdir, sizes, ops)
+        results += bench_fuzzy(sizes, ops)
+        results += bench_registry(sizes, ops)
+        results += bench_semantic(sizes, ops)
+        results += bench_nlp(ops)
+    return {"meta": metadata(), "results": results}
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def _key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]" if params else result["name"]
+
+
+def compare(old: dict, new: dict) -> list[str]:
+    """One line per benchmark present in both reports: old vs new mean."""
+    before = {_key(r): r for r in old["results"]}
+    lines = []
+    for result in new["results"]:
+        key = _key(result)
+        if key not in before:
+            continue
+        was, now = before[key]["mean_ms"], result["mean_ms"]
+        change = (now - was) / was * 100 if was else 0.0
+        lines.append(f"{key}: {was:.3f}ms -> {now:.3f}ms ({change:+.1f}%)")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="previous JSON report to compare with")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-cold", action="store_true",
+                        help="skip the subprocess cold-startup benchmark")
+    args = parser.parse_args(argv)
+
+    from core.logger import get_logger, set_log_level
+
+    os.chdir(ROOT)
+    get_logger()
+    set_log_level(logging.WARNING)
+    report = run(args.sizes, args.ops, args.repeat, cold=not args.no_cold)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print("\n".join(compare(old, report)))
+    elif not args.output:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
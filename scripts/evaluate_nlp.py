@@ -0,0 +1,324 @@
+"""Offline accuracy and latency evaluation of the NLP pipeline.
+
+Runs a labelled corpus through the same steps as ``Dispatcher.dispatch``
+(``normalize_input``, typo correction, routing) without executing any
+command, and reports which stage handled each input, how often it was
+right, which commands get confused, how well the intent engine's confidence
+predicts a correct answer (to tune the engine's threshold) and p50/p99
+latency per stage. It also replays the typo-correction scores against a
+range of cutoffs to tune ``fuzzy_threshold``::
+
+    python scripts/evaluate_nlp.py
+    python scripts/evaluate_nlp.py --corpus data/nlp_eval.jsonl --output eval.json
+
+A corpus is a JSON list, or JSON lines, of ``{"text": ..., "command": ...}``
+where ``command`` is the normalized command Lex should route, e.g.
+``{"text": "weather in oslo", "command": "weather oslo"}``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+STAGES = ("ml", "custom", "default", "fuzzy", "raw")
+THRESHOLDS = [0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95]
+FUZZY_CUTOFFS = [0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9]
+CONFIDENCE_BINS = 10
+
+# Used when no corpus is given: phrasings the built-in intents and training
+# data cover, paraphrases they don't, and typos for the fuzzy fallback
+DEFAULT_CORPUS = [
+    {"text": "remind me to drink water", "command": "remind drink water"},
+    {"text": "Remind me to call mom!", "command": "remind call mom"},
+    {"text": "remind me to stretch", "command": "remind stretch"},
+    {"text": "remmind me to stretch", "command": "remind stretch"},
+    {"text": "flip a coin", "command": "game flip"},
+    {"text": "Flip a coin, please", "command": "game flip"},
+    {"text": "flip coin", "command": "game flip"},
+    {"text": "toss a coin", "command": "game flip"},
+    {"text": "roll a die", "command": "game roll"},
+    {"text": "roll the dice", "command": "game roll"},
+    {"text": "generate a uuid", "command": "tools uuid"},
+    {"text": "make me a uuid", "command": "tools uuid"},
+    {"text": "weather in tokyo", "command": "weather tokyo"},
+    {"text": "weather oslo", "command": "weather oslo"},
+    {"text": "what's the weather in paris", "command": "weather paris"},
+    {"text": "wether oslo", "command": "weather oslo"},
+    {"text": "weathr in berlin", "command": "weather berlin"},
+    {"text": "ping", "command": "ping"},
+    {"text": "pnig", "command": "ping"},
+    {"text": "pingback", "command": "pingback"},
+    {"text": "help", "command": "help"},
+    {"text": "hepl", "command": "help"},
+    {"text": "history", "command": "history"},
+    {"text": "histroy", "command": "history"},
+    {"text": "history search coin", "command": "history search coin"},
+    {"text": "notes", "command": "notes"},
+    {"text": "note buy milk", "command": "note buy milk"},
+    {"text": "define entropy", "command": "define entropy"},
+    {"text": "defien entropy", "command": "define entropy"},
+    {"text": "translate hello to french", "command": "translate hello to french"},
+    {"text": "system", "command": "system"},
+    {"text": "sytem", "command": "system"},
+    {"text": "perf", "command": "perf"},
+    {"text": "usage", "command": "usage"},
+    {"text": "theme meme", "command": "theme meme"},
+    {"text": "are you alive", "command": "are you alive"},
+    {"text": "game roll", "command": "game roll"},
+    {"text": "tools uuid", "command": "tools uuid"},
+    # Near misses: the nearest example has other arguments or another command
+    {"text": "weather in oslo", "command": "weather oslo"},
+    {"text": "remind me to drink tea", "command": "remind drink tea"},
+    {"text": "generate a password", "command": "tools password"},
+    {"text": "generate a report", "command": "generate a report"},
+    {"text": "flip the table", "command": "flip the table"},
+    {"text": "roll a joint", "command": "roll a joint"},
+]
+
+
+def load_corpus(path: str | None) -> list[dict]:
+    if path is None:
+        return DEFAULT_CORPUS
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        rows = json.loads(text)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [{"text": str(r["text"]), "command": str(r["command"])} for r in rows]
+
+
+def same(a: str, b: str) -> bool:
+    return " ".join(a.lower().split()) == " ".join(b.lower().split())
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def latency(samples: list[float]) -> dict:
+    return {
+        "n": len(samples),
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def evaluate_one(dispatcher, example: dict) -> dict:
+    """Resolve one example like ``Dispatcher._resolve`` and record each stage."""
+    from core import nlp
+
+    # Measure the uncached pipeline, not the memo
+    nlp.clear_normalize_cache()
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    result = nlp.normalize_input(example["text"], timings=timings)
+    text, suggestions = dispatcher._correct(result, timings)
+    route = dispatcher._route(text)
+    timings["total"] = time.perf_counter() - started
+
+    expected_route = dispatcher._route(example["command"])
+    intent, confidence = nlp.intent_engine().classify(nlp.preprocess(example["text"]))
+    top = suggestions[0] if suggestions else None
+    return {
+        "text": example["text"],
+        "expected": example["command"],
+        "predicted": text,
+        "stage": "fuzzy" if text != result.command else result.origin,
+        "correct": same(text, example["command"]),
+        "trigger": route[0] if route else None,
+        "expected_trigger": expected_route[0] if expected_route else None,
+        "ml_intent": intent,
+        "ml_confidence": confidence,
+        "ml_correct": same(intent, example["command"]),
+        # What accepting the top typo correction would have produced
+        "suggestion_score": top.score if top else None,
+        "suggestion_correct": (
+            same(nlp.normalize_input(top.text).command, example["command"]) if top else False
+        ),
+        "timings": timings,
+    }
+
+
+def stage_report(rows: list[dict]) -> dict:
+    report = {}
+    for stage in STAGES:
+        handled = [r for r in rows if r["stage"] == stage]
+        report[stage] = {
+            "handled": len(handled),
+            "share": len(handled) / len(rows) if rows else 0.0,
+            "accuracy": (
+                sum(r["correct"] for r in handled) / len(handled) if handled else None
+            ),
+        }
+    return report
+
+
+def confusion(rows: list[dict]) -> list[dict]:
+    """Routed-to vs expected trigger for every misrouted input, most common first."""
+    pairs = Counter(
+        (r["expected_trigger"] or "-", r["trigger"] or "-")
+        for r in rows if r["trigger"] != r["expected_trigger"]
+    )
+    return [
+        {"expected": expected, "routed": routed, "count": count}
+        for (expected, routed), count in pairs.most_common()
+    ]
+
+
+def calibration(rows: list[dict]) -> dict:
+    """Classifier accuracy per confidence bin and per candidate threshold."""
+    bins = []
+    for i in range(CONFIDENCE_BINS):
+        low, high = i / CONFIDENCE_BINS, (i + 1) / CONFIDENCE_BINS
+        inside = [
+            r for r in rows
+            if low <= r["ml_confidence"] < high or (i == CONFIDENCE_BINS - 1 and r["ml_confidence"] == 1.0)
+        ]
+        if inside:
+            bins.append({
+                "range": [low, high],
+                "n": len(inside),
+                "mean_confidence": statistics.fmean(r["ml_confidence"] for r in inside),
+                "accuracy": sum(r["ml_correct"] for r in inside) / len(inside),
+            })
+    thresholds = []
+    for threshold in THRESHOLDS:
+        taken = [r for r in rows if r["ml_confidence"] >= threshold]
+        thresholds.append({
+            "threshold": threshold,
+            "coverage": len(taken) / len(rows) if rows else 0.0,
+            "precision": sum(r["ml_correct"] for r in taken) / len(taken) if taken else None,
+        })
+    return {"bins": bins, "thresholds": thresholds}
+
+
+def fuzzy_sweep(rows: list[dict]) -> list[dict]:
+    """Replay typo correction at each cutoff: fixes gained vs bad rewrites."""
+    scored = [r for r in rows if r["suggestion_score"] is not None]
+    sweep = []
+    for cutoff in FUZZY_CUTOFFS:
+        accepted = [r for r in scored if r["suggestion_score"] >= cutoff]
+        sweep.append({
+            "cutoff": cutoff,
+            "accepted": len(accepted),
+            "correct": sum(r["suggestion_correct"] for r in accepted),
+            "wrong": sum(not r["suggestion_correct"] for r in accepted),
+        })
+    return sweep
+
+
+def run(corpus: list[dict], settings: dict | None = None) -> dict:
+    """Evaluate ``corpus`` and return the JSON-serializable report."""
+    from core.nlp import intent_engine, load_classifier
+    from core.settings import load_settings
+    from dispatcher import Dispatcher
+
+    load_classifier(background=False)
+    dispatcher = Dispatcher({"settings": settings or load_settings()})
+    try:
+        rows = [evaluate_one(dispatcher, example) for example in corpus]
+        cutoff = dispatcher._cutoff()
+    finally:
+        dispatcher.close()
+
+    stage_timings: dict[str, list[float]] = defaultdict(list)
+    for row in rows:
+        for stage, seconds in row["timings"].items():
+            stage_timings[stage].append(seconds)
+    return {
+        "n": len(rows),
+        "accuracy": sum(r["correct"] for r in rows) / len(rows) if rows else 0.0,
+        "ml_threshold": intent_engine().threshold,
+        "fuzzy_threshold": cutoff,
+        "stages": stage_report(rows),
+        "confusion": confusion(rows),
+        "calibration": calibration(rows),
+        "fuzzy_sweep": fuzzy_sweep(rows),
+        "latency": {stage: latency(samples) for stage, samples in stage_timings.items()},
+        "errors": [
+            {k: r[k] for k in ("text", "expected", "predicted", "stage")}
+            for r in rows if not r["correct"]
+        ],
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{report['n']} inputs, {report['accuracy']:.1%} routed correctly", "", "Stages:"]
+    for stage, info in report["stages"].items():
+        accuracy = "-" if info["accuracy"] is None else f"{info['accuracy']:.0%}"
+        lines.append(f"  {stage:8} {info['handled']:5}  {info['share']:6.1%}  accuracy {accuracy}")
+
+    lines += ["", f"ML threshold (current {report['ml_threshold']}):"]
+    for t in report["calibration"]["thresholds"]:
+        precision = "-" if t["precision"] is None else f"{t['precision']:.0%}"
+        lines.append(f"  >= {t['threshold']:.2f}  coverage {t['coverage']:6.1%}  precision {precision}")
+    lines.append("  confidence bins:")
+    for b in report["calibration"]["bins"]:
+        lines.append(
+            f"    {b['range'][0]:.1f}-{b['range'][1]:.1f}  n={b['n']:<4} "
+            f"mean {b['mean_confidence']:.2f}  accuracy {b['accuracy']:.0%}"
+        )
+
+    lines += ["", f"fuzzy_threshold (current {report['fuzzy_threshold']}):"]
+    for s in report["fuzzy_sweep"]:
+        lines.append(f"  {s['cutoff']:.2f}  accepted {s['accepted']:4}  correct {s['correct']:4}  wrong {s['wrong']:4}")
+
+    lines += ["", "Latency (ms):"]
+    for stage, info in report["latency"].items():
+        lines.append(f"  {stage:10} p50 {info['p50_ms']:8.3f}  p99 {info['p99_ms']:8.3f}  n={info['n']}")
+
+    if report["confusion"]:
+        lines += ["", "Misrouted (expected -> routed):"]
+        for c in report["confusion"][:15]:
+            lines.append(f"  {c['expected']} -> {c['routed']}: {c['count']}")
+    if report["errors"]:
+        lines += ["", "Errors:"]
+        for e in report["errors"][:20]:
+            lines.append(f"  [{e['stage']}] {e['text']!r}: got {e['predicted']!r}, want {e['expected']!r}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="labelled JSON or JSON-lines file (default: built in)")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--fuzzy-threshold", type=float,
+                        help="evaluate with this fuzzy_threshold instead of settings.json")
+    parser.add_argument("--intent-engine", choices=("classifier", "semantic"),
+                        help="evaluate with this intent_engine instead of settings.json")
+    args = parser.parse_args(argv)
+
+    from core.logger import get_logger, set_log_level
+    from core.settings import load_settings
+
+    corpus = load_corpus(args.corpus)
+    os.chdir(ROOT)
+    get_logger()
+    set_log_level(logging.WARNING)
+    settings = load_settings()
+    if args.fuzzy_threshold is not None:
+        settings["fuzzy_threshold"] = args.fuzzy_threshold
+    if args.intent_engine is not None:
+        settings["intent_engine"] = args.intent_engine
+    report = run(corpus, settings)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,14 @@ from __future__ import annotations
 
 import json
 import re
+import sys
 from collections import Counter
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
 
 # ---------------------------------------------------------------------------
 # Utility functions for handling data directory and log files
@@ -96,6 +101,23 @@ def cluster_and_create_suggestions(texts: list[str], min_occurrences: int = 3) -
     return suggestions
 
 
+def label_suggestions(suggestions: dict) -> dict:
+    """Add the intent classifier's closest command to each suggestion.
+
+    Every phrase is scored in one batched pass, so this stays quick for
+    thousands of logged inputs.
+    """
+
+    from core import nlp
+
+    nlp.load_classifier(background=False)
+    phrases = list(suggestions)
+    for phrase, (command, confidence) in zip(phrases, nlp.CLASSIFIER.classify_many(phrases)):
+        suggestions[phrase]["closest_command"] = command
+        suggestions[phrase]["confidence"] = round(confidence, 3)
+    return suggestions
+
+
 # ---------------------------------------------------------------------------
 # Persistence helpers
 # ---------------------------------------------------------------------------
@@ -134,6 +156,7 @@ def main() -> None:
 
     new_suggestions = cluster_and_create_suggestions(texts)
     print(f"Found {len(new_suggestions)} phrases meeting threshold.")
+    label_suggestions(new_suggestions)
 
     existing = load_existing_suggestions()
     added = 0
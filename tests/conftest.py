@@ -15,3 +15,35 @@ def event_loop():
     loop = asyncio.new_event_loop()
     yield loop
     loop.close()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def intent_classifier(tmp_path_factory):
+    """NLP tests expect the classifier, which normally loads in the background.
+
+    It is trained into a scratch directory so tests never touch models/.
+    """
+    from core import nlp
+
+    models = tmp_path_factory.mktemp("models")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(nlp, "MODEL_FILE", str(models / "intent_classifier.pkl"))
+        mp.setattr(nlp, "META_FILE", str(models / "intent_classifier_meta.json"))
+        mp.setattr(nlp, "COMPACT_DIR", str(models / "intent_model"))
+        nlp.load_classifier(background=False)
+        yield
+
+
+@pytest.fixture(autouse=True)
+def history_file(tmp_path, monkeypatch):
+    """Keep dispatchers built without their own files out of memory/.
+
+    Covers the history database, usage counters and the result cache.
+    """
+    import dispatcher
+
+    path = tmp_path / "history.db"
+    monkeypatch.setattr(dispatcher, "HISTORY_FILE", str(path))
+    monkeypatch.setattr(dispatcher, "USAGE_FILE", str(tmp_path / "usage.json"))
+    monkeypatch.setattr(dispatcher, "RESULT_CACHE_FILE", str(tmp_path / "result_cache.json"))
+    return path
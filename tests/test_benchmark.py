@@ -0,0 +1,15 @@
+from scripts.benchmark import compare, run, synthetic_triggers
+
+
+def test_synthetic_triggers_are_deterministic():
+    triggers = synthetic_triggers(300)
+    assert len(set(triggers)) == 300
+    assert triggers == synthetic_triggers(300)
+
+
+def test_benchmark_report_is_comparable():
+    report = run(sizes=[40], ops=3, repeat=1, cold=False)
+    names = {r["name"] for r in report["results"]}
+    assert {"load_modules", "route", "dispatch", "fuzzy_fallback", "nlp_classify"} <= names
+    assert all(r["mean_ms"] >= 0 for r in report["results"])
+    assert len(compare(report, report)) == len(report["results"])
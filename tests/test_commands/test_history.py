@@ -4,8 +4,38 @@ from dispatcher import Dispatcher
 
 
 @pytest.mark.asyncio
-async def test_history_tracks_commands():
-    dispatcher = Dispatcher({})
+async def test_history_tracks_commands(tmp_path):
+    dispatcher = Dispatcher({"history_file": tmp_path / "history.db"})
     await dispatcher.dispatch("ping")
     resp = await dispatcher.dispatch("history")
     assert "ping" in resp
+
+
+@pytest.mark.asyncio
+async def test_history_store_queries(tmp_path):
+    dispatcher = Dispatcher({
+        "usage_file": tmp_path / "usage.json",
+        "history_file": tmp_path / "history.db",
+    })
+    await dispatcher.dispatch("ping")
+    await dispatcher.dispatch("flip a coin")
+    await dispatcher.dispatch("ping")
+
+    resp = await dispatcher.dispatch("history command ping")
+    assert resp.count("> ping") == 2 and "coin" not in resp
+    resp = await dispatcher.dispatch("history search coin since 1h")
+    assert "flip a coin" in resp and "> ping" not in resp
+    assert "Nothing" in await dispatcher.dispatch("history since 2020-01-01 until 2020-02-01")
+    assert "Usage" in await dispatcher.dispatch("history bogus")
+    dispatcher.close()
+
+    # Entries survive a restart and carry the normalized command and latency
+    restarted = Dispatcher({
+        "usage_file": tmp_path / "usage.json",
+        "history_file": tmp_path / "history.db",
+    })
+    entries = restarted.history.last(3)
+    assert [e.trigger for e in entries] == ["history", "history", "history"]
+    assert [e.trigger for e in restarted.history.query(trigger="ping")] == ["ping", "ping"]
+    assert all(e.latency_ms >= 0 for e in entries)
+    restarted.close()
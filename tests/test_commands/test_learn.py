@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from commands.learn import Command
@@ -11,7 +13,7 @@ async def test_learn_custom_phrase(tmp_path, monkeypatch):
     custom_file = tmp_path / "custom.json"
     monkeypatch.setattr(nlp, "CUSTOM_INTENTS_FILE", str(custom_file))
     # reset caches and registry
-    nlp._custom_cache = None
+    monkeypatch.setattr(nlp, "_custom_cache", None)
     nlp._refresh_custom_registry()
 
     cmd = Command({})
@@ -22,3 +24,58 @@ async def test_learn_custom_phrase(tmp_path, monkeypatch):
     result = await dispatcher.dispatch("hello there")
     assert "Pong" in result
 
+
+
+def test_classifier_learns_incrementally(tmp_path, monkeypatch):
+    monkeypatch.setattr(nlp, "MODEL_FILE", str(tmp_path / "model.joblib"))
+    monkeypatch.setattr(nlp, "META_FILE", str(tmp_path / "meta.json"))
+    monkeypatch.setattr(nlp, "COMPACT_DIR", str(tmp_path / "compact"))
+    data_file = tmp_path / "training.json"
+    monkeypatch.setattr(nlp, "TRAINING_DATA_FILE", str(data_file))
+    monkeypatch.setattr(nlp, "CUSTOM_INTENTS_FILE", str(tmp_path / "custom.json"))
+    monkeypatch.setattr(nlp, "_custom_cache", None)
+
+    classifier = nlp.IntentClassifier()
+    classifier.load_or_train()
+    first = json.loads((tmp_path / "meta.json").read_text())
+
+    # A new example of a known command is folded in, not refit
+    example = {"text": "whats the weather like in tokyo", "command": "weather tokyo"}
+    monkeypatch.setattr(classifier, "train", lambda dataset: pytest.fail("full refit"))
+    assert classifier.learn([example])
+    assert not classifier.learn([example])
+    meta = json.loads((tmp_path / "meta.json").read_text())
+    assert meta["hash"] != first["hash"]
+    assert nlp.example_digest(example) in meta["examples"]
+
+    # Added to the training file: a fresh load picks it up incrementally
+    data_file.write_text(json.dumps([example]))
+    fresh = nlp.IntentClassifier()
+    monkeypatch.setattr(fresh, "train", lambda dataset: pytest.fail("full refit"))
+    fresh.load_or_train()
+    assert fresh.examples == classifier.examples
+
+    # Editing an example, with the count unchanged, forces a rebuild
+    data_file.write_text(json.dumps([{"text": "is it raining in tokyo", "command": "weather tokyo"}]))
+    edited = nlp.IntentClassifier()
+    edited.load_or_train()
+    assert edited.size == fresh.size
+    assert edited.examples != fresh.examples
+
+
+def test_classifier_keeps_phrases_learned_while_loading(tmp_path, monkeypatch):
+    monkeypatch.setattr(nlp, "MODEL_FILE", str(tmp_path / "model.joblib"))
+    monkeypatch.setattr(nlp, "META_FILE", str(tmp_path / "meta.json"))
+    monkeypatch.setattr(nlp, "COMPACT_DIR", str(tmp_path / "compact"))
+    monkeypatch.setattr(nlp, "TRAINING_DATA_FILE", str(tmp_path / "training.json"))
+    monkeypatch.setattr(nlp, "CUSTOM_INTENTS_FILE", str(tmp_path / "custom.json"))
+    monkeypatch.setattr(nlp, "_custom_cache", None)
+
+    # Learned before the loader has a model, e.g. during the background load
+    classifier = nlp.IntentClassifier()
+    example = {"text": "whats the weather like in tokyo", "command": "weather tokyo"}
+    assert not classifier.learn([example])
+    classifier.load_or_train()
+    assert nlp.example_digest(example) in classifier.examples
+    meta = json.loads((tmp_path / "meta.json").read_text())
+    assert nlp.example_digest(example) in meta["examples"]
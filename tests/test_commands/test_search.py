@@ -0,0 +1,21 @@
+import json
+import os
+
+import pytest
+from commands.search import Command
+
+
+@pytest.mark.asyncio
+async def test_search_rereads_rebuilt_index(tmp_path):
+    file = tmp_path / "file_index.json"
+    file.write_text(json.dumps(["/old/notes.txt"]))
+    # Two pool workers each hold their own Command
+    worker, other = Command({}), Command({})
+    worker.file = other.file = file
+    assert "/old/notes.txt" in await worker.run("notes")
+
+    file.write_text(json.dumps(["/new/notes.txt"]))
+    stat = file.stat()
+    os.utime(file, (stat.st_atime, stat.st_mtime + 10))
+    assert await worker.run("notes") == "/new/notes.txt"
+    assert await other.run("notes") == "/new/notes.txt"
@@ -29,3 +29,24 @@ async def test_vault_set_get_and_list(tmp_path, monkeypatch):
     listing = await cmd.run("list")
     assert "alpha" in listing
     assert "foo" in listing
+
+
+@pytest.mark.asyncio
+async def test_vault_commands_stay_out_of_history(tmp_path, monkeypatch):
+    from dispatcher import Dispatcher
+
+    monkeypatch.setattr(vault, "VAULT_FILE", str(tmp_path / "vault.json"))
+    dispatcher = Dispatcher({
+        "usage_file": tmp_path / "usage.json",
+        "history_file": tmp_path / "history.db",
+    })
+    await dispatcher.dispatch("vault set pin s3cret")
+    assert await dispatcher.dispatch("vault get pin") == "s3cret"
+    await dispatcher.dispatch("ping")
+    dispatcher.history.flush()
+
+    assert not list(dispatcher.history.query(text="s3cret", limit=None))
+    assert not list(dispatcher.history.query(trigger="vault", limit=None))
+    assert [e.trigger for e in dispatcher.history.query(limit=None)] == ["ping"]
+    assert all(r != "s3cret" for _, r in dispatcher.context.get("history", []))
+    dispatcher.close()
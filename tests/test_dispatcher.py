@@ -117,3 +117,740 @@ async def test_usage_tracking(tmp_path):
     await dispatcher.dispatch("ping")
     resp = await dispatcher.dispatch("usage")
     assert "ping: 2" in resp
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_longest_trigger_wins():
+    dispatcher = Dispatcher({"settings": load_settings()})
+
+    class Dummy:
+        def __init__(self, name, trigger):
+            self.name = name
+            self.trigger = [trigger]
+
+        async def run(self, args):
+            return f"{self.name}:{args}"
+
+    # Register the shorter trigger last so insertion order can't decide
+    dispatcher.trigger_map["zap it"] = Dummy("long", "zap it")
+    dispatcher.trigger_map["zap"] = Dummy("short", "zap")
+
+    assert await dispatcher.dispatch("zap it now") == "long:now"
+    assert await dispatcher.dispatch("zap now") == "short:now"
+
+
+@pytest.mark.asyncio
+async def test_usage_journal_survives_restart(tmp_path):
+    usage_file = tmp_path / "usage.json"
+    dispatcher = Dispatcher({"usage_file": usage_file})
+    for _ in range(3):
+        await dispatcher.dispatch("ping")
+    # Counting is write-behind: nothing is rewritten per command
+    assert not usage_file.exists()
+    dispatcher.close()
+
+    dispatcher = Dispatcher({"usage_file": usage_file})
+    assert dispatcher.usage_counts["ping"] == 3
+    dispatcher.usage.compact()
+    assert usage_file.exists()
+    assert Dispatcher({"usage_file": usage_file}).usage_counts["ping"] == 3
+
+
+@pytest.mark.asyncio
+async def test_engine_limits_queue_and_concurrency():
+    settings = load_settings()
+    settings.update(
+        dispatch_workers=4,
+        dispatch_queue_size=2,
+        command_concurrency={"slow": 1},
+    )
+    dispatcher = Dispatcher({"settings": settings})
+
+    class Slow:
+        trigger = ["slow"]
+        running = 0
+        peak = 0
+
+        async def run(self, args):
+            Slow.running += 1
+            Slow.peak = max(Slow.peak, Slow.running)
+            await asyncio.sleep(0.02)
+            Slow.running -= 1
+            return f"done {args}"
+
+    dispatcher.trigger_map["slow"] = Slow()
+
+    results = await asyncio.gather(
+        *(dispatcher.engine.submit(f"slow {i}") for i in range(4))
+    )
+    assert results == [f"done {i}" for i in range(4)]
+    assert Slow.peak == 1
+
+    # Fire-and-forget submissions are dropped once the queue is full
+    futures = [dispatcher.engine.submit_nowait("slow x") for _ in range(3)]
+    assert "too busy" in (await futures[2]).lower()
+    assert await futures[0] == "done x"
+    assert dispatcher.engine.metrics()["rejected"] == 1
+    dispatcher.engine.stop()
+
+
+@pytest.mark.asyncio
+async def test_engine_bounds_interactive_jobs():
+    settings = load_settings()
+    settings.update(dispatch_workers=1, dispatch_interactive_queue_size=1)
+    dispatcher = Dispatcher({"settings": settings})
+
+    class Slow:
+        trigger = ["slow"]
+
+        async def run(self, args):
+            await asyncio.sleep(0.01)
+            return f"done {args}"
+
+    dispatcher.trigger_map["slow"] = Slow()
+    # submit waits for room instead of queueing without limit
+    results = await asyncio.gather(*(dispatcher.engine.submit(f"slow {i}") for i in range(3)))
+    assert results == [f"done {i}" for i in range(3)]
+    assert dispatcher.engine.metrics()["max_depth"] == 1
+
+    from core.engine import INTERACTIVE
+    futures = [dispatcher.engine.submit_nowait("slow x", INTERACTIVE) for _ in range(2)]
+    assert "too busy" in (await futures[1]).lower()
+    assert await futures[0] == "done x"
+    dispatcher.engine.stop()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_many(tmp_path):
+    dispatcher = Dispatcher({"usage_file": tmp_path / "usage.json"})
+    results = await dispatcher.dispatch_many(["ping", "tools uuid", "ping", "xyzzy"])
+    assert [r.trigger for r in results] == ["ping", "tools", "ping", None]
+    assert "Pong" in results[0].result
+    import uuid
+    uuid.UUID(results[1].result)
+    assert all(r.elapsed >= 0 for r in results)
+    assert dispatcher.usage_counts["ping"] == 2
+
+    # Usage is recorded once, after the whole batch ran
+    ordered = await dispatcher.dispatch_many(["ping", "usage"], ordered=True)
+    assert "ping: 2" in ordered[1].result
+    assert dispatcher.usage_counts["ping"] == 3
+
+
+@pytest.mark.asyncio
+async def test_dispatch_many_ordered_normalizes_each_step(tmp_path, monkeypatch):
+    from core import nlp
+
+    monkeypatch.setattr(nlp, "CUSTOM_INTENTS_FILE", str(tmp_path / "custom.json"))
+    monkeypatch.setattr(nlp, "_custom_cache", None)
+    nlp._refresh_custom_registry()
+    dispatcher = Dispatcher({"settings": load_settings()})
+    dispatcher.trigger_map["learn"].context["dispatcher"] = dispatcher
+
+    # The second step only routes once the first one has taught it
+    results = await dispatcher.dispatch_many(
+        ["learn bounce twice as ping", "bounce twice"], ordered=True
+    )
+    assert results[1].trigger == "ping"
+    assert "Pong" in results[1].result
+
+
+@pytest.mark.asyncio
+async def test_result_cache(tmp_path):
+    settings = load_settings()
+    settings.update(result_cache_persist=True, result_cache_entries=2)
+    context = {
+        "settings": settings,
+        "usage_file": tmp_path / "usage.json",
+        "result_cache_file": tmp_path / "cache.json",
+    }
+    dispatcher = Dispatcher(context)
+
+    class Lookup:
+        trigger = ["lookup"]
+        cache_ttl = 60
+        calls = 0
+
+        async def run(self, args):
+            Lookup.calls += 1
+            return f"{args} #{Lookup.calls}"
+
+    dispatcher.trigger_map["lookup"] = Lookup()
+
+    first = await dispatcher.dispatch("lookup Tokyo")
+    assert await dispatcher.dispatch("lookup  tokyo") == first
+    assert Lookup.calls == 1
+    await dispatcher.dispatch("lookup Oslo")
+    await dispatcher.dispatch("lookup Paris")
+    # Tokyo was least recently used and got evicted
+    assert await dispatcher.dispatch("lookup Tokyo") != first
+    stats = dispatcher.result_cache.stats()
+    assert stats["hits"] == 1 and stats["evictions"] == 2
+
+    dispatcher.close()
+    restarted = Dispatcher(dict(context))
+    assert len(restarted.result_cache) == 2
+    assert "hits 0" in await restarted.dispatch("cache")
+    assert "cleared" in await restarted.dispatch("cache clear")
+    assert len(restarted.result_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_result_cache_varies_with_settings():
+    settings = load_settings()
+    settings["use_cloud"] = False
+    dispatcher = Dispatcher({"settings": settings})
+
+    class Lookup:
+        trigger = ["lookup"]
+        cache_ttl = 60
+        cache_settings = ("use_cloud",)
+
+        async def run(self, args):
+            return "online" if settings["use_cloud"] else "offline"
+
+    dispatcher.trigger_map["lookup"] = Lookup()
+    assert await dispatcher.dispatch("lookup tokyo") == "offline"
+    settings["use_cloud"] = True
+    assert await dispatcher.dispatch("lookup tokyo") == "online"
+
+    # Offline replies of the real plugins never reach the cache
+    settings["use_cloud"] = False
+    assert "without cloud access" in await dispatcher.dispatch("define lucid")
+    assert "probably fine" in await dispatcher.dispatch("weather Oslo")
+    assert len(dispatcher.result_cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_perf_stats(tmp_path):
+    from core.perf import Histogram
+
+    hist = Histogram()
+    for ms in range(1, 101):
+        hist.record(ms / 1000)
+    assert 50 <= hist.percentile(50) <= 60
+    assert 95 <= hist.percentile(95) <= 100
+    assert hist.percentile(99) <= hist.max == 100
+
+    dispatcher = Dispatcher({"usage_file": tmp_path / "usage.json"})
+
+    class Flaky:
+        trigger = ["flaky"]
+        timeout = 0.01
+
+        async def run(self, args):
+            if args == "boom":
+                raise RuntimeError(args)
+            await asyncio.sleep(1 if args == "hang" else 0)
+            return "ok"
+
+    dispatcher.trigger_map["flaky"] = Flaky()
+    for args in ("", "boom", "hang"):
+        await dispatcher.dispatch(f"flaky {args}")
+
+    data = dispatcher.perf.snapshot()
+    flaky = data["commands"]["flaky"]
+    assert flaky["count"] == 3
+    assert flaky["timeouts"] == 1 and flaky["errors"] == 1
+    assert data["stages"]["dispatch"]["count"] == 3
+    assert "nlp.classify" in data["stages"]
+
+    assert "flaky: n=3" in await dispatcher.dispatch("perf")
+    out = tmp_path / "perf.json"
+    await dispatcher.dispatch(f"perf export {out}")
+    import json
+    exported = json.loads(out.read_text())
+    assert exported["commands"]["flaky"]["timeouts"] == 1
+    assert "engine" in exported
+
+
+@pytest.mark.asyncio
+async def test_suggestion_index(tmp_path):
+    from core.suggest import SuggestionIndex
+
+    index = SuggestionIndex()
+    index.build(["ping", "pingback", "remind"], {"hello there": "ping"})
+    assert index.suggest("remmind me to sleep")[0].text == "remind me to sleep"
+    assert index.suggest("helo there")[0].source == "phrase"
+    # Usage breaks near-ties between candidates
+    assert index.suggest("pingbak", usage={"ping": 1000})[0].text == "ping"
+    assert index.suggest("pingbak")[0].text == "pingback"
+
+    dispatcher = Dispatcher({"usage_file": tmp_path / "usage.json"})
+    assert "Pong" in await dispatcher.dispatch("pnig")
+    resp = await dispatcher.dispatch("wxyzzq")
+    assert "too tired" in resp
+
+
+@pytest.mark.asyncio
+async def test_dispatch_stream(tmp_path):
+    import time
+
+    dispatcher = Dispatcher({"usage_file": tmp_path / "usage.json"})
+
+    class Streamer:
+        trigger = ["countdown"]
+        timeout = 0.5
+
+        async def run(self, args):
+            return "\n".join([c async for c in self.stream(args)])
+
+        async def stream(self, args):
+            for i in range(3, 0, -1):
+                yield str(i)
+                await asyncio.sleep(0.05)
+            if args == "hang":
+                await asyncio.sleep(1)
+            yield "liftoff"
+
+    dispatcher.trigger_map["countdown"] = Streamer()
+
+    started = time.perf_counter()
+    seen = []
+    async for chunk in dispatcher.stream_command("countdown"):
+        if not seen:
+            first = time.perf_counter() - started
+        seen.append(chunk)
+    assert seen == ["3", "2", "1", "liftoff"]
+    assert first < 0.05
+    assert dispatcher.context["last_result"] == "3\n2\n1\nliftoff"
+
+    # Slow consumers don't eat into the timeout; a stalled plugin does
+    chunks = []
+    async for chunk in dispatcher.dispatch_stream("countdown hang"):
+        chunks.append(chunk)
+        await asyncio.sleep(0.2)
+    assert chunks[-1] == "[Lex] Command timed out."
+
+    # Plain plugins yield their whole result once
+    chunks = [c async for c in dispatcher.dispatch_stream("ping")]
+    assert len(chunks) == 1 and "Pong" in chunks[0]
+    assert await dispatcher.dispatch("countdown") == "3\n2\n1\nliftoff"
+    dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_engine_priorities_and_preemption(tmp_path):
+    from core.engine import BACKGROUND, HOTKEY, INTERACTIVE
+
+    settings = load_settings()
+    settings.update(dispatch_workers=1)
+    dispatcher = Dispatcher(
+        {"settings": settings, "usage_file": tmp_path / "usage.json"}
+    )
+
+    class Work:
+        trigger = ["work"]
+        order = []
+        cancelled = []
+
+        async def run(self, args):
+            try:
+                await asyncio.sleep(0.5 if args.startswith("slow") else 0)
+            except asyncio.CancelledError:
+                Work.cancelled.append(args)
+                raise
+            Work.order.append(args)
+            return f"done {args}"
+
+    dispatcher.trigger_map["work"] = Work()
+    engine = dispatcher.engine
+
+    # A running background job is cancelled for an interactive command
+    background = engine.submit_nowait("work slow bg", BACKGROUND)
+    await asyncio.sleep(0.05)
+    assert await dispatcher.run_command("work now") == "done now"
+    assert "interrupted" in (await background).lower()
+    assert Work.cancelled == ["slow bg"]
+    assert engine.metrics()["preempted"] == 1
+
+    # Queued jobs run most urgent first
+    Work.order.clear()
+    blocker = asyncio.ensure_future(engine.submit("work slow block", INTERACTIVE))
+    await asyncio.sleep(0.05)
+    jobs = [
+        engine.submit_nowait("work bg", BACKGROUND),
+        engine.submit_nowait("work key", HOTKEY),
+        asyncio.ensure_future(engine.submit("work me", INTERACTIVE)),
+    ]
+    await asyncio.gather(blocker, *jobs)
+    assert Work.order == ["slow block", "me", "key", "bg"]
+
+    # Cancelling the caller cancels the command inside the plugin
+    task = asyncio.ensure_future(dispatcher.run_command("work slow stop"))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.sleep(0.01)
+    assert "slow stop" in Work.cancelled
+    dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_daemon_server(tmp_path):
+    from core import client
+    from core.client import RemoteError
+    from core.remote import RemoteDispatcher
+    from core.server import LexServer
+
+    dispatcher = Dispatcher({"usage_file": tmp_path / "usage.json"})
+    started = asyncio.Event()
+
+    class Slow:
+        trigger = ["slow"]
+
+        async def run(self, args):
+            started.set()
+            await asyncio.sleep(5)
+            return "done"
+
+    dispatcher.trigger_map["slow"] = Slow()
+    path = str(tmp_path / "lexd.sock")
+    server = LexServer(dispatcher, path)
+    await server.start()
+    try:
+        remote = await RemoteDispatcher.connect(path)
+        assert "ping" in remote.trigger_map
+        assert "Pong" in await remote.run_command("ping")
+        chunks = [c async for c in remote.stream_command("ping")]
+        assert len(chunks) == 1 and "Pong" in chunks[0]
+
+        # Every connection has its own history
+        other = await RemoteDispatcher.connect(path)
+        assert "No recent history" in await other.run_command("history")
+        await other.close()
+
+        # The blocking CLI client sees the same stream
+        replies = await asyncio.to_thread(lambda: list(client.stream("ping", path)))
+        assert "Pong" in replies[0]["chunk"] and replies[-1]["done"]
+
+        # Cancelling the client cancels the command in the daemon
+        task = asyncio.create_task(remote.run_command("slow"))
+        await asyncio.wait_for(started.wait(), 1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.05)
+        assert dispatcher.engine.metrics()["busy"] == 0
+
+        # "stop" only cancels the requesting client's commands
+        started.clear()
+        task = asyncio.create_task(remote.run_command("slow"))
+        await asyncio.wait_for(started.wait(), 1)
+        other = await RemoteDispatcher.connect(path)
+        assert await other.cancel() == 0
+        assert dispatcher.cancel() == 0
+        assert not task.done()
+        assert await remote.cancel() == 1
+        await asyncio.wait({task}, timeout=1)
+        assert task.done()
+        await other.close()
+
+        # A second daemon refuses to take over the socket
+        with pytest.raises(RuntimeError):
+            await LexServer(dispatcher, path).start()
+        await remote.close()
+    finally:
+        await server.close()
+        dispatcher.close()
+
+    assert await RemoteDispatcher.connect(path) is None
+    with pytest.raises(RemoteError):
+        await remote.run_command("ping")
+
+
+@pytest.mark.asyncio
+async def test_sessions_isolate_context(tmp_path):
+    import time
+
+    dispatcher = Dispatcher({
+        "usage_file": tmp_path / "usage.json",
+        "settings": {"theme": "lex"},
+    })
+    sessions = dispatcher.sessions
+
+    async def in_session(name, command):
+        with sessions.use(name):
+            return await dispatcher.run_command(command)
+
+    await asyncio.gather(in_session("a", "ping"), in_session("b", "flip a coin"))
+    with sessions.use("a"):
+        dispatcher.context["settings"]["theme"] = "meme"
+        assert dispatcher.context["last_command"] == "ping"
+
+    history_a, history_b = await asyncio.gather(
+        in_session("a", "history"), in_session("b", "history")
+    )
+    assert "ping" in history_a and "coin" not in history_a
+    assert "coin" in history_b and "ping" not in history_b
+    with sessions.use("b"):
+        assert dispatcher.context["settings"]["theme"] == "lex"
+        # A plugin first loaded in session "a" still reads b's settings
+        assert dispatcher.trigger_map["ping"].settings["theme"] == "lex"
+    with sessions.use("a"):
+        assert dispatcher.trigger_map["ping"].settings["theme"] == "meme"
+
+    # Outside a session the shared context is untouched
+    assert not dispatcher.context["history"]
+    assert dispatcher.context["settings"]["theme"] == "lex"
+
+    assert sessions.prune(now=time.monotonic() + 3600) == 2
+    assert len(sessions) == 0
+    dispatcher.close()
+
+
+def test_nlp_memo(monkeypatch):
+    from core import nlp
+
+    first = nlp.normalize_input("Flip a coin!")
+    hits = nlp.normalize_cache_stats()["hits"]
+
+    def boom(text):
+        raise AssertionError("classifier should not run on a memo hit")
+
+    monkeypatch.setattr(nlp.CLASSIFIER, "classify", boom)
+    again = nlp.normalize_input("flip a  coin")
+    assert (again.command, again.origin) == (first.command, first.origin)
+    assert again.raw_input == "flip a  coin"
+    assert nlp.normalize_cache_stats()["hits"] == hits + 1
+    assert nlp.normalize_many(["flip a coin"])[0].command == first.command
+
+    # Learning an intent (any registry change) invalidates the memo
+    nlp.REGISTRY.register(r"^never said$", lambda _: "ping", priority="test")
+    try:
+        with pytest.raises(AssertionError):
+            nlp.normalize_input("flip a coin")
+    finally:
+        nlp.REGISTRY.clear("test")
+
+
+def test_nlp_routes_before_classifier_loads(monkeypatch):
+    from core import nlp
+
+    # As right after startup: no model yet, loader still running
+    monkeypatch.setattr(nlp.CLASSIFIER, "model", None)
+    monkeypatch.setattr(nlp.CLASSIFIER, "start", lambda: None)
+    nlp.clear_normalize_cache()
+    try:
+        result = nlp.normalize_input("weather in oslo")
+        assert (result.command, result.origin) == ("weather oslo", "default")
+        assert nlp.normalize_many(["roll a die"])[0].command == "game roll"
+    finally:
+        nlp.clear_normalize_cache()
+
+
+def test_intent_registry_priority():
+    from core.nlp import IntentRegistry, register_default_intents
+
+    registry = IntentRegistry()
+    register_default_intents(registry)
+    for i in range(2000):
+        registry.register_phrase(f"learned phrase {i}", f"echo {i}")
+    assert registry.match("Learned Phrase 1999") == ("echo 1999", "custom")
+    assert registry.match("weather in oslo") == ("weather oslo", "default")
+    assert registry.match("nothing here") == ("nothing here", "none")
+
+    # Custom patterns outrank defaults registered before them, and each
+    # handler sees its own groups
+    registry.register(r"^weather (\w+) tomorrow", lambda m: f"forecast {m.group(1)}", priority="custom")
+    assert registry.match("weather oslo tomorrow") == ("forecast oslo", "custom")
+    assert registry.match("remind me to stretch") == ("remind stretch", "default")
+
+    # Backreferences can't be combined; they still match on their own
+    registry.register(r"^(\w+) and \1$", lambda m: f"twice {m.group(1)}")
+    assert registry.match("ping and ping") == ("twice ping", "default")
+
+    version = registry.version
+    registry.clear("custom")
+    assert registry.version > version
+    assert registry.match("learned phrase 5") == ("learned phrase 5", "none")
+    assert registry.match("weather oslo tomorrow") == ("weather oslo tomorrow", "default")
+
+
+def test_nlp_classify_many_matches_classify():
+    from core import nlp
+
+    texts = ["flip a coin", "what's the weather in oslo", "remind me to stretch", "", "xyzzy"] * 3
+    expected = [nlp.CLASSIFIER.classify(t) for t in texts]
+    assert nlp.CLASSIFIER.classify_many(texts) == expected
+    assert nlp.CLASSIFIER.classify_many(texts, chunk_size=4) == expected
+    assert nlp.CLASSIFIER.classify_many([]) == []
+
+    nlp.clear_normalize_cache()
+    single = [nlp.normalize_input(t) for t in texts]
+    nlp.clear_normalize_cache()
+    assert nlp.normalize_many(texts) == single
+
+
+def test_compact_intent_model_matches_sklearn(tmp_path):
+    import numpy as np
+    from sklearn.utils import murmurhash3_32
+
+    from core import nlp
+    from core.intent_model import CompactModel, murmurhash3_32 as murmur
+
+    for term in ["a", "ab", "abc", "abcd", "flip coin", "weather tokyo", "naïve café"]:
+        assert murmur(term.encode("utf-8")) == murmurhash3_32(term, seed=0)
+
+    texts = ["flip a coin", "what's the WEATHER in tokyo", "remind me to stretch", "", "xyzzy"]
+    estimator = nlp.CLASSIFIER._load_estimator()
+    expected = estimator.predict_proba(nlp.CLASSIFIER.vectorize(texts))
+
+    model = CompactModel.from_estimator(estimator, nlp.N_FEATURES, nlp.NGRAM_RANGE)
+    assert len(model.columns) < nlp.N_FEATURES
+    model.save(str(tmp_path / "model"))
+    loaded = CompactModel.load(str(tmp_path / "model"))
+    assert list(loaded.classes_) == list(estimator.classes_)
+    assert np.allclose(loaded.predict_proba(texts), expected, rtol=0, atol=1e-12)
+
+
+def test_semantic_index_search_and_engine(monkeypatch):
+    from core import nlp
+    from core.semantic import SemanticIndex, transfer_arguments
+
+    index = SemanticIndex(exact_limit=64, probes=4)
+    index.add_many(
+        {"text": f"open project number {i}", "command": f"project {i % 10}"}
+        for i in range(200)
+    )
+    assert index._cells is not None  # partitioned past exact_limit
+    found = index.search("open project number 42", k=3)
+    assert found[0].text == "open project number 42"
+    assert found[0].score >= found[-1].score
+    assert index.classify_many(["open project number 7"]) == [("project 7", found[0].score)]
+
+    # Learned phrases are searchable straight away, new commands included
+    version = index.version
+    index.add("brew some coffee", "coffee")
+    assert index.version > version
+    assert index.classify("brew some coffee") == ("coffee", 1.0)
+    assert SemanticIndex().classify("anything") == ("unknown", 0.0)
+    assert transfer_arguments("weather tokyo", "weather in tokyo", "weather in oslo") == "weather oslo"
+    assert transfer_arguments("game flip", "flip a coin", "please flip a coin") == "game flip"
+
+    monkeypatch.setattr(nlp, "SEMANTIC", None)
+    try:
+        assert nlp.set_intent_engine("semantic") == "semantic"
+        nlp.clear_normalize_cache()
+        result = nlp.normalize_input("Flip a coin")
+        assert (result.command, result.origin) == ("game flip", "ml")
+        # Near misses keep the user's arguments instead of the example's
+        assert nlp.normalize_input("weather in oslo").command == "weather oslo"
+        assert nlp.normalize_input("remind me to drink tea").command == "remind drink tea"
+        assert nlp.normalize_input("generate a password").command != "tools uuid"
+        assert nlp.set_intent_engine("nonsense") == "classifier"
+    finally:
+        nlp.set_intent_engine("classifier")
+        nlp.clear_normalize_cache()
+
+
+def test_extract_slots():
+    from datetime import date, datetime, time, timedelta
+    from core.nlp import extract_slots
+
+    now = datetime(2026, 10, 18, 14, 30)  # a Sunday afternoon
+    slots = extract_slots("stretch in 20 minutes", now)
+    assert [(s.kind, s.text) for s in slots] == [("duration", "in 20 minutes")]
+    assert slots.when() == now + timedelta(minutes=20)
+    assert slots.remainder() == "stretch"
+
+    slots = extract_slots("tomorrow at 9 dentist", now)
+    assert slots.when() == datetime(2026, 10, 19, 9, 0)
+    assert slots.remainder() == "dentist"
+
+    assert extract_slots("in an hour and 15 minutes", now).first("duration").value == timedelta(minutes=75)
+    assert extract_slots("for 1h30m", now).first("duration").value == timedelta(minutes=90)
+    assert extract_slots("7pm dinner", now).when() == datetime(2026, 10, 18, 19, 0)
+    # A time already past today means tomorrow
+    assert extract_slots("at 9 call bob", now).when() == datetime(2026, 10, 19, 9, 0)
+    assert extract_slots("next friday", now).first("date").value == date(2026, 10, 23)
+    assert extract_slots("the 5th of may", now).first("date").value == date(2027, 5, 5)
+    assert extract_slots("2024-05-01 10:30", now).when() == datetime(2024, 5, 1, 10, 30)
+    assert extract_slots("at 10:15 pm", now).first("time").value == time(22, 15)
+
+    slots = extract_slots("buy 3 apples and 2.5 kg flour", now)
+    assert [s.value for s in slots.all("number")] == [3, 2.5]
+    assert slots.when() is None
+
+    # Words that only look like slots stay in the text
+    slots = extract_slots("to sit in the sun", now)
+    assert slots.when() is None and slots.remainder() == "to sit in the sun"
+    assert extract_slots("to wed my fiance", now).when() is None
+    assert extract_slots("on sat", now).first("date").value == date(2026, 10, 24)
+    assert extract_slots("sat at 9", now).when() == datetime(2026, 10, 24, 9, 0)
+    slots = extract_slots("to buy 3 m of cable", now)
+    assert slots.first("duration") is None and slots.remainder("duration") == "to buy 3 m of cable"
+    assert extract_slots("in 3m", now).first("duration").value == timedelta(minutes=3)
+    # "a"/"an" are only a number after in/for/after
+    slots = extract_slots("to take a second look at the report", now)
+    assert slots.first("duration") is None
+    assert slots.remainder() == "to take a second look at the report"
+    assert extract_slots("take a day off", now).when() is None
+    assert extract_slots("in an hour", now).when() == now + timedelta(hours=1)
+    # A bare hour tonight is in the evening
+    assert extract_slots("at 8 tonight", now).when() == datetime(2026, 10, 18, 20, 0)
+    assert extract_slots("tonight at 11pm", now).when() == datetime(2026, 10, 18, 23, 0)
+    # "today" with 9:00 already gone means later today, not the past
+    assert extract_slots("call mom today", now).when() == now + timedelta(hours=1)
+
+
+@pytest.mark.asyncio
+async def test_plugins_read_slots(tmp_path):
+    dispatcher = Dispatcher({"settings": load_settings()})
+    for cmd in dispatcher.commands:
+        if hasattr(cmd, "file"):
+            cmd.file = tmp_path / f"{cmd.trigger[0]}.json"
+    proactive = dispatcher.trigger_map["proactive"]
+    proactive.tasks = []
+
+    resp = await dispatcher.dispatch("remind me in 20 minutes to stretch")
+    assert "Reminder saved: stretch (due " in resp
+    assert "already passed" in await dispatcher.dispatch("remind me to file taxes on 2024-05-01")
+    resp = await dispatcher.dispatch("remind me to sit in the sun")
+    assert resp == "[Lex] Reminder saved: sit in the sun"
+    assert "stretch (due " in await dispatcher.dispatch("remind list")
+
+    resp = await dispatcher.dispatch("schedule add tomorrow at 9 dentist")
+    assert "Event added" in resp
+    assert "dentist" in await dispatcher.dispatch("schedule list")
+    resp = await dispatcher.dispatch("schedule add 2024-05-01 14:30 review")
+    assert "2024-05-01 14:30" in resp
+
+    resp = await dispatcher.dispatch("proactive add 7am weather oslo")
+    assert "07:00" in resp
+    assert proactive.tasks[-1]["command"] == "weather oslo"
+    assert "Start with the time" in await dispatcher.dispatch("proactive add news at 7am")
+
+
+@pytest.mark.asyncio
+async def test_proactive_tasks_do_not_wait_for_each_other(tmp_path, caplog):
+    from datetime import datetime
+
+    dispatcher = Dispatcher({"settings": load_settings()})
+    proactive = dispatcher.trigger_map["proactive"]
+    proactive.file = tmp_path / "proactive.json"
+    proactive.context["dispatcher"] = dispatcher
+    now = datetime.now().strftime("%H:%M")
+    proactive.tasks = [
+        {"time": now, "command": "snooze"},
+        {"time": now, "command": "ping"},
+    ]
+
+    class Snooze:
+        trigger = ["snooze"]
+
+        async def run(self, args):
+            await asyncio.sleep(5)
+            return "awake"
+
+    dispatcher.trigger_map["snooze"] = Snooze()
+    try:
+        # Queuing the tasks returns at once instead of running the slow one
+        await asyncio.wait_for(proactive._run_tasks(), 1)
+        assert all(task.get("last") for task in proactive.tasks)
+        for _ in range(100):
+            if "Proactive task 'ping'" in caplog.text:
+                break
+            await asyncio.sleep(0.01)
+        assert "Pong" in caplog.text
+    finally:
+        dispatcher.engine.stop()
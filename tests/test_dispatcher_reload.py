@@ -55,3 +55,182 @@ class Command:
     dispatcher.check_for_updates()
     resp = await dispatcher.dispatch("hot")
     assert resp == "second"
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_lazy_import(tmp_path, monkeypatch):
+    pkg = tmp_path / "lazy_cmds"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    (pkg / "slow.py").write_text(
+        """
+IMPORTED = True
+
+
+class Command:
+    trigger = ["slow"]
+    description = "Pretend to be expensive to import."
+
+    def __init__(self, context):
+        pass
+
+    async def run(self, args: str) -> str:
+        return "loaded"
+"""
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    dispatcher = Dispatcher(package="lazy_cmds")
+    cmd = dispatcher.trigger_map["slow"]
+    # Registered from the manifest without importing the module
+    assert "lazy_cmds.slow" not in sys.modules
+    assert cmd.description == "Pretend to be expensive to import."
+
+    assert await dispatcher.dispatch("slow") == "loaded"
+    assert "lazy_cmds.slow" in sys.modules
+
+    # A second dispatcher reuses the cached manifest
+    assert (pkg / "__pycache__" / "lex_manifest.json").exists()
+    assert "slow" in Dispatcher(package="lazy_cmds").trigger_map
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_watcher_reloads_single_module(tmp_path, monkeypatch):
+    import asyncio
+
+    pkg = tmp_path / "watched_cmds"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    template = """
+class Command:
+    trigger = ["{trigger}"]
+
+    def __init__(self, context):
+        pass
+
+    async def run(self, args: str) -> str:
+        return "{reply}"
+"""
+    (pkg / "stay.py").write_text(template.format(trigger="stay", reply="same"))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    dispatcher = Dispatcher(package="watched_cmds")
+    dispatcher.start_watching(interval=0.05)
+    try:
+        stay = dispatcher.trigger_map["stay"]
+        (pkg / "fresh.py").write_text(template.format(trigger="fresh", reply="new"))
+        for _ in range(100):
+            if "fresh" in dispatcher.trigger_map:
+                break
+            await asyncio.sleep(0.02)
+        assert await dispatcher.dispatch("fresh") == "new"
+        # Unchanged plugins keep their instance
+        assert dispatcher.trigger_map["stay"] is stay
+
+        (pkg / "fresh.py").unlink()
+        for _ in range(100):
+            if "fresh" not in dispatcher.trigger_map:
+                break
+            await asyncio.sleep(0.02)
+        assert "fresh" not in dispatcher.trigger_map
+    finally:
+        dispatcher.stop_watching()
+
+
+@pytest.mark.asyncio
+async def test_process_executor_timeout_kills_work(tmp_path, monkeypatch):
+    import asyncio
+    import os
+
+    pkg = tmp_path / "proc_cmds"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    marker = tmp_path / "finished"
+    (pkg / "work.py").write_text(
+        f"""
+import os
+import time
+
+
+class Command:
+    trigger = ["work"]
+    executor = "process"
+
+    def __init__(self, context):
+        pass
+
+    async def run(self, args: str) -> str:
+        if args == "slow":
+            time.sleep(1)
+            open({str(marker)!r}, "w").close()
+        return f"pid {{os.getpid()}}"
+"""
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    dispatcher = Dispatcher({"settings": {"plugin_timeout": 0.3}}, package="proc_cmds")
+    # No worker processes until a process-executor command is dispatched
+    assert dispatcher.process_pool is None
+    resp = await dispatcher.dispatch("work")
+    assert resp.startswith("pid ") and resp != f"pid {os.getpid()}"
+    # The worker process is reused between calls
+    assert await dispatcher.dispatch("work") == resp
+
+    assert "timed out" in (await dispatcher.dispatch("work slow")).lower()
+    await asyncio.sleep(1.2)
+    assert not marker.exists()
+    # A replacement worker serves the next call
+    assert (await dispatcher.dispatch("work")).startswith("pid ")
+
+
+@pytest.mark.asyncio
+async def test_process_pool_waits_for_idle_worker_and_retries_spawns(
+    tmp_path, monkeypatch
+):
+    import asyncio
+
+    from core import procpool
+
+    pkg = tmp_path / "pool_cmds"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    (pkg / "nap.py").write_text(
+        """
+import os
+import time
+
+
+class Command:
+    trigger = ["nap"]
+
+    def __init__(self, context):
+        pass
+
+    async def run(self, args: str) -> str:
+        time.sleep(0.2)
+        return str(os.getpid())
+"""
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(procpool, "SPAWN_RETRY_DELAY", 0)
+    spawn = procpool.ProcessPool._spawn
+    failures = []
+
+    def flaky_spawn(self):
+        if not failures:
+            failures.append(True)
+            raise OSError("no processes left")
+        return spawn(self)
+
+    monkeypatch.setattr(procpool.ProcessPool, "_spawn", flaky_spawn)
+    pool = procpool.ProcessPool(1)
+    try:
+        # The first spawn fails and is retried; both calls share the single
+        # worker, the second waiting until the first releases it
+        first, second = await asyncio.gather(
+            pool.run("pool_cmds.nap", "", {}, 5, root=str(tmp_path)),
+            pool.run("pool_cmds.nap", "", {}, 5, root=str(tmp_path)),
+        )
+        assert failures and first == second
+    finally:
+        pool.close()
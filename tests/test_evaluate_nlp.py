@@ -0,0 +1,20 @@
+from scripts.evaluate_nlp import DEFAULT_CORPUS, format_report, load_corpus, run
+
+
+def test_evaluation_report(tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text(
+        '{"text": "weather in oslo", "command": "weather oslo"}\n'
+        '{"text": "pnig", "command": "ping"}\n'
+        '{"text": "xyzzy plugh", "command": "ping"}\n'
+    )
+    report = run(load_corpus(str(corpus)))
+    assert report["n"] == 3
+    assert report["stages"]["default"]["handled"] == 1
+    assert report["stages"]["fuzzy"]["accuracy"] == 1.0
+    assert report["errors"][0]["text"] == "xyzzy plugh"
+    assert report["confusion"] == [{"expected": "ping", "routed": "-", "count": 1}]
+    assert len(report["calibration"]["thresholds"]) > 0
+    assert report["latency"]["total"]["p99_ms"] >= report["latency"]["total"]["p50_ms"]
+    assert "routed correctly" in format_report(report)
+    assert all({"text", "command"} <= set(row) for row in DEFAULT_CORPUS)
@@ -3,6 +3,7 @@ from scripts.feature_suggester import (
     normalize_phrase,
     propose_pattern_and_template,
     cluster_and_create_suggestions,
+    label_suggestions,
 )
 
 
@@ -31,3 +32,10 @@ def test_cluster_and_create_suggestions_basic():
     suggestions = cluster_and_create_suggestions(texts, min_occurrences=2)
     assert "foo" in suggestions
     assert suggestions["foo"]["template"] in ["timer {group(1)}", "foo"]
+
+
+def test_label_suggestions_adds_closest_command():
+    suggestions = cluster_and_create_suggestions(["flip a coin"] * 3, min_occurrences=3)
+    labelled = label_suggestions(suggestions)
+    assert labelled["flip a coin"]["closest_command"] == "game flip"
+    assert 0 < labelled["flip a coin"]["confidence"] <= 1
@@ -1,20 +1,25 @@
 """Textual-based frontend for Lex with theme support."""
 
+from __future__ import annotations
+
 import asyncio
 import argparse
 import logging
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from textual.app import App, ComposeResult
 from textual.containers import Container
 from textual.reactive import reactive
 from textual.widgets import Input, Log, Static, Header, Footer
 
+from core.remote import open_dispatcher
 from core.settings import load_settings
-from core.security import require_vault_key
-from dispatcher import Dispatcher
 from core.logger import set_log_level
 
+if TYPE_CHECKING:
+    from dispatcher import Dispatcher
+
 LEX_VERSION = "0.1.0"
 THEMES_DIR = Path("themes")
 
@@ -84,11 +89,13 @@ class LexApp(App):
         self.history.append(text)
         self.history_index = len(self.history)
         try:
-            response = await self.dispatcher.run_command(text)
+            # Show output as the command produces it
+            async for chunk in self.dispatcher.stream_command(text):
+                if chunk:
+                    log.write_line(chunk)
+                    log.scroll_end(animate=False)
         except Exception as e:
-            response = f"[ERROR] {e}"
-        if response:
-            log.write_line(response)
+            log.write_line(f"[ERROR] {e}")
             log.scroll_end(animate=False)
         if self.show_sidebar:
             # reload sidebar in case commands changed
@@ -119,8 +126,8 @@ async def main(sidebar: bool = False) -> None:
     """Entry point to start the TUI."""
 
     settings = load_settings()
-    key = require_vault_key()
-    dispatcher = Dispatcher({"settings": settings, "vault_key": key})
+    # Share a running lexd's dispatcher when there is one
+    dispatcher = await open_dispatcher(settings)
     theme = settings.get("theme", "lex")
     app = LexApp(dispatcher, sidebar=sidebar, theme=theme)
     dispatcher.context["app"] = app
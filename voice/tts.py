@@ -11,6 +11,7 @@ class TTS:
     def __init__(self, settings: dict):
         self.settings = settings
         self.engine = None
+        self._playback = None
         if self.settings.get("tts_engine", "pyttsx3") == "pyttsx3":
             try:
                 self.engine = pyttsx3.init()
@@ -32,8 +33,32 @@ class TTS:
             except Exception as e:
                 print(f"[Lex] pyttsx3 error: {e}")
 
+    def stop(self) -> None:
+        """Cut off whatever is being spoken right now."""
+        playback, self._playback = self._playback, None
+        if playback is not None:
+            try:
+                playback.stop()
+            except Exception:
+                pass
+        if self.engine:
+            try:
+                self.engine.stop()
+            except Exception:
+                pass
+
     async def speak(self, text: str) -> None:
-        """Speak the given text using the configured engine."""
+        """Speak the given text using the configured engine.
+
+        Cancelling the caller stops playback mid-sentence.
+        """
+        try:
+            await self._speak(text)
+        except asyncio.CancelledError:
+            self.stop()
+            raise
+
+    async def _speak(self, text: str) -> None:
         if self.settings.get("use_cloud") and self.settings.get("tts_engine") == "elevenlabs":
             api_key = self.settings.get("elevenlabs_api_key")
             voice_id = self.settings.get("elevenlabs_voice_id")
@@ -57,12 +82,18 @@ class TTS:
                         tmp.write(response.content)
                         tmp_path = tmp.name
                     wave_obj = await asyncio.to_thread(simpleaudio.WaveObject.from_wave_file, tmp_path)
-                    play_obj = wave_obj.play()
-                    await asyncio.to_thread(play_obj.wait_done)
+                    play_obj = self._playback = wave_obj.play()
                     try:
-                        os.remove(tmp_path)
-                    except Exception:
-                        pass
+                        await asyncio.to_thread(play_obj.wait_done)
+                    except asyncio.CancelledError:
+                        play_obj.stop()
+                        raise
+                    finally:
+                        self._playback = None
+                        try:
+                            os.remove(tmp_path)
+                        except Exception:
+                            pass
                 else:
                     print(f"[Lex] ElevenLabs error: {response.status_code}")
             except Exception as e:
@@ -70,6 +101,12 @@ class TTS:
         elif self.engine:
             await asyncio.to_thread(self._speak_pyttsx3, text)
 
+    async def speak_stream(self, chunks) -> None:
+        """Speak chunks from an async iterator in order as they arrive."""
+        async for chunk in chunks:
+            if chunk.strip():
+                await self.speak(chunk)
+
     def _speak_pyttsx3(self, text: str) -> None:
         """Helper to run pyttsx3 in a thread."""
         if self.engine: